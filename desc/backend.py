@@ -28,6 +28,7 @@ else:
             import jax
             import jaxlib
             import jax.numpy as jnp
+            import jax.scipy.linalg
             from jax.config import config
             config.update("jax_enable_x64", True)
             x = jnp.linspace(0, 5)
@@ -46,6 +47,8 @@ else:
 if use_jax:
     jit = jax.jit
     fori_loop = jax.lax.fori_loop
+    vmap = jax.vmap
+    solve_triangular = jax.scipy.linalg.solve_triangular
 
     def put(arr, inds, vals):
         """Functional interface for array "fancy indexing"
@@ -93,6 +96,7 @@ if use_jax:
 else:
     jit = lambda func, *args, **kwargs: func
     from scipy.special import factorial
+    from scipy.linalg import solve_triangular
 
     # we divide by zero in a few places but then overwrite with the
     # correct asmptotic values, so lets suppress annoying warnings about that
@@ -156,6 +160,41 @@ else:
             val = body_fun(i, val)
         return val
 
+    def vmap(fun, in_axes=0, out_axes=0):
+        """Vectorize a function over a batch axis of its arguments
+
+        This version is for the numpy backend, for jax backend see jax.vmap
+        It loops over the batch and stacks the outputs, or each element of a
+        tuple of outputs.
+
+        Parameters
+        ----------
+        fun : callable
+            function to be mapped over the batch axis
+        in_axes : int, None, or tuple of int or None
+            batch axis of each positional argument. None for arguments that
+            are not batched. An int applies to all arguments. (Default = 0)
+        out_axes : int
+            axis of the output where the batch axis should appear (Default = 0)
+
+        Returns
+        -------
+        fun_vmap : callable
+            batched version of fun
+
+        """
+        def fun_vmap(*args):
+            axes = in_axes if isinstance(in_axes, (tuple, list)) else (in_axes,)*len(args)
+            args = [np.moveaxis(arg, ax, 0) if ax is not None else arg
+                    for arg, ax in zip(args, axes)]
+            size = [arg.shape[0] for arg, ax in zip(args, axes) if ax is not None][0]
+            out = [fun(*[arg[i] if ax is not None else arg
+                         for arg, ax in zip(args, axes)]) for i in range(size)]
+            if isinstance(out[0], tuple):
+                return tuple(np.stack(o, axis=out_axes) for o in zip(*out))
+            return np.stack(out, axis=out_axes)
+        return fun_vmap
+
 
 class Timer():
     """Simple object for organizing timing info
@@ -1,5 +1,6 @@
 import numpy as np
 from abc import ABC, abstractmethod
+from math import comb, factorial as _factorial
 from desc.equilibrium_io import IOAble
 
 from desc.backend import jnp, sign, fori_loop, flatten_list, factorial, equals, Tristate
@@ -63,6 +64,47 @@ class Basis(IOAble,ABC):
                                self.__modes[:, 2]))
         self.__modes = self.__modes[sort_idx]
 
+    def _build_masks_(self) -> None:
+        """Builds the masks of common mode selections
+
+        Returns
+        -------
+        None
+
+        """
+        self.__axisymmetric_mask = self.__modes[:, 2] == 0
+        self.__nonnegative_mask = np.logical_and(self.__modes[:, 1] >= 0,
+                                                 self.__modes[:, 2] >= 0)
+        self.__chevron_mask = self.__modes[:, 0] == np.abs(self.__modes[:, 1])
+        # sorted integer keys of the modes, for looking up mode indices
+        (self.__modes_lo, self.__modes_span, self.__modes_sort_idx,
+         self.__modes_sorted_keys) = _index_modes(self.__modes)
+
+    def get_idx(self, l=0, m=0, n=0):
+        """Gets the indices of modes in the basis
+
+        Parameters
+        ----------
+        l : int or array-like of int
+            radial mode numbers
+        m : int or array-like of int
+            poloidal mode numbers
+        n : int or array-like of int
+            toroidal mode numbers
+
+        Returns
+        -------
+        idx : int or ndarray of int
+            index of each mode (l,m,n) in self.modes, -1 if it is not in the
+            basis. Inputs are broadcast against each other.
+
+        """
+        l, m, n = np.broadcast_arrays(l, m, n)
+        query = np.stack([l.flatten(), m.flatten(), n.flatten()], axis=1)
+        idx = _search_modes(query, self.__modes_lo, self.__modes_span,
+                            self.__modes_sort_idx, self.__modes_sorted_keys).reshape(l.shape)
+        return int(idx) if idx.ndim == 0 else idx
+
     def _def_save_attrs_(self) -> None:
         """Defines attributes to save
 
@@ -82,6 +124,10 @@ class Basis(IOAble,ABC):
     def evaluate(self):
         pass
 
+    @abstractmethod
+    def evaluate_factors(self):
+        pass
+
     @abstractmethod
     def change_resolution(self) -> None:
         """Change resolution of the basis to the given resolutions.
@@ -131,11 +177,27 @@ class Basis(IOAble,ABC):
     @modes.setter
     def modes(self, modes) -> None:
         self.__modes = modes
+        self._build_masks_()
 
     @property
     def num_modes(self) -> int:
         return self.__modes.shape[0]
 
+    @property
+    def axisymmetric_mask(self):
+        """ndarray of bool, shape(Nmodes,): True for modes with n = 0"""
+        return self.__axisymmetric_mask
+
+    @property
+    def nonnegative_mask(self):
+        """ndarray of bool, shape(Nmodes,): True for modes with m >= 0 and n >= 0"""
+        return self.__nonnegative_mask
+
+    @property
+    def chevron_mask(self):
+        """ndarray of bool, shape(Nmodes,): True for modes with l = |m|"""
+        return self.__chevron_mask
+
 
 class PowerSeries(Basis):
     """1D basis set for flux surface quantities.
@@ -169,6 +231,7 @@ class PowerSeries(Basis):
             #self._def_save_attrs_()
         else:
             self._init_from_file_(load_from=load_from, file_format=file_format, obj_lib=obj_lib)
+        self._build_masks_()
 
     def get_modes(self, L:int=0):
         """Gets mode numbers for power series
@@ -187,7 +250,7 @@ class PowerSeries(Basis):
         """
         return np.array([[l, 0, 0] for l in range(L+1)])
 
-    def evaluate(self, nodes, derivatives=np.array([0, 0, 0])):
+    def evaluate(self, nodes, derivatives=np.array([0, 0, 0]), modes=None):
         """Evaluates basis functions at specified nodes
 
         Parameters
@@ -196,6 +259,8 @@ class PowerSeries(Basis):
             node coordinates, in (rho,theta,zeta)
         derivatives : ndarray of int, shape(3,)
             order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.modes
 
         Returns
         -------
@@ -203,7 +268,35 @@ class PowerSeries(Basis):
             basis functions evaluated at nodes
 
         """
-        return powers(nodes[:, 0], self._Basis__modes[:, 0], dr=derivatives[0])
+        radial, poloidal, toroidal = self.evaluate_factors(nodes, derivatives, modes)
+        return radial*poloidal*toroidal
+
+    def evaluate_factors(self, nodes, derivatives=np.array([0, 0, 0]), modes=None):
+        """Evaluates the radial, poloidal and toroidal factors of the basis
+        functions at specified nodes
+
+        Parameters
+        ----------
+        nodes : ndarray of float, size(3,N)
+            node coordinates, in (rho,theta,zeta)
+        derivatives : ndarray of int, shape(3,)
+            order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.modes
+
+        Returns
+        -------
+        radial, poloidal, toroidal : ndarray, shape(N,K)
+            factors of the basis functions evaluated at nodes, such that
+            ``evaluate(nodes) = radial*poloidal*toroidal``
+
+        """
+        if modes is None:
+            modes = self._Basis__modes
+        radial = powers(nodes[:, 0], modes[:, 0], dr=derivatives[0])
+        poloidal = np.ones((nodes.shape[0], modes.shape[0]))
+        toroidal = np.ones((nodes.shape[0], modes.shape[0]))
+        return radial, poloidal, toroidal
 
     def change_resolution(self, L:int) -> None:
         """Change resolution of the basis to the given resolution. Overrides parent Basis object's change_resolution method.
@@ -221,7 +314,9 @@ class PowerSeries(Basis):
         if L != self._Basis__L:
             self._Basis__L = L
             self._Basis__modes = self.get_modes(self._Basis__L)
-            self.sort_nodes()
+            self._enforce_symmetry_()
+            self._sort_modes_()
+            self._build_masks_()
 
 
 class DoubleFourierSeries(Basis):
@@ -265,6 +360,7 @@ class DoubleFourierSeries(Basis):
             #self._def_save_attrs_()
         else:
             self._init_from_file_(load_from=load_from, file_format=file_format, obj_lib=obj_lib)
+        self._build_masks_()
 
     def get_modes(self, M:int=0, N:int=0) -> None:
         """Gets mode numbers for double fourier series
@@ -287,7 +383,7 @@ class DoubleFourierSeries(Basis):
         dim_tor = 2*N+1
         return np.array([[0, m-M, n-N] for m in range(dim_pol) for n in range(dim_tor)])
 
-    def evaluate(self, nodes, derivatives=np.array([0, 0, 0])):
+    def evaluate(self, nodes, derivatives=np.array([0, 0, 0]), modes=None):
         """Evaluates basis functions at specified nodes
 
         Parameters
@@ -296,6 +392,8 @@ class DoubleFourierSeries(Basis):
             node coordinates, in (rho,theta,zeta)
         derivatives : ndarray of int, shape(3,)
             order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.modes
 
         Returns
         -------
@@ -303,9 +401,35 @@ class DoubleFourierSeries(Basis):
             basis functions evaluated at nodes
 
         """
-        poloidal = fourier(nodes[:, 1], self._Basis__modes[:, 1], dt=derivatives[1])
-        toroidal = fourier(nodes[:, 2], self._Basis__modes[:, 2], NFP=self._Basis__NFP, dt=derivatives[2])
-        return poloidal*toroidal
+        radial, poloidal, toroidal = self.evaluate_factors(nodes, derivatives, modes)
+        return radial*poloidal*toroidal
+
+    def evaluate_factors(self, nodes, derivatives=np.array([0, 0, 0]), modes=None):
+        """Evaluates the radial, poloidal and toroidal factors of the basis
+        functions at specified nodes
+
+        Parameters
+        ----------
+        nodes : ndarray of float, size(3,N)
+            node coordinates, in (rho,theta,zeta)
+        derivatives : ndarray of int, shape(3,)
+            order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.modes
+
+        Returns
+        -------
+        radial, poloidal, toroidal : ndarray, shape(N,K)
+            factors of the basis functions evaluated at nodes, such that
+            ``evaluate(nodes) = radial*poloidal*toroidal``
+
+        """
+        if modes is None:
+            modes = self._Basis__modes
+        radial = np.ones((nodes.shape[0], modes.shape[0]))
+        poloidal = fourier(nodes[:, 1], modes[:, 1], dt=derivatives[1])
+        toroidal = fourier(nodes[:, 2], modes[:, 2], NFP=self._Basis__NFP, dt=derivatives[2])
+        return radial, poloidal, toroidal
 
     def change_resolution(self, M:int, N:int) -> None:
         """Change resolution of the basis to the given resolutions. Overrides parent Basis object's change_resolution method.
@@ -326,7 +450,9 @@ class DoubleFourierSeries(Basis):
             self._Basis__M = M
             self._Basis__N = N
             self._Basis__modes = self.get_modes(self._Basis__M, self._Basis__N)
-            self.sort_nodes()
+            self._enforce_symmetry_()
+            self._sort_modes_()
+            self._build_masks_()
 
 
 class FourierZernikeBasis(Basis):
@@ -403,6 +529,7 @@ class FourierZernikeBasis(Basis):
             #self._def_save_attrs_()
         else:
             self._init_from_file_(load_from=load_from, file_format=file_format, obj_lib=obj_lib)
+        self._build_masks_()
 
 
     def get_modes(self, L:int=-1, M:int=0, N:int=0, index:str='ansi'):
@@ -482,7 +609,7 @@ class FourierZernikeBasis(Basis):
             np.tile(np.arange(-N, N+1), (num_pol, 1)).flatten(order='f')).T
         return np.hstack([pol, tor])
 
-    def evaluate(self, nodes, derivatives=np.array([0, 0, 0])):
+    def evaluate(self, nodes, derivatives=np.array([0, 0, 0]), modes=None):
         """Evaluates basis functions at specified nodes
 
         Parameters
@@ -491,6 +618,8 @@ class FourierZernikeBasis(Basis):
             node coordinates, in (rho,theta,zeta)
         derivatives : ndarray of int, shape(3,)
             order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.modes
 
         Returns
         -------
@@ -498,37 +627,143 @@ class FourierZernikeBasis(Basis):
             basis functions evaluated at nodes
 
         """
-        radial = jacobi(nodes[:, 0], self._Basis__modes[:, 0], self._Basis__modes[:, 1], dr=derivatives[0])
-        poloidal = fourier(nodes[:, 1], self._Basis__modes[:, 1], dt=derivatives[1])
-        toroidal = fourier(nodes[:, 2], self._Basis__modes[:, 2], NFP=self._Basis__NFP, dt=derivatives[2])
+        radial, poloidal, toroidal = self.evaluate_factors(nodes, derivatives, modes)
         return radial*poloidal*toroidal
 
-    def change_resolution(self, M:int, N:int, delta_lm:int) -> None:
+    def evaluate_factors(self, nodes, derivatives=np.array([0, 0, 0]), modes=None):
+        """Evaluates the radial, poloidal and toroidal factors of the basis
+        functions at specified nodes
+
+        Parameters
+        ----------
+        nodes : ndarray of float, size(3,N)
+            node coordinates, in (rho,theta,zeta)
+        derivatives : ndarray of int, shape(3,)
+            order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.modes
+
+        Returns
+        -------
+        radial, poloidal, toroidal : ndarray, shape(N,K)
+            factors of the basis functions evaluated at nodes, such that
+            ``evaluate(nodes) = radial*poloidal*toroidal``
+
+        """
+        if modes is None:
+            modes = self._Basis__modes
+        radial = jacobi(nodes[:, 0], modes[:, 0], modes[:, 1], dr=derivatives[0])
+        poloidal = fourier(nodes[:, 1], modes[:, 1], dt=derivatives[1])
+        toroidal = fourier(nodes[:, 2], modes[:, 2], NFP=self._Basis__NFP, dt=derivatives[2])
+        return radial, poloidal, toroidal
+
+    def change_resolution(self, L:int, M:int, N:int) -> None:
         """Change resolution of the basis to the given resolutions. Overrides parent Basis object's change_resolution method.
 
         Parameters
         ----------
+        L : int
+            maximum radial resolution
         M : int
             maximum poloidal resolution
         N : int
             maximum toroidal resolution
-        delta_lm : int
-            maximum difference between poloidal and radial resolution (l-m).
-            If < 0, defaults to ``M`` for 'ansi' or 'chevron' indexing, and
-            ``2*M`` for 'fringe' or 'house'. Unused for 'fourier' indexing.
 
         Returns
         -------
         None
 
         """
-        if M != self._Basis__M or N != self._Basis__N or delta_lm != self.__delta_lm:
+        if L != self._Basis__L or M != self._Basis__M or N != self._Basis__N:
+            self._Basis__L = L
             self._Basis__M = M
             self._Basis__N = N
-            self.__delta_lm = delta_lm
-            self._Basis__modes = self.get_modes(self._Basis__M, self._Basis__N,
-                          delta_lm=self.__delta_lm, indexing=self.__indexing)
-            self.sort_nodes()
+            self._Basis__modes = self.get_modes(L=self._Basis__L, M=self._Basis__M,
+                                                N=self._Basis__N, index=self.__index)
+            self._enforce_symmetry_()
+            self._sort_modes_()
+            self._build_masks_()
+
+
+def find_modes(modes, query):
+    """Finds the indices of modes in an array of modes
+
+    Sorts integer keys of (l,m,n) and searches them, so the cost is
+    O((K+Q)*log(K)) rather than a scan of all modes for each query. To search
+    the same modes repeatedly, use Basis.get_idx, which sorts them only once.
+
+    Parameters
+    ----------
+    modes : ndarray of int, shape(K,3)
+        array of mode numbers [l,m,n] to search
+    query : ndarray of int, shape(Q,3)
+        mode numbers [l,m,n] to find
+
+    Returns
+    -------
+    idx : ndarray of int, shape(Q,)
+        index of each query mode in modes, -1 if it is not present
+
+    """
+    return _search_modes(query, *_index_modes(modes))
+
+
+def _index_modes(modes):
+    """Sorts integer keys of the modes [l,m,n], for _search_modes"""
+    modes = np.atleast_2d(modes).astype(int)
+    if modes.shape[0] == 0:
+        lo = np.zeros((3,), dtype=int)
+        span = np.ones((3,), dtype=int)
+    else:
+        lo = modes.min(axis=0)
+        span = modes.max(axis=0) - lo + 1
+    keys = _mode_keys(modes, lo, span)
+    sort_idx = np.argsort(keys, kind='stable')
+    return lo, span, sort_idx, keys[sort_idx]
+
+
+def _mode_keys(modes, lo, span):
+    """Integer key of each mode [l,m,n] in the box lo <= mode < lo+span"""
+    x = modes - lo
+    return (x[:, 0]*span[1] + x[:, 1])*span[2] + x[:, 2]
+
+
+def _search_modes(query, lo, span, sort_idx, sorted_keys):
+    """Finds the indices of query modes, given the sorted keys from _index_modes"""
+    query = np.atleast_2d(query).astype(int)
+    if sorted_keys.size == 0 or query.shape[0] == 0:
+        return -np.ones((query.shape[0],), dtype=int)
+    # modes outside the box of the searched modes cannot be found
+    inside = np.all((query >= lo) & (query < lo + span), axis=1)
+    query_keys = np.where(inside, _mode_keys(query, lo, span), -1)
+    pos = np.clip(np.searchsorted(sorted_keys, query_keys), 0, sorted_keys.size-1)
+    return np.where(inside & (sorted_keys[pos] == query_keys), sort_idx[pos], -1)
+
+
+def copy_coeffs(c_old, modes_old, modes_new):
+    """Copies spectral coefficients from one set of modes to another
+
+    Parameters
+    ----------
+    c_old : ndarray, shape(K_old,)
+        spectral coefficients of modes_old
+    modes_old : ndarray of int, shape(K_old,3)
+        mode numbers [l,m,n] of the old basis
+    modes_new : ndarray of int, shape(K_new,3)
+        mode numbers [l,m,n] of the new basis
+
+    Returns
+    -------
+    c_new : ndarray, shape(K_new,)
+        spectral coefficients of modes_new. Modes that are not in the old
+        basis have coefficients of zero.
+
+    """
+    idx = find_modes(modes_old, modes_new)
+    found = idx >= 0
+    c_new = np.zeros((idx.size,))
+    c_new[found] = np.asarray(c_old)[idx[found]]
+    return c_new
 
 
 def polyder_vec(p, m):
@@ -661,7 +896,7 @@ def jacobi_coeffs(l, m):
 
 
     """
-    factorial = np.math.factorial
+    factorial = _factorial
     l = np.atleast_1d(l).astype(int)
     m = np.atleast_1d(np.abs(m)).astype(int)
     npoly = len(l)
@@ -672,13 +907,18 @@ def jacobi_coeffs(l, m):
         ll = l[ii]
         mm = m[ii]
         for s in range(mm, ll+1, 2):
-            coeffs[ii, s] = (-1)**((ll-s)/2)*factorial((ll+s)/2)/(
-                factorial((ll-s)/2)*factorial((s+mm)/2)*factorial((s-mm)/2))
+            coeffs[ii, s] = (-1)**((ll-s)//2)*factorial((ll+s)//2)/(
+                factorial((ll-s)//2)*factorial((s+mm)//2)*factorial((s-mm)//2))
     return np.fliplr(np.where(lm_even, coeffs, 0))
 
 
 def jacobi(rho, l, m, dr=0):
-    """Jacobi polynomials
+    """Zernike radial polynomials and their radial derivatives
+
+    Uses the relation R_l^m(rho) = (-1)^n rho^|m| P_n^(|m|,0)(1-2rho^2), where
+    n = (l-|m|)/2 and P_n^(a,b) is a Jacobi polynomial. The Jacobi polynomials
+    of all modes are evaluated together with the three-term recurrence in the
+    degree n, which is numerically stable and avoids computing factorials.
 
     Parameters
     ----------
@@ -697,9 +937,46 @@ def jacobi(rho, l, m, dr=0):
         basis function(s) evaluated at specified points
 
     """
-    coeffs = jacobi_coeffs(l, m)
-    coeffs = polyder_vec(coeffs, dr)
-    return polyval_vec(coeffs, rho).T
+    rho = jnp.atleast_2d(jnp.asarray(rho, dtype=float)).T
+    l = np.atleast_1d(l).astype(int)
+    m = np.atleast_1d(np.abs(m)).astype(int)
+    n = (l - m) // 2
+    alpha = m.astype(float)
+    x = 1 - 2*rho**2
+
+    # P[j] is the j-th derivative with respect to x of P_k^(alpha,0)(x)
+    zeros = jnp.zeros((rho.shape[0], l.size))
+    P_km1 = [zeros + 1] + [zeros]*dr
+    P_k = [zeros + (alpha+2)/2*x + alpha/2, zeros + (alpha+2)/2] + [zeros]*(dr-1)
+    P_k = P_k[:dr+1]
+    P = [jnp.where(n == 0, P_km1[j], jnp.where(n == 1, P_k[j], 0))
+         for j in range(dr+1)]
+
+    for k in range(2, np.max(n)+1):
+        c1 = 2*k*(k+alpha)*(2*k+alpha-2)
+        c2 = (2*k+alpha-1)*(2*k+alpha)*(2*k+alpha-2)
+        c3 = (2*k+alpha-1)*alpha**2
+        c4 = 2*(k+alpha-1)*(k-1)*(2*k+alpha)
+        P_kp1 = [((c2*x + c3)*P_k[j] + j*c2*(P_k[j-1] if j else 0)
+                  - c4*P_km1[j]) / c1 for j in range(dr+1)]
+        P_km1 = P_k
+        P_k = P_kp1
+        P = [jnp.where(n == k, P_k[j], P[j]) for j in range(dr+1)]
+
+    # d^k/drho^k P(x(rho)) by Faa di Bruno's formula, with x' = -4rho, x'' = -4
+    def dP(k):
+        return sum(_factorial(k) // (_factorial(2*j-k)*_factorial(k-j))
+                   * (-4*rho)**(2*j-k) * (-2)**(k-j) * P[j]
+                   for j in range((k+1)//2, k+1))
+
+    # Leibniz rule for the product rho^|m| * P(x(rho))
+    y = zeros
+    for i in range(dr+1):
+        falling = np.prod([m-j for j in range(i)], axis=0) if i else np.ones_like(m)
+        rho_m = jnp.where(m >= i, falling*rho**np.maximum(m-i, 0), 0)
+        y = y + comb(dr, i) * rho_m * dP(dr-i)
+
+    return jnp.where((l-m) % 2 == 0, (-1)**n * y, 0)
 
 
 def fourier(theta, m, NFP=1, dt=0):
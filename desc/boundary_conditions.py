@@ -1,4 +1,5 @@
 import numpy as np
+import functools
 
 from desc.backend import jnp, put, Tristate
 from desc.grid import Grid
@@ -49,13 +50,10 @@ def format_bdry(bdry, Rb_basis:DoubleFourierSeries,
         cRb = np.zeros((Rb_basis.num_modes,))
         cZb = np.zeros((Zb_basis.num_modes,))
 
-        for m, n, bR, bZ in bdry:
-            idx_R = np.where(np.logical_and(Rb_basis.modes[:, 1] == int(m),
-                                            Rb_basis.modes[:, 2] == int(n)))[0]
-            idx_Z = np.where(np.logical_and(Zb_basis.modes[:, 1] == int(m),
-                                            Zb_basis.modes[:, 2] == int(n)))[0]
-            cRb = put(cRb, idx_R, bR)
-            cZb = put(cZb, idx_Z, bZ)
+        idx_R = Rb_basis.get_idx(l=0, m=bdry[:, 0], n=bdry[:, 1])
+        idx_Z = Zb_basis.get_idx(l=0, m=bdry[:, 0], n=bdry[:, 1])
+        cRb = put(cRb, idx_R[idx_R >= 0], bdry[idx_R >= 0, 2])
+        cZb = put(cZb, idx_Z[idx_Z >= 0], bdry[idx_Z >= 0, 3])
 
     return cRb, cZb
 
@@ -103,31 +101,25 @@ def compute_bdry_err(cR, cZ, cL, cRb, cZb, R1_transform, Z1_transform, L_transfo
 
     # cannot use Transform object with JAX
     nodes = jnp.array([rho, theta, phi]).T
-    if L_transform.basis.sym == None:
-        A = L_transform.basis.evaluate(nodes)
-        pinv_R = jnp.linalg.pinv(A, rcond=1e-6)
-        pinv_Z = pinv_R
-        ratio_Rb = jnp.where(L_transform.basis.modes[:, 2] != 0, bdry_ratio, 1)
-        ratio_Zb = ratio_Rb
-    else:
-        Rb_basis = DoubleFourierSeries(
-                                M=L_transform.basis.M, N=L_transform.basis.N,
-                                NFP=L_transform.basis.NFP, sym=Tristate(True))
-        Zb_basis = DoubleFourierSeries(
-                                M=L_transform.basis.M, N=L_transform.basis.N,
-                                NFP=L_transform.basis.NFP, sym=Tristate(False))
-        AR = Rb_basis.evaluate(nodes)
-        AZ = Zb_basis.evaluate(nodes)
-        pinv_R = jnp.linalg.pinv(AR, rcond=1e-6)
-        pinv_Z = jnp.linalg.pinv(AZ, rcond=1e-6)
-        ratio_Rb = jnp.where(Rb_basis.modes[:, 2] != 0, bdry_ratio, 1)
-        ratio_Zb = jnp.where(Zb_basis.modes[:, 2] != 0, bdry_ratio, 1)
+    basis = L_transform.basis
+    Rb_basis, Zb_basis, Rb_mask, Zb_mask = get_bdry_bases(
+                            basis.M, basis.N, basis.NFP, basis.sym == None)
+    ratio_Rb = jnp.where(Rb_mask, bdry_ratio, 1)
+    ratio_Zb = jnp.where(Zb_mask, bdry_ratio, 1)
 
     # LCFS transform and fit
     R = R1_transform.transform(cR)
     Z = Z1_transform.transform(cZ)
-    cR_lcfs = jnp.matmul(pinv_R, R)
-    cZ_lcfs = jnp.matmul(pinv_Z, Z)
+    if Rb_basis is Zb_basis:
+        A = Rb_basis.evaluate(nodes)
+        cRZ_lcfs = lstsq_qr(A, jnp.array([R, Z]).T)
+        cR_lcfs = cRZ_lcfs[:, 0]
+        cZ_lcfs = cRZ_lcfs[:, 1]
+    else:
+        AR = Rb_basis.evaluate(nodes)
+        AZ = Zb_basis.evaluate(nodes)
+        cR_lcfs = lstsq_qr(AR, R)
+        cZ_lcfs = lstsq_qr(AZ, Z)
 
     # compute errors
     errR = cR_lcfs - cRb*ratio_Rb
@@ -135,6 +127,78 @@ def compute_bdry_err(cR, cZ, cL, cRb, cZb, R1_transform, Z1_transform, L_transfo
     return errR, errZ
 
 
+@functools.lru_cache()
+def get_bdry_bases(M:int, N:int, NFP:int, asym:bool):
+    """Gets the spectral bases of the R and Z boundary coefficients.
+    Results are cached, so the bases are only created once per resolution.
+
+    Parameters
+    ----------
+    M : int
+        maximum poloidal resolution
+    N : int
+        maximum toroidal resolution
+    NFP : int
+        number of field periods
+    asym : bool
+        True for no symmetry, False for stellarator symmetry
+
+    Returns
+    -------
+    Rb_basis : DoubleFourierSeries
+        spectral basis for R boundary coefficients
+    Zb_basis : DoubleFourierSeries
+        spectral basis for Z boundary coefficients (same object as Rb_basis
+        if asym is True)
+    Rb_mask : ndarray of bool, shape(Rb_basis.num_modes,)
+        True for the non-axisymmetric modes of Rb_basis
+    Zb_mask : ndarray of bool, shape(Zb_basis.num_modes,)
+        True for the non-axisymmetric modes of Zb_basis
+
+    """
+    if asym:
+        Rb_basis = DoubleFourierSeries(M=M, N=N, NFP=NFP, sym=Tristate(None))
+        Zb_basis = Rb_basis
+    else:
+        Rb_basis = DoubleFourierSeries(M=M, N=N, NFP=NFP, sym=Tristate(True))
+        Zb_basis = DoubleFourierSeries(M=M, N=N, NFP=NFP, sym=Tristate(False))
+    Rb_mask = ~Rb_basis.axisymmetric_mask
+    Zb_mask = ~Zb_basis.axisymmetric_mask
+    return Rb_basis, Zb_basis, Rb_mask, Zb_mask
+
+
+def lstsq_qr(A, b, rcond=1e-6):
+    """Solves the linear least squares problem min||Ax-b|| using a reduced
+    QR factorization followed by an SVD of the small triangular factor, so the
+    SVD is of an NxN rather than an MxN matrix. Singular values
+    below rcond times the largest are truncated as in pinv, so rank deficient
+    problems (such as sin(M*theta) sampled on 2M equally spaced nodes) get the
+    minimum norm solution and near singular directions are discarded. This does
+    not branch on the data, so it can be traced and vmapped.
+
+    Parameters
+    ----------
+    A : ndarray, shape(M,N)
+        coefficient matrix
+    b : ndarray, shape(M,) or shape(M,K)
+        right hand side(s)
+    rcond : float
+        cutoff for small singular values, relative to the largest
+
+    Returns
+    -------
+    x : ndarray, shape(N,) or shape(N,K)
+        least squares solution(s)
+
+    """
+    Q, R = jnp.linalg.qr(A)
+    U, s, Vt = jnp.linalg.svd(R, full_matrices=False)
+    large = s > rcond*jnp.max(s)
+    s_inv = jnp.where(large, 1/jnp.where(large, s, 1), 0)
+    y = jnp.matmul(U.T, jnp.matmul(Q.T, b))
+    return jnp.matmul(Vt.T, s_inv.reshape((-1,) + (1,)*(y.ndim-1))*y)
+
+
 # FIXME: this method might not be stable, but could yield speed improvements
 def compute_bdry_err_sfl(cR, cZ, cL, cRb, cZb, RZ_transform, L_transform, bdry_transform, bdry_ratio):
     """Compute boundary error in (theta,phi) Fourier coefficients from non-uniform interpolation grid
@@ -187,17 +251,13 @@ def compute_bdry_err_sfl(cR, cZ, cL, cRb, cZb, RZ_transform, L_transform, bdry_t
     cRb_sfl = bdry_transform.fit(R)
     cZb_sfl = bdry_transform.fit(Z)
 
-    # compute errors
-    errR = np.zeros_like(cRb_sfl)
-    errZ = np.zeros_like(cZb_sfl)
-    i = 0
-    for l, m, n in bdry_transform.modes:
-        idx = np.where(np.logical_and(
-            RZ_transform.basis.modes[:, 1] == m,
-            RZ_transform.basis.modes[:, 2] == n))[0]
-        errR[i] = np.sum(cR[idx]) - cRb_sfl[i]
-        errZ[i] = np.sum(cZ[idx]) - cZb_sfl[i]
-        i += 1
+    # compute errors, summing the coefficients of all l for each (m,n)
+    modes = RZ_transform.basis.modes
+    idx = bdry_transform.basis.get_idx(l=0, m=modes[:, 1], n=modes[:, 2])
+    errR = -cRb_sfl
+    errZ = -cZb_sfl
+    np.add.at(errR, idx[idx >= 0], cR[idx >= 0])
+    np.add.at(errZ, idx[idx >= 0], cZ[idx >= 0])
 
     return errR, errZ
 
@@ -220,8 +280,7 @@ def compute_lambda_err(cL, L_basis:DoubleFourierSeries):
 
     """
 
-    errL = jnp.sum(jnp.where(jnp.logical_and(L_basis.modes[:, 1] >= 0,
-                                             L_basis.modes[:, 2] >= 0), cL, 0))
+    errL = jnp.sum(jnp.where(L_basis.nonnegative_mask, cL, 0))
     return errL
 
 
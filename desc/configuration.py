@@ -1,11 +1,11 @@
 import numpy as np
-from collections.abc import MutableSequence
+from collections.abc import MutableSequence, Mapping, MutableMapping
 
 from desc.backend import jnp, put, opsindex, cross, dot, TextColors, Tristate
-from desc.basis import Basis, PowerSeries, DoubleFourierSeries, FourierZernikeBasis
+from desc.basis import Basis, PowerSeries, DoubleFourierSeries, FourierZernikeBasis, copy_coeffs
 from desc.grid import Grid, LinearGrid, ConcentricGrid
-from desc.transform import Transform
-from desc.init_guess import get_initial_guess_scale_bdry
+from desc.transform import Transform, COORDINATE_DERIVATIVES
+from desc.init_guess import get_initial_guess_scale_bdry, get_initial_guess_vmec
 from desc.boundary_conditions import format_bdry
 #from desc import equilibrium_io as eq_io
 from desc.equilibrium_io import IOAble, reader_factory, writer_factory
@@ -126,6 +126,8 @@ class Configuration(IOAble):
                 cR : ndarray, spectral coefficients of R
                 cZ : ndarray, spectral coefficients of Z
                 cL : ndarray, spectral coefficients of L
+                vmec_init : str or path-like, VMEC output file to fit the
+                    initial guess of cR, cZ, cL to, if they are not given
 
 
         Raises
@@ -203,60 +205,73 @@ class Configuration(IOAble):
             self.__cZ = inputs['cZ']
             self.__cL = inputs['cL']
         except:
-            self.__cR, self.__cZ = get_initial_guess_scale_bdry(
+            if inputs.get('vmec_init', None) is not None:
+                self.__cR, self.__cZ, self.__cL = get_initial_guess_vmec(
+                        inputs['vmec_init'], self.__R_basis, self.__Z_basis, self.__L_basis,
+                        bdry_ratio)
+            else:
+                self.__cR, self.__cZ = get_initial_guess_scale_bdry(
                         axis, bdry, bdry_ratio, self.__R_basis, self.__Z_basis)
-            self.__cL = np.zeros((self.__L_basis.num_modes,))
+                self.__cL = np.zeros((self.__L_basis.num_modes,))
 
         # state vector
         self.__x = np.concatenate([self.__cR, self.__cZ, self.__cL])
 
     def change_resolution(self, L:int=None, M:int=None, N:int=None) -> None:
-        # TODO: check if resolution actually changes
+        """Changes the spectral resolution, copying the coefficients of
+        modes that are in both the old and new bases
+
+        Bases are only rebuilt if their resolution changes.
 
-        if L is not None:
-            self.__L = L
-        if M is not None:
-            self.__M = M
-        if N is not None:
-            self.__N = N
+        Parameters
+        ----------
+        L : int
+            maximum radial resolution
+        M : int
+            maximum poloidal resolution
+        N : int
+            maximum toroidal resolution
+
+        Returns
+        -------
+        None
+
+        """
+        L = self.__L if L is None else L
+        M = self.__M if M is None else M
+        N = self.__N if N is None else N
+        fourier_changed = M != self.__M or N != self.__N
+        if L == self.__L and not fourier_changed:
+            return
+        self.__L = L
+        self.__M = M
+        self.__N = N
 
         old_modes_R = self.__R_basis.modes
         old_modes_Z = self.__Z_basis.modes
-        old_modes_L = self.__L_basis.modes
-        old_modes_Rb = self.__Rb_basis.modes
-        old_modes_Zb = self.__Zb_basis.modes
-
-        # create bases
         self.__R_basis = FourierZernikeBasis(
                     L=self.__L, M=self.__M, N=self.__N,
                     NFP=self.__NFP, sym=self.__R_sym, index=self.__index)
         self.__Z_basis = FourierZernikeBasis(
                     L=self.__L, M=self.__M, N=self.__N,
                     NFP=self.__NFP, sym=self.__Z_sym, index=self.__index)
-        self.__L_basis = DoubleFourierSeries(
-                    M=self.__M, N=self.__N, NFP=self.__NFP, sym=self.__L_sym)
-        self.__Rb_basis = DoubleFourierSeries(
-                    M=self.__M, N=self.__N, NFP=self.__NFP, sym=self.__R_sym)
-        self.__Zb_basis = DoubleFourierSeries(
-                    M=self.__M, N=self.__N, NFP=self.__NFP, sym=self.__Z_sym)
-
-        def copy_coeffs(c_old, modes_old, modes_new):
-            num_modes = modes_new.shape[0]
-            c_new = np.zeros((num_modes,))
-            for i in range(num_modes):
-                idx = np.where(np.all(np.array([
-                    np.array(modes_old[:, 0] == modes_new[i, 0]),
-                    np.array(modes_old[:, 1] == modes_new[i, 1]),
-                    np.array(modes_old[:, 2] == modes_new[i, 2])]), axis=0))[0]
-                if len(idx):
-                    c_new[i] = c_old[idx[0]]
-            return c_new
-
         self.__cR = copy_coeffs(self.__cR, old_modes_R, self.__R_basis.modes)
         self.__cZ = copy_coeffs(self.__cZ, old_modes_Z, self.__Z_basis.modes)
-        self.__cL = copy_coeffs(self.__cL, old_modes_L, self.__L_basis.modes)
-        self.__cRb = copy_coeffs(self.__cRb, old_modes_Rb, self.__Rb_basis.modes)
-        self.__cZb = copy_coeffs(self.__cZb, old_modes_Zb, self.__Zb_basis.modes)
+
+        # surface bases do not depend on the radial resolution
+        if fourier_changed:
+            old_modes_L = self.__L_basis.modes
+            old_modes_Rb = self.__Rb_basis.modes
+            old_modes_Zb = self.__Zb_basis.modes
+            self.__L_basis = DoubleFourierSeries(
+                        M=self.__M, N=self.__N, NFP=self.__NFP, sym=self.__L_sym)
+            self.__Rb_basis = DoubleFourierSeries(
+                        M=self.__M, N=self.__N, NFP=self.__NFP, sym=self.__R_sym)
+            self.__Zb_basis = DoubleFourierSeries(
+                        M=self.__M, N=self.__N, NFP=self.__NFP, sym=self.__Z_sym)
+            self.__cL = copy_coeffs(self.__cL, old_modes_L, self.__L_basis.modes)
+            self.__cRb = copy_coeffs(self.__cRb, old_modes_Rb, self.__Rb_basis.modes)
+            self.__cZb = copy_coeffs(self.__cZb, old_modes_Zb, self.__Zb_basis.modes)
 
         # state vector
         self.__x = np.concatenate([self.__cR, self.__cZ, self.__cL])
@@ -505,8 +520,8 @@ class Configuration(IOAble):
             keys are of the form 'X_y' meaning the derivative of X wrt to y
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
         return coord_der
@@ -528,11 +543,11 @@ class Configuration(IOAble):
             meaning the unit vector in the x direction, differentiated wrt to y.
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
         return cov_basis
 
     def compute_contravariant_basis(self, grid:Grid) -> dict:
@@ -551,12 +566,12 @@ class Configuration(IOAble):
             dictionary of ndarray containing contravariant basis vectors and jacobian elements
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
-        jacobian = compute_jacobian(coord_der, cov_basis, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
+        jacobian = compute_jacobian(coord_der, cov_basis)
         con_basis = compute_contravariant_basis(coord_der, cov_basis, jacobian, axis=grid.axis)
         return con_basis
 
@@ -578,12 +593,12 @@ class Configuration(IOAble):
             the x derivative of the coordinate jacobian g
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
-        jacobian = compute_jacobian(coord_der, cov_basis, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
+        jacobian = compute_jacobian(coord_der, cov_basis)
         return jacobian
 
     def compute_magnetic_field(self, grid:Grid) -> dict:
@@ -603,13 +618,13 @@ class Configuration(IOAble):
             covariant (B_x) or contravariant (B^x) component of the magnetic field, with the derivative wrt to y.
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         I_transform = Transform(grid, self.__I_basis, derivs=1)
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
-        jacobian = compute_jacobian(coord_der, cov_basis, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
+        jacobian = compute_jacobian(coord_der, cov_basis)
         magnetic_field = compute_magnetic_field(cov_basis, jacobian, self.__cI,
                                                 self.__Psi, I_transform)
         return magnetic_field
@@ -631,13 +646,13 @@ class Configuration(IOAble):
             component of the current, with the derivative wrt to y.
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         I_transform = Transform(grid, self.__I_basis, derivs=1)
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
-        jacobian = compute_jacobian(coord_der, cov_basis, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
+        jacobian = compute_jacobian(coord_der, cov_basis)
         magnetic_field = compute_magnetic_field(cov_basis, jacobian, self.__cI,
                                                 self.__Psi, I_transform)
         plasma_current = compute_plasma_current(coord_der, cov_basis, jacobian,
@@ -659,13 +674,13 @@ class Configuration(IOAble):
             dictionary of ndarray, shape(N_nodes,) of magnetic field magnitude and derivatives
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         I_transform = Transform(grid, self.__I_basis, derivs=1)
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
-        jacobian = compute_jacobian(coord_der, cov_basis, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
+        jacobian = compute_jacobian(coord_der, cov_basis)
         magnetic_field = compute_magnetic_field(cov_basis, jacobian, self.__cI,
                                                 self.__Psi, I_transform)
         magnetic_field_mag = compute_magnetic_field_magnitude(cov_basis,
@@ -687,14 +702,14 @@ class Configuration(IOAble):
             dictionary of ndarray, shape(N_nodes,) of force magnitudes
 
         """
-        R_transform = Transform(grid, self.__R_basis, derivs=3)
-        Z_transform = Transform(grid, self.__Z_basis, derivs=3)
+        R_transform = Transform(grid, self.__R_basis, derivs='qs')
+        Z_transform = Transform(grid, self.__Z_basis, derivs='qs')
         I_transform = Transform(grid, self.__I_basis, derivs=1)
         P_transform = Transform(grid, self.__P_basis, derivs=1)
         coord_der = compute_coordinate_derivatives(self.__cR, self.__cZ,
                                                    R_transform, Z_transform)
-        cov_basis = compute_covariant_basis(coord_der, axis=grid.axis)
-        jacobian = compute_jacobian(coord_der, cov_basis, axis=grid.axis)
+        cov_basis = compute_covariant_basis(coord_der)
+        jacobian = compute_jacobian(coord_der, cov_basis)
         con_basis = compute_contravariant_basis(coord_der, cov_basis, jacobian,
                                                 axis=grid.axis)
         magnetic_field = compute_magnetic_field(cov_basis, jacobian, self.__cI,
@@ -993,10 +1008,117 @@ def compute_coordinates(cR, cZ, R_transform, Z_transform):
     coords['X'] = coords['R']*np.cos(coords['phi'])
     coords['Y'] = coords['R']*np.sin(coords['phi'])
 
-# TODO: eliminate unnecessary derivatives for speedup (eg. R_rrr)
+
+class LazyDict(MutableMapping):
+    """Dictionary of quantities that are only computed when they are accessed
+
+    A value assigned as a callable with no arguments is the expression for
+    that quantity, and is evaluated (and replaced by the result) the first time
+    it is accessed. The expressions look up the quantities they depend on, so
+    accessing a quantity only computes the quantities and the derivatives of
+    R and Z that it needs.
+
+    """
+
+    def __init__(self) -> None:
+        self._values = {}
+        self._lazy = set()
+
+    def __getitem__(self, key):
+        if key in self._lazy:
+            self._values[key] = self._values[key]()
+            self._lazy.discard(key)
+        return self._values[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._values[key] = value
+        if callable(value):
+            self._lazy.add(key)
+        else:
+            self._lazy.discard(key)
+
+    def __delitem__(self, key) -> None:
+        del self._values[key]
+        self._lazy.discard(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def put(self, key, idx, value) -> None:
+        """Replaces the values of a quantity at the given indices
+
+        Parameters
+        ----------
+        key : str
+            name of the quantity
+        idx : ndarray of int
+            indices of the values to replace, eg the axis nodes
+        value : callable
+            expression for the new values, evaluated when the quantity is accessed
+
+        Returns
+        -------
+        None
+
+        """
+        old = self._values[key] if key in self._lazy else (lambda x=self[key]: x)
+        self[key] = lambda: put(old(), idx, value())
+
+
+class CoordinateDerivatives(Mapping):
+    """Derivatives of R and Z at the nodes, stored in a single array
+
+    Values are looked up by name, with keys of the form 'X_y' meaning the
+    derivative of X wrt to y, eg ``coord_der['R_rv']``. ``coord_der['0']``
+    is an array of zeros.
+
+    Parameters
+    ----------
+    values : ndarray, shape(2,N_derivs,N_nodes)
+        derivatives of R (values[0]) and Z (values[1]) at each node
+    derivatives : ndarray of int, shape(N_derivs,3)
+        orders of the derivatives in (rho,theta,zeta) of each row of values
+
+    """
+
+    def __init__(self, values, derivatives) -> None:
+        self.values = values
+        self.derivatives = derivatives
+        self._idx = {}
+        for i, X in enumerate(['R', 'Z']):
+            for j, d in enumerate(derivatives):
+                y = 'r'*d[0] + 'v'*d[1] + 'z'*d[2]
+                self._idx[X + '_'*bool(y) + y] = (i, j)
+
+    def __getitem__(self, key):
+        if key == '0':
+            return jnp.zeros(self.values.shape[-1])
+        return self.values[self._idx[key]]
+
+    def __contains__(self, key) -> bool:
+        return key == '0' or key in self._idx
+
+    def __iter__(self):
+        return iter(['0'] + list(self._idx))
+
+    def __len__(self) -> int:
+        return len(self._idx) + 1
+
+
 def compute_coordinate_derivatives(cR, cZ, R_transform, Z_transform, zeta_ratio=1.0):
     """Converts from spectral to real space and evaluates derivatives of R,Z wrt to SFL coords
 
+    All of the derivatives of R and Z are computed in a single pass with
+    ``Transform.transform_all``. Only the derivatives that the transforms were
+    built with are computed (up to those needed by any quantity, see
+    ``get_derivatives``).
+
     Parameters
     ----------
     cR : ndarray
@@ -1014,67 +1136,23 @@ def compute_coordinate_derivatives(cR, cZ, R_transform, Z_transform, zeta_ratio=
 
     Returns
     -------
-    coord_der : dict
-        dictionary of ndarray, shape(N_nodes,) of coordinate derivatives evaluated at node locations.
-        keys are of the form 'X_y' meaning the derivative of X wrt to y
+    coord_der : CoordinateDerivatives
+        ndarray, shape(N_nodes,) of coordinate derivatives evaluated at node locations,
+        looked up by keys of the form 'X_y' meaning the derivative of X wrt to y
 
     """
-    # notation: X_y means derivative of X wrt y
-    coord_der = {}
-    coord_der['R'] = R_transform.transform(cR, 0, 0, 0)
-    coord_der['Z'] = Z_transform.transform(cZ, 0, 0, 0)
-    coord_der['0'] = jnp.zeros_like(coord_der['R'])
-
-    coord_der['R_r'] = R_transform.transform(cR, 1, 0, 0)
-    coord_der['Z_r'] = Z_transform.transform(cZ, 1, 0, 0)
-    coord_der['R_v'] = R_transform.transform(cR, 0, 1, 0)
-    coord_der['Z_v'] = Z_transform.transform(cZ, 0, 1, 0)
-    coord_der['R_z'] = R_transform.transform(cR, 0, 0, 1) * zeta_ratio
-    coord_der['Z_z'] = Z_transform.transform(cZ, 0, 0, 1) * zeta_ratio
-
-    coord_der['R_rr'] = R_transform.transform(cR, 2, 0, 0)
-    coord_der['Z_rr'] = Z_transform.transform(cZ, 2, 0, 0)
-    coord_der['R_rv'] = R_transform.transform(cR, 1, 1, 0)
-    coord_der['Z_rv'] = Z_transform.transform(cZ, 1, 1, 0)
-    coord_der['R_rz'] = R_transform.transform(cR, 1, 0, 1) * zeta_ratio
-    coord_der['Z_rz'] = Z_transform.transform(cZ, 1, 0, 1) * zeta_ratio
-    coord_der['R_vv'] = R_transform.transform(cR, 0, 2, 0)
-    coord_der['Z_vv'] = Z_transform.transform(cZ, 0, 2, 0)
-    coord_der['R_vz'] = R_transform.transform(cR, 0, 1, 1) * zeta_ratio
-    coord_der['Z_vz'] = Z_transform.transform(cZ, 0, 1, 1) * zeta_ratio
-    coord_der['R_zz'] = R_transform.transform(cR, 0, 0, 2) * zeta_ratio
-    coord_der['Z_zz'] = Z_transform.transform(cZ, 0, 0, 2) * zeta_ratio
-
-    # axis or QS terms
-    if R_transform.grid.axis.size > 0 or R_transform.derivs == 'qs':
-        coord_der['R_rrr'] = R_transform.transform(cR, 3, 0, 0)
-        coord_der['Z_rrr'] = Z_transform.transform(cZ, 3, 0, 0)
-        coord_der['R_rrv'] = R_transform.transform(cR, 2, 1, 0)
-        coord_der['Z_rrv'] = Z_transform.transform(cZ, 2, 1, 0)
-        coord_der['R_rrz'] = R_transform.transform(cR, 2, 0, 1) * zeta_ratio
-        coord_der['Z_rrz'] = Z_transform.transform(cZ, 2, 0, 1) * zeta_ratio
-        coord_der['R_rvv'] = R_transform.transform(cR, 1, 2, 0)
-        coord_der['Z_rvv'] = Z_transform.transform(cZ, 1, 2, 0)
-        coord_der['R_rvz'] = R_transform.transform(cR, 1, 1, 1) * zeta_ratio
-        coord_der['Z_rvz'] = Z_transform.transform(cZ, 1, 1, 1) * zeta_ratio
-        coord_der['R_rzz'] = R_transform.transform(cR, 1, 0, 2) * zeta_ratio
-        coord_der['Z_rzz'] = Z_transform.transform(cZ, 1, 0, 2) * zeta_ratio
-        coord_der['R_vvv'] = R_transform.transform(cR, 0, 3, 0)
-        coord_der['Z_vvv'] = Z_transform.transform(cZ, 0, 3, 0)
-        coord_der['R_vvz'] = R_transform.transform(cR, 0, 2, 1) * zeta_ratio
-        coord_der['Z_vvz'] = Z_transform.transform(cZ, 0, 2, 1) * zeta_ratio
-        coord_der['R_vzz'] = R_transform.transform(cR, 0, 1, 2) * zeta_ratio
-        coord_der['Z_vzz'] = Z_transform.transform(cZ, 0, 1, 2) * zeta_ratio
-        coord_der['R_zzz'] = R_transform.transform(cR, 0, 0, 3) * zeta_ratio
-        coord_der['Z_zzz'] = Z_transform.transform(cZ, 0, 0, 3) * zeta_ratio
-
-        coord_der['R_rrvv'] = R_transform.transform(cR, 2, 2, 0)
-        coord_der['Z_rrvv'] = Z_transform.transform(cZ, 2, 2, 0)
-
-    return coord_der
-
-
-def compute_covariant_basis(coord_der, axis=jnp.array([]), derivs='force'):
+    derivatives = COORDINATE_DERIVATIVES['qs']
+    for transform in [R_transform, Z_transform]:
+        derivatives = derivatives[(derivatives[:, np.newaxis] ==
+                                   transform.derivatives).all(-1).any(-1)]
+
+    values = jnp.stack([R_transform.transform_all(cR, derivatives),
+                        Z_transform.transform_all(cZ, derivatives)])
+    values = values*np.where(derivatives[:, 2] > 0, zeta_ratio, 1)[:, np.newaxis]
+    return CoordinateDerivatives(values, derivatives)
+
+
+def compute_covariant_basis(coord_der):
     """Computes covariant basis vectors at grid points
 
     Parameters
@@ -1082,94 +1160,86 @@ def compute_covariant_basis(coord_der, axis=jnp.array([]), derivs='force'):
     coord_der : dict
         dictionary of ndarray containing the coordinate
         derivatives at each node, such as computed by ``compute_coordinate_derivatives``
-    axis : ndarray, optional
-        indicies of axis nodes
-    derivs : str
-        type of calculation being performed
-        ``'force'``: all of the derivatives needed to calculate an
-        equilibrium from the force balance equations
-        ``'qs'``: all of the derivatives needed to calculate quasi-
-        symmetry from the triple-product equation
 
     Returns
     -------
-    cov_basis : dict
+    cov_basis : LazyDict
         dictionary of ndarray containing covariant basis
         vectors and derivatives at each node. Keys are of the form 'e_x_y',
         meaning the unit vector in the x direction, differentiated wrt to y.
+        Each vector is computed when it is first accessed.
 
     """
     # notation: subscript word is direction of unit vector, subscript letters denote partial derivatives
     # eg, e_rho_v is the v derivative of the covariant basis vector in the rho direction
-    cov_basis = {}
-    cov_basis['e_rho'] = jnp.array(
+    cov_basis = LazyDict()
+    cov_basis['e_rho'] = lambda: jnp.array(
         [coord_der['R_r'],  coord_der['0'],   coord_der['Z_r']])
-    cov_basis['e_theta'] = jnp.array(
+    cov_basis['e_theta'] = lambda: jnp.array(
         [coord_der['R_v'],  coord_der['0'],   coord_der['Z_v']])
-    cov_basis['e_zeta'] = jnp.array(
+    cov_basis['e_zeta'] = lambda: jnp.array(
         [coord_der['R_z'],  coord_der['R'],   coord_der['Z_z']])
 
-    cov_basis['e_rho_r'] = jnp.array(
+    cov_basis['e_rho_r'] = lambda: jnp.array(
         [coord_der['R_rr'], coord_der['0'],   coord_der['Z_rr']])
-    cov_basis['e_rho_v'] = jnp.array(
+    cov_basis['e_rho_v'] = lambda: jnp.array(
         [coord_der['R_rv'], coord_der['0'],   coord_der['Z_rv']])
-    cov_basis['e_rho_z'] = jnp.array(
+    cov_basis['e_rho_z'] = lambda: jnp.array(
         [coord_der['R_rz'], coord_der['0'],   coord_der['Z_rz']])
 
-    cov_basis['e_theta_r'] = jnp.array(
+    cov_basis['e_theta_r'] = lambda: jnp.array(
         [coord_der['R_rv'], coord_der['0'],   coord_der['Z_rv']])
-    cov_basis['e_theta_v'] = jnp.array(
+    cov_basis['e_theta_v'] = lambda: jnp.array(
         [coord_der['R_vv'], coord_der['0'],   coord_der['Z_vv']])
-    cov_basis['e_theta_z'] = jnp.array(
+    cov_basis['e_theta_z'] = lambda: jnp.array(
         [coord_der['R_vz'], coord_der['0'],   coord_der['Z_vz']])
 
-    cov_basis['e_zeta_r'] = jnp.array(
+    cov_basis['e_zeta_r'] = lambda: jnp.array(
         [coord_der['R_rz'], coord_der['R_r'], coord_der['Z_rz']])
-    cov_basis['e_zeta_v'] = jnp.array(
+    cov_basis['e_zeta_v'] = lambda: jnp.array(
         [coord_der['R_vz'], coord_der['R_v'], coord_der['Z_vz']])
-    cov_basis['e_zeta_z'] = jnp.array(
+    cov_basis['e_zeta_z'] = lambda: jnp.array(
         [coord_der['R_zz'], coord_der['R_z'], coord_der['Z_zz']])
 
-    # axis or QS terms
-    if len(axis) or derivs == 'qs':
-        cov_basis['e_rho_rr'] = jnp.array(
-            [coord_der['R_rrr'], coord_der['0'],   coord_der['Z_rrr']])
-        cov_basis['e_rho_rv'] = jnp.array(
-            [coord_der['R_rrv'], coord_der['0'],   coord_der['Z_rrv']])
-        cov_basis['e_rho_rz'] = jnp.array(
-            [coord_der['R_rrz'], coord_der['0'],   coord_der['Z_rrz']])
-        cov_basis['e_rho_vv'] = jnp.array(
-            [coord_der['R_rvv'], coord_der['0'],   coord_der['Z_rvv']])
-        cov_basis['e_rho_vz'] = jnp.array(
-            [coord_der['R_rvz'], coord_der['0'],   coord_der['Z_rvz']])
-        cov_basis['e_rho_zz'] = jnp.array(
-            [coord_der['R_rzz'], coord_der['0'],   coord_der['Z_rzz']])
-
-        cov_basis['e_theta_rr'] = jnp.array(
-            [coord_der['R_rrv'], coord_der['0'],   coord_der['Z_rrv']])
-        cov_basis['e_theta_rv'] = jnp.array(
-            [coord_der['R_rvv'], coord_der['0'],   coord_der['Z_rvv']])
-        cov_basis['e_theta_rz'] = jnp.array(
-            [coord_der['R_rvz'], coord_der['0'],   coord_der['Z_rvz']])
-        cov_basis['e_theta_vv'] = jnp.array(
-            [coord_der['R_vvv'], coord_der['0'],   coord_der['Z_vvv']])
-        cov_basis['e_theta_vz'] = jnp.array(
-            [coord_der['R_vvz'], coord_der['0'],   coord_der['Z_vvz']])
-        cov_basis['e_theta_zz'] = jnp.array(
-            [coord_der['R_vzz'], coord_der['0'],   coord_der['Z_vzz']])
-
-        cov_basis['e_zeta_rr'] = jnp.array(
-            [coord_der['R_rrz'], coord_der['R_rr'], coord_der['Z_rrz']])
-        cov_basis['e_zeta_rv'] = jnp.array(
-            [coord_der['R_rvz'], coord_der['R_rv'], coord_der['Z_rvz']])
-        cov_basis['e_zeta_rz'] = jnp.array(
-            [coord_der['R_rzz'], coord_der['R_rz'], coord_der['Z_rzz']])
-        cov_basis['e_zeta_vv'] = jnp.array(
-            [coord_der['R_vvz'], coord_der['R_vv'], coord_der['Z_vvz']])
-        cov_basis['e_zeta_vz'] = jnp.array(
-            [coord_der['R_vzz'], coord_der['R_vz'], coord_der['Z_vzz']])
-        cov_basis['e_zeta_zz'] = jnp.array(
-            [coord_der['R_zzz'], coord_der['R_zz'], coord_der['Z_zzz']])
+    # third derivatives, for the axis limits and QS terms
+    cov_basis['e_rho_rr'] = lambda: jnp.array(
+        [coord_der['R_rrr'], coord_der['0'],   coord_der['Z_rrr']])
+    cov_basis['e_rho_rv'] = lambda: jnp.array(
+        [coord_der['R_rrv'], coord_der['0'],   coord_der['Z_rrv']])
+    cov_basis['e_rho_rz'] = lambda: jnp.array(
+        [coord_der['R_rrz'], coord_der['0'],   coord_der['Z_rrz']])
+    cov_basis['e_rho_vv'] = lambda: jnp.array(
+        [coord_der['R_rvv'], coord_der['0'],   coord_der['Z_rvv']])
+    cov_basis['e_rho_vz'] = lambda: jnp.array(
+        [coord_der['R_rvz'], coord_der['0'],   coord_der['Z_rvz']])
+    cov_basis['e_rho_zz'] = lambda: jnp.array(
+        [coord_der['R_rzz'], coord_der['0'],   coord_der['Z_rzz']])
+
+    cov_basis['e_theta_rr'] = lambda: jnp.array(
+        [coord_der['R_rrv'], coord_der['0'],   coord_der['Z_rrv']])
+    cov_basis['e_theta_rv'] = lambda: jnp.array(
+        [coord_der['R_rvv'], coord_der['0'],   coord_der['Z_rvv']])
+    cov_basis['e_theta_rz'] = lambda: jnp.array(
+        [coord_der['R_rvz'], coord_der['0'],   coord_der['Z_rvz']])
+    cov_basis['e_theta_vv'] = lambda: jnp.array(
+        [coord_der['R_vvv'], coord_der['0'],   coord_der['Z_vvv']])
+    cov_basis['e_theta_vz'] = lambda: jnp.array(
+        [coord_der['R_vvz'], coord_der['0'],   coord_der['Z_vvz']])
+    cov_basis['e_theta_zz'] = lambda: jnp.array(
+        [coord_der['R_vzz'], coord_der['0'],   coord_der['Z_vzz']])
+
+    cov_basis['e_zeta_rr'] = lambda: jnp.array(
+        [coord_der['R_rrz'], coord_der['R_rr'], coord_der['Z_rrz']])
+    cov_basis['e_zeta_rv'] = lambda: jnp.array(
+        [coord_der['R_rvz'], coord_der['R_rv'], coord_der['Z_rvz']])
+    cov_basis['e_zeta_rz'] = lambda: jnp.array(
+        [coord_der['R_rzz'], coord_der['R_rz'], coord_der['Z_rzz']])
+    cov_basis['e_zeta_vv'] = lambda: jnp.array(
+        [coord_der['R_vvz'], coord_der['R_vv'], coord_der['Z_vvz']])
+    cov_basis['e_zeta_vz'] = lambda: jnp.array(
+        [coord_der['R_vzz'], coord_der['R_vz'], coord_der['Z_vzz']])
+    cov_basis['e_zeta_zz'] = lambda: jnp.array(
+        [coord_der['R_zzz'], coord_der['R_zz'], coord_der['Z_zzz']])
 
     return cov_basis
 
@@ -1188,46 +1258,45 @@ def compute_contravariant_basis(coord_der, cov_basis, jacobian, axis=jnp.array([
     jacobian : dict
         dictionary of ndarray containing coordinate jacobian
         and partial derivatives, such as computed by ``compute_jacobian``
-        axis : ndarray, optional
-        indicies of axis nodes
     axis : ndarray, optional
         indicies of axis nodes
 
     Returns
     -------
-    con_basis : dict
-        dictionary of ndarray containing contravariant basis vectors and jacobian elements
+    con_basis : LazyDict
+        dictionary of ndarray containing contravariant basis vectors and jacobian elements.
+        Each element is computed when it is first accessed.
 
     """
     # subscripts (superscripts) denote covariant (contravariant) basis vectors
-    con_basis = {}
+    con_basis = LazyDict()
 
     # contravariant basis vectors
-    con_basis['e^rho'] = cross(
+    con_basis['e^rho'] = lambda: cross(
         cov_basis['e_theta'], cov_basis['e_zeta'], 0)/jacobian['g']
-    con_basis['e^theta'] = cross(
+    con_basis['e^theta'] = lambda: cross(
         cov_basis['e_zeta'], cov_basis['e_rho'], 0)/jacobian['g']
-    con_basis['e^zeta'] = jnp.array(
+    con_basis['e^zeta'] = lambda: jnp.array(
         [coord_der['0'], 1/coord_der['R'], coord_der['0']])
 
     # axis terms
     if len(axis):
-        con_basis['e^rho'] = put(con_basis['e^rho'], opsindex[:, axis], (cross(
+        con_basis.put('e^rho', opsindex[:, axis], lambda: (cross(
             cov_basis['e_theta_r'][:, axis], cov_basis['e_zeta'][:, axis], 0)/jacobian['g_r'][axis]))
         # e^theta = infinite at the axis
 
     # metric coefficients
-    con_basis['g^rr'] = dot(con_basis['e^rho'],   con_basis['e^rho'],   0)
-    con_basis['g^rv'] = dot(con_basis['e^rho'],   con_basis['e^theta'], 0)
-    con_basis['g^rz'] = dot(con_basis['e^rho'],   con_basis['e^zeta'],  0)
-    con_basis['g^vv'] = dot(con_basis['e^theta'], con_basis['e^theta'], 0)
-    con_basis['g^vz'] = dot(con_basis['e^theta'], con_basis['e^zeta'],  0)
-    con_basis['g^zz'] = dot(con_basis['e^zeta'],  con_basis['e^zeta'],  0)
+    con_basis['g^rr'] = lambda: dot(con_basis['e^rho'],   con_basis['e^rho'],   0)
+    con_basis['g^rv'] = lambda: dot(con_basis['e^rho'],   con_basis['e^theta'], 0)
+    con_basis['g^rz'] = lambda: dot(con_basis['e^rho'],   con_basis['e^zeta'],  0)
+    con_basis['g^vv'] = lambda: dot(con_basis['e^theta'], con_basis['e^theta'], 0)
+    con_basis['g^vz'] = lambda: dot(con_basis['e^theta'], con_basis['e^zeta'],  0)
+    con_basis['g^zz'] = lambda: dot(con_basis['e^zeta'],  con_basis['e^zeta'],  0)
 
     return con_basis
 
 
-def compute_jacobian(coord_der, cov_basis, axis=jnp.array([]), derivs='force'):
+def compute_jacobian(coord_der, cov_basis):
     """Computes coordinate jacobian and derivatives
 
     Parameters
@@ -1238,40 +1307,33 @@ def compute_jacobian(coord_der, cov_basis, axis=jnp.array([]), derivs='force'):
     cov_basis : dict
         dictionary of ndarray containing covariant basis
         vectors and derivatives at each node, such as computed by ``compute_covariant_basis``.
-    axis : ndarray, optional
-        indicies of axis nodes
-    derivs : str
-        type of calculation being performed
-        ``'force'``: all of the derivatives needed to calculate an
-        equilibrium from the force balance equations
-        ``'qs'``: all of the derivatives needed to calculate quasi-
-        symmetry from the triple-product equation
 
     Returns
     -------
-    jacobian : dict
+    jacobian : LazyDict
         dictionary of ndarray, shape(N_nodes,) of coordinate
         jacobian and partial derivatives. Keys are of the form `g_x` meaning
-        the x derivative of the coordinate jacobian g
+        the x derivative of the coordinate jacobian g. Each element is
+        computed when it is first accessed.
 
     """
     # notation: subscripts denote partial derivatives
-    jacobian = {}
-    jacobian['g'] = coord_der['R']*(coord_der['R_v']*coord_der['Z_r'] \
+    jacobian = LazyDict()
+    jacobian['g'] = lambda: coord_der['R']*(coord_der['R_v']*coord_der['Z_r'] \
                                   - coord_der['R_r']*coord_der['Z_v'])
-    jacobian['g_r'] = coord_der['R']*(coord_der['R_rv']*coord_der['Z_r']
+    jacobian['g_r'] = lambda: coord_der['R']*(coord_der['R_rv']*coord_der['Z_r']
                                     + coord_der['R_v']*coord_der['Z_rr']
                                     - coord_der['R_rr']*coord_der['Z_v']
                                     - coord_der['R_r']*coord_der['Z_rv']) \
                     + coord_der['R_r']*(coord_der['R_v']*coord_der['Z_r']
                                       - coord_der['R_r']*coord_der['Z_v'])
-    jacobian['g_v'] = coord_der['R']*(coord_der['R_vv']*coord_der['Z_r']
+    jacobian['g_v'] = lambda: coord_der['R']*(coord_der['R_vv']*coord_der['Z_r']
                                     + coord_der['R_v']*coord_der['Z_rv']
                                     - coord_der['R_rv']*coord_der['Z_v']
                                     - coord_der['R_r']*coord_der['Z_vv']) \
                     + coord_der['R_v']*(coord_der['R_v']*coord_der['Z_r']
                                       - coord_der['R_r']*coord_der['Z_v'])
-    jacobian['g_z'] = coord_der['R']*(coord_der['R_vz']*coord_der['Z_r']
+    jacobian['g_z'] = lambda: coord_der['R']*(coord_der['R_vz']*coord_der['Z_r']
                                     + coord_der['R_v']*coord_der['Z_rz']
                                     - coord_der['R_rz']*coord_der['Z_v']
                                     - coord_der['R_r']*coord_der['Z_vz']) \
@@ -1301,65 +1363,64 @@ def compute_jacobian(coord_der, cov_basis, axis=jnp.array([]), derivs='force'):
                       cross(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0), 0)
     """
 
-    # axis or QS terms
-    if len(axis) or derivs == 'qs':
-        jacobian['g_rr'] = dot(cov_basis['e_rho_rr'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta_r'], cov_basis['e_zeta'], 0), 0)*2 \
-            + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_r'], 0), 0)*2 \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_rr'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_r'], cov_basis['e_zeta_r'], 0), 0)*2 \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
-                                              cov_basis['e_zeta_rr'], 0), 0)
-        jacobian['g_rv'] = dot(cov_basis['e_rho_rv'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_v'], 0), 0) \
-            + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta_r'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_rv'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_r'], cov_basis['e_zeta_v'], 0), 0) \
-            + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_r'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_v'], cov_basis['e_zeta_r'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
-                                              cov_basis['e_zeta_rv'], 0), 0)
-        jacobian['g_rz'] = dot(cov_basis['e_rho_rz'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_z'], 0), 0) \
-            + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta_r'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_rz'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_r'], cov_basis['e_zeta_z'], 0), 0) \
-            + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_r'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_z'], cov_basis['e_zeta_r'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
-                                              cov_basis['e_zeta_rz'], 0), 0)
-
-        jacobian['g_vv'] = dot(cov_basis['e_rho_vv'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0), 0)*2 \
-            + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_v'], 0), 0)*2 \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_vv'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_v'], cov_basis['e_zeta_v'], 0), 0)*2 \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
-                                              cov_basis['e_zeta_vv'], 0), 0)
-        jacobian['g_vz'] = dot(cov_basis['e_rho_vz'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_z'], 0), 0) \
-            + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_vz'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_v'], cov_basis['e_zeta_z'], 0), 0) \
-            + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_v'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_z'], cov_basis['e_zeta_v'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
-                                              cov_basis['e_zeta_vz'], 0), 0)
-        jacobian['g_zz'] = dot(cov_basis['e_rho_zz'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0), 0)*2 \
-            + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_z'], 0), 0)*2 \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_zz'], cov_basis['e_zeta'], 0), 0) \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_z'], cov_basis['e_zeta_z'], 0), 0)*2 \
-            + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
-                                              cov_basis['e_zeta_zz'], 0), 0)
+    # third derivatives, for the axis limits and QS terms
+    jacobian['g_rr'] = lambda: dot(cov_basis['e_rho_rr'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta_r'], cov_basis['e_zeta'], 0), 0)*2 \
+        + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_r'], 0), 0)*2 \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_rr'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_r'], cov_basis['e_zeta_r'], 0), 0)*2 \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
+                                          cov_basis['e_zeta_rr'], 0), 0)
+    jacobian['g_rv'] = lambda: dot(cov_basis['e_rho_rv'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_v'], 0), 0) \
+        + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta_r'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_rv'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_r'], cov_basis['e_zeta_v'], 0), 0) \
+        + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_r'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_v'], cov_basis['e_zeta_r'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
+                                          cov_basis['e_zeta_rv'], 0), 0)
+    jacobian['g_rz'] = lambda: dot(cov_basis['e_rho_rz'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_r'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_z'], 0), 0) \
+        + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta_r'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_rz'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_r'], cov_basis['e_zeta_z'], 0), 0) \
+        + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_r'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_z'], cov_basis['e_zeta_r'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
+                                          cov_basis['e_zeta_rz'], 0), 0)
+
+    jacobian['g_vv'] = lambda: dot(cov_basis['e_rho_vv'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0), 0)*2 \
+        + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_v'], 0), 0)*2 \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_vv'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_v'], cov_basis['e_zeta_v'], 0), 0)*2 \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
+                                          cov_basis['e_zeta_vv'], 0), 0)
+    jacobian['g_vz'] = lambda: dot(cov_basis['e_rho_vz'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_v'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_z'], 0), 0) \
+        + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_vz'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_v'], cov_basis['e_zeta_z'], 0), 0) \
+        + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_v'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_z'], cov_basis['e_zeta_v'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
+                                          cov_basis['e_zeta_vz'], 0), 0)
+    jacobian['g_zz'] = lambda: dot(cov_basis['e_rho_zz'], cross(cov_basis['e_theta'],   cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0), 0)*2 \
+        + dot(cov_basis['e_rho_z'], cross(cov_basis['e_theta'],   cov_basis['e_zeta_z'], 0), 0)*2 \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_zz'], cov_basis['e_zeta'], 0), 0) \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta_z'], cov_basis['e_zeta_z'], 0), 0)*2 \
+        + dot(cov_basis['e_rho'],   cross(cov_basis['e_theta'],
+                                          cov_basis['e_zeta_zz'], 0), 0)
 
     return jacobian
 
 
-def compute_magnetic_field(cov_basis, jacobian, cI, Psi, I_transform, derivs='force'):
+def compute_magnetic_field(cov_basis, jacobian, cI, Psi, I_transform):
     """Computes magnetic field components at node locations
 
     Parameters
@@ -1376,101 +1437,95 @@ def compute_magnetic_field(cov_basis, jacobian, cI, Psi, I_transform, derivs='fo
         total toroidal flux (in Webers) within LCFS
     I_transform : Transform
         object with transform method to go from spectral to physical space with derivatives
-    derivs : str
-        type of calculation being performed
-        ``'force'``: all of the derivatives needed to calculate an
-        equilibrium from the force balance equations
-        ``'qs'``: all of the derivatives needed to calculate quasi-
-        symmetry from the triple-product equation
 
     Returns
     -------
-    magnetic_field: dict
+    magnetic_field: LazyDict
         dictionary of ndarray, shape(N_nodes,) of magnetic field
         and derivatives. Keys are of the form 'B_x_y' or 'B^x_y', meaning the
         covariant (B_x) or contravariant (B^x) component of the magnetic field, with the derivative wrt to y.
+        Each component is computed when it is first accessed.
 
     """
     # notation: 1 letter subscripts denote derivatives, eg psi_rr = d^2 psi / dr^2
     # subscripts (superscripts) denote covariant (contravariant) components of the field
-    magnetic_field = {}
+    magnetic_field = LazyDict()
     r = I_transform.grid.nodes[:, 0]
     axis = I_transform.grid.axis
     iota = I_transform.transform(cI, 0)
     iota_r = I_transform.transform(cI, 1)
 
     # toroidal flux
-    magnetic_field['psi'] = Psi*r**2
-    magnetic_field['psi_r'] = 2*Psi*r
-    magnetic_field['psi_rr'] = 2*Psi*jnp.ones_like(r)
+    magnetic_field['psi'] = lambda: Psi*r**2
+    magnetic_field['psi_r'] = lambda: 2*Psi*r
+    magnetic_field['psi_rr'] = lambda: 2*Psi*jnp.ones_like(r)
 
     # contravariant B components
-    magnetic_field['B^rho'] = jnp.zeros_like(r)
-    magnetic_field['B^zeta'] = magnetic_field['psi_r'] / \
+    magnetic_field['B^rho'] = lambda: jnp.zeros_like(r)
+    magnetic_field['B^zeta'] = lambda: magnetic_field['psi_r'] / \
         (2*jnp.pi*jacobian['g'])
     if len(axis):
-        magnetic_field['B^zeta'] = put(
-            magnetic_field['B^zeta'], axis, magnetic_field['psi_rr'][axis] / (2*jnp.pi*jacobian['g_r'][axis]))
-    magnetic_field['B^theta'] = iota * magnetic_field['B^zeta']
-    magnetic_field['B_con'] = magnetic_field['B^rho']*cov_basis['e_rho'] + magnetic_field['B^theta'] * \
+        magnetic_field.put(
+            'B^zeta', axis, lambda: magnetic_field['psi_rr'][axis] / (2*jnp.pi*jacobian['g_r'][axis]))
+    magnetic_field['B^theta'] = lambda: iota * magnetic_field['B^zeta']
+    magnetic_field['B_con'] = lambda: magnetic_field['B^rho']*cov_basis['e_rho'] + magnetic_field['B^theta'] * \
         cov_basis['e_theta'] + magnetic_field['B^zeta']*cov_basis['e_zeta']
 
     # covariant B components
-    magnetic_field['B_rho'] = magnetic_field['B^zeta'] * \
+    magnetic_field['B_rho'] = lambda: magnetic_field['B^zeta'] * \
         dot(iota*cov_basis['e_theta'] +
             cov_basis['e_zeta'], cov_basis['e_rho'], 0)
-    magnetic_field['B_theta'] = magnetic_field['B^zeta'] * \
+    magnetic_field['B_theta'] = lambda: magnetic_field['B^zeta'] * \
         dot(iota*cov_basis['e_theta'] +
             cov_basis['e_zeta'], cov_basis['e_theta'], 0)
-    magnetic_field['B_zeta'] = magnetic_field['B^zeta'] * \
+    magnetic_field['B_zeta'] = lambda: magnetic_field['B^zeta'] * \
         dot(iota*cov_basis['e_theta'] +
             cov_basis['e_zeta'], cov_basis['e_zeta'], 0)
 
     # B^{zeta} derivatives
-    magnetic_field['B^zeta_r'] = magnetic_field['psi_rr'] / (2*jnp.pi*jacobian['g']) - \
+    magnetic_field['B^zeta_r'] = lambda: magnetic_field['psi_rr'] / (2*jnp.pi*jacobian['g']) - \
         (magnetic_field['psi_r']*jacobian['g_r']) / (2*jnp.pi*jacobian['g']**2)
-    magnetic_field['B^zeta_v'] = - \
+    magnetic_field['B^zeta_v'] = lambda: - \
         (magnetic_field['psi_r']*jacobian['g_v']) / (2*jnp.pi*jacobian['g']**2)
-    magnetic_field['B^zeta_z'] = - \
+    magnetic_field['B^zeta_z'] = lambda: - \
         (magnetic_field['psi_r']*jacobian['g_z']) / (2*jnp.pi*jacobian['g']**2)
 
     # axis terms
     if len(axis):
-        magnetic_field['B^zeta_r'] = put(magnetic_field['B^zeta_r'], axis, -(magnetic_field['psi_rr']
-                                                                            [axis]*jacobian['g_rr'][axis]) / (4*jnp.pi*jacobian['g_r'][axis]**2))
-        magnetic_field['B^zeta_v'] = put(magnetic_field['B^zeta_v'], axis, 0)
-        magnetic_field['B^zeta_z'] = put(magnetic_field['B^zeta_z'], axis, -(magnetic_field['psi_rr']
-                                                                            [axis]*jacobian['g_rz'][axis]) / (2*jnp.pi*jacobian['g_r'][axis]**2))
+        magnetic_field.put('B^zeta_r', axis, lambda: -(magnetic_field['psi_rr']
+                                                       [axis]*jacobian['g_rr'][axis]) / (4*jnp.pi*jacobian['g_r'][axis]**2))
+        magnetic_field.put('B^zeta_v', axis, lambda: 0)
+        magnetic_field.put('B^zeta_z', axis, lambda: -(magnetic_field['psi_rr']
+                                                       [axis]*jacobian['g_rz'][axis]) / (2*jnp.pi*jacobian['g_r'][axis]**2))
 
     # QS terms
-    if derivs == 'qs':
-        magnetic_field['B^zeta_vv'] = - (magnetic_field['psi_r']*jacobian['g_vv']) / (2*jnp.pi*jacobian['g']**2) \
-            + (magnetic_field['psi_r']*jacobian['g_v']
-               ** 2) / (jnp.pi*jacobian['g']**3)
-        magnetic_field['B^zeta_vz'] = - (magnetic_field['psi_r']*jacobian['g_vz']) / (2*jnp.pi*jacobian['g']**2) \
-            + (magnetic_field['psi_r']*jacobian['g_v']*jacobian['g_z']) / \
-            (jnp.pi*jacobian['g']**3)
-        magnetic_field['B^zeta_zz'] = - (magnetic_field['psi_r']*jacobian['g_zz']) / (2*jnp.pi*jacobian['g']**2) \
-            + (magnetic_field['psi_r']*jacobian['g_z']
-               ** 2) / (jnp.pi*jacobian['g']**3)
+    magnetic_field['B^zeta_vv'] = lambda: - (magnetic_field['psi_r']*jacobian['g_vv']) / (2*jnp.pi*jacobian['g']**2) \
+        + (magnetic_field['psi_r']*jacobian['g_v']
+           ** 2) / (jnp.pi*jacobian['g']**3)
+    magnetic_field['B^zeta_vz'] = lambda: - (magnetic_field['psi_r']*jacobian['g_vz']) / (2*jnp.pi*jacobian['g']**2) \
+        + (magnetic_field['psi_r']*jacobian['g_v']*jacobian['g_z']) / \
+        (jnp.pi*jacobian['g']**3)
+    magnetic_field['B^zeta_zz'] = lambda: - (magnetic_field['psi_r']*jacobian['g_zz']) / (2*jnp.pi*jacobian['g']**2) \
+        + (magnetic_field['psi_r']*jacobian['g_z']
+           ** 2) / (jnp.pi*jacobian['g']**3)
 
     # covariant B component derivatives
-    magnetic_field['B_theta_r'] = magnetic_field['B^zeta_r']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_theta'], 0) \
+    magnetic_field['B_theta_r'] = lambda: magnetic_field['B^zeta_r']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_theta'], 0) \
         + magnetic_field['B^zeta']*(dot(iota_r*cov_basis['e_theta']+iota*cov_basis['e_rho_v']+cov_basis['e_zeta_r'], cov_basis['e_theta'], 0)
                                     + dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho_v'], 0))
-    magnetic_field['B_zeta_r'] = magnetic_field['B^zeta_r']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_zeta'], 0) \
+    magnetic_field['B_zeta_r'] = lambda: magnetic_field['B^zeta_r']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_zeta'], 0) \
         + magnetic_field['B^zeta']*(dot(iota_r*cov_basis['e_theta']+iota*cov_basis['e_rho_v']+cov_basis['e_zeta_r'], cov_basis['e_zeta'], 0)
                                     + dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_zeta_r'], 0))
-    magnetic_field['B_rho_v'] = magnetic_field['B^zeta_v']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho'], 0) \
+    magnetic_field['B_rho_v'] = lambda: magnetic_field['B^zeta_v']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho'], 0) \
         + magnetic_field['B^zeta']*(dot(iota*cov_basis['e_theta_v']+cov_basis['e_zeta_v'], cov_basis['e_rho'], 0)
                                     + dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho_v'], 0))
-    magnetic_field['B_zeta_v'] = magnetic_field['B^zeta_v']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_zeta'], 0) \
+    magnetic_field['B_zeta_v'] = lambda: magnetic_field['B^zeta_v']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_zeta'], 0) \
         + magnetic_field['B^zeta']*(dot(iota*cov_basis['e_theta_v']+cov_basis['e_zeta_v'], cov_basis['e_zeta'], 0)
                                     + dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0))
-    magnetic_field['B_rho_z'] = magnetic_field['B^zeta_z']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho'], 0) \
+    magnetic_field['B_rho_z'] = lambda: magnetic_field['B^zeta_z']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho'], 0) \
         + magnetic_field['B^zeta']*(dot(iota*cov_basis['e_theta_z']+cov_basis['e_zeta_z'], cov_basis['e_rho'], 0)
                                     + dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_rho_z'], 0))
-    magnetic_field['B_theta_z'] = magnetic_field['B^zeta_z']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_theta'], 0) \
+    magnetic_field['B_theta_z'] = lambda: magnetic_field['B^zeta_z']*dot(iota*cov_basis['e_theta']+cov_basis['e_zeta'], cov_basis['e_theta'], 0) \
         + magnetic_field['B^zeta']*(dot(iota*cov_basis['e_theta_z']+cov_basis['e_zeta_z'], cov_basis['e_theta'], 0)
                                     + dot(iota*cov_basis['e_theta'] + cov_basis['e_zeta'], cov_basis['e_theta_z'], 0))
 
@@ -1501,54 +1556,53 @@ def compute_plasma_current(coord_der, cov_basis, jacobian, magnetic_field, cI, I
 
     Returns
     -------
-    plasma_current : dict
+    plasma_current : LazyDict
         dictionary of ndarray, shape(N_nodes,) of current field.
         Keys are of the form 'J^x_y' meaning the contravariant (J^x)
         component of the current, with the derivative wrt to y.
+        Each component is computed when it is first accessed.
 
     """
     # notation: 1 letter subscripts denote derivatives, eg psi_rr = d^2 psi / dr^2
     # subscripts (superscripts) denote covariant (contravariant) components of the field
-    plasma_current = {}
+    plasma_current = LazyDict()
     mu0 = 4*jnp.pi*1e-7
     axis = I_transform.grid.axis
     iota = I_transform.transform(cI, 0)
 
-    # axis terms
-    if len(axis):
-        g_rrv = 2*coord_der['R_rv']*(coord_der['Z_r']*coord_der['R_rv'] - coord_der['R_r']*coord_der['Z_rv']) \
-            + 2*coord_der['R_r']*(coord_der['Z_r']*coord_der['R_rvv'] - coord_der['R_r']*coord_der['Z_rvv']) \
-            + coord_der['R']*(2*coord_der['Z_rr']*coord_der['R_rvv'] - 2*coord_der['R_rr']*coord_der['Z_rvv']
-                              + coord_der['R_rv']*coord_der['Z_rrv'] -
-                              coord_der['Z_rv']*coord_der['R_rrv']
-                              + coord_der['Z_r']*coord_der['R_rrvv'] - coord_der['R_r']*coord_der['Z_rrvv'])
-        Bsup_zeta_rv = magnetic_field['psi_rr']*(2*jacobian['g_rr']*jacobian['g_rv'] -
-                                                 jacobian['g_r']*g_rrv) / (4*jnp.pi*jacobian['g_r']**3)
-        Bsub_zeta_rv = Bsup_zeta_rv*dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0) + magnetic_field['B^zeta']*dot(
-            iota*cov_basis['e_rho_vv'] + 2*cov_basis['e_zeta_rv'], cov_basis['e_zeta'], 0)
-        Bsub_theta_rz = magnetic_field['B^zeta_z']*dot(cov_basis['e_zeta'], cov_basis['e_rho_v'], 0) + magnetic_field['B^zeta']*(
-            dot(cov_basis['e_zeta_z'], cov_basis['e_rho_v'], 0) + dot(cov_basis['e_zeta'], cov_basis['e_rho_vz'], 0))
-
     # contravariant J components
-    plasma_current['J^rho'] = (magnetic_field['B_zeta_v'] -
+    plasma_current['J^rho'] = lambda: (magnetic_field['B_zeta_v'] -
                                magnetic_field['B_theta_z']) / (mu0*jacobian['g'])
-    plasma_current['J^theta'] = (magnetic_field['B_rho_z'] -
+    plasma_current['J^theta'] = lambda: (magnetic_field['B_rho_z'] -
                                  magnetic_field['B_zeta_r']) / (mu0*jacobian['g'])
-    plasma_current['J^zeta'] = (magnetic_field['B_theta_r'] -
+    plasma_current['J^zeta'] = lambda: (magnetic_field['B_theta_r'] -
                                 magnetic_field['B_rho_v']) / (mu0*jacobian['g'])
 
     # axis terms
     if len(axis):
-        plasma_current['J^rho'] = put(plasma_current['J^rho'], axis,
-                                      (Bsub_zeta_rv[axis] - Bsub_theta_rz[axis]) / (jacobian['g_r'][axis]))
-
-    plasma_current['J_con'] = plasma_current['J^rho']*cov_basis['e_rho'] + plasma_current['J^theta'] * \
+        def J_rho_axis():
+            g_rrv = 2*coord_der['R_rv']*(coord_der['Z_r']*coord_der['R_rv'] - coord_der['R_r']*coord_der['Z_rv']) \
+                + 2*coord_der['R_r']*(coord_der['Z_r']*coord_der['R_rvv'] - coord_der['R_r']*coord_der['Z_rvv']) \
+                + coord_der['R']*(2*coord_der['Z_rr']*coord_der['R_rvv'] - 2*coord_der['R_rr']*coord_der['Z_rvv']
+                                  + coord_der['R_rv']*coord_der['Z_rrv'] -
+                                  coord_der['Z_rv']*coord_der['R_rrv']
+                                  + coord_der['Z_r']*coord_der['R_rrvv'] - coord_der['R_r']*coord_der['Z_rrvv'])
+            Bsup_zeta_rv = magnetic_field['psi_rr']*(2*jacobian['g_rr']*jacobian['g_rv'] -
+                                                     jacobian['g_r']*g_rrv) / (4*jnp.pi*jacobian['g_r']**3)
+            Bsub_zeta_rv = Bsup_zeta_rv*dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0) + magnetic_field['B^zeta']*dot(
+                iota*cov_basis['e_rho_vv'] + 2*cov_basis['e_zeta_rv'], cov_basis['e_zeta'], 0)
+            Bsub_theta_rz = magnetic_field['B^zeta_z']*dot(cov_basis['e_zeta'], cov_basis['e_rho_v'], 0) + magnetic_field['B^zeta']*(
+                dot(cov_basis['e_zeta_z'], cov_basis['e_rho_v'], 0) + dot(cov_basis['e_zeta'], cov_basis['e_rho_vz'], 0))
+            return (Bsub_zeta_rv[axis] - Bsub_theta_rz[axis]) / (jacobian['g_r'][axis])
+        plasma_current.put('J^rho', axis, J_rho_axis)
+
+    plasma_current['J_con'] = lambda: plasma_current['J^rho']*cov_basis['e_rho'] + plasma_current['J^theta'] * \
         cov_basis['e_theta'] + plasma_current['J^zeta']*cov_basis['e_zeta']
 
     return plasma_current
 
 
-def compute_magnetic_field_magnitude(cov_basis, magnetic_field, cI, I_transform, derivs='force'):
+def compute_magnetic_field_magnitude(cov_basis, magnetic_field, cI, I_transform):
     """Computes magnetic field magnitude at node locations
 
     Parameters
@@ -1563,62 +1617,55 @@ def compute_magnetic_field_magnitude(cov_basis, magnetic_field, cI, I_transform,
         coefficients to pass to rotational transform function
     I_transform : Transform
         object with transform method to go from spectral to physical space with derivatives
-    derivs : str
-        type of calculation being performed
-        ``'force'``: all of the derivatives needed to calculate an
-        equilibrium from the force balance equations
-        ``'qs'``: all of the derivatives needed to calculate quasi-
-        symmetry from the triple-product equation
 
     Returns
     -------
-    magnetic_field_mag : dict
-        dictionary of ndarray, shape(N_nodes,) of magnetic field magnitude and derivatives
+    magnetic_field_mag : LazyDict
+        dictionary of ndarray, shape(N_nodes,) of magnetic field magnitude and derivatives.
+        Each element is computed when it is first accessed.
 
     """
     # notation: 1 letter subscripts denote derivatives, eg psi_rr = d^2 psi / dr^2
     # subscripts (superscripts) denote covariant (contravariant) components of the field
     
-    magnetic_field_mag = {}
+    magnetic_field_mag = LazyDict()
     iota = I_transform.transform(cI, 0)
 
-    magnetic_field_mag['|B|'] = jnp.abs(magnetic_field['B^zeta'])*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0) +
+    magnetic_field_mag['|B|'] = lambda: jnp.abs(magnetic_field['B^zeta'])*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0) +
                                                               2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0) + dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))
 
-    magnetic_field_mag['|B|_v'] = jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_v']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+    magnetic_field_mag['|B|_v'] = lambda: jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_v']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
         + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0)) \
         / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)))
 
-    magnetic_field_mag['|B|_z'] = jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_z']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+    magnetic_field_mag['|B|_z'] = lambda: jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_z']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
         + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
         / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)))
 
     # QS terms
-    if derivs == 'qs':
-
-        magnetic_field_mag['|B|_vv'] = jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_vv']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
-            + jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_v']*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0)) \
-            / jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
-            + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*(dot(cov_basis['e_theta_v'], cov_basis['e_theta_v'], 0)+dot(cov_basis['e_theta'], cov_basis['e_theta_vv'], 0))+2*iota*(dot(cov_basis['e_theta_vv'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_vv'], 0)+2*dot(cov_basis['e_theta_v'], cov_basis['e_zeta_v'], 0))+2*(dot(cov_basis['e_zeta_v'], cov_basis['e_zeta_v'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta_vv'], 0))) \
-            / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))) \
-            + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0))**2 \
-            / (2*(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))**(3/2))
+    magnetic_field_mag['|B|_vv'] = lambda: jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_vv']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+        + jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_v']*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0)) \
+        / jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+        + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*(dot(cov_basis['e_theta_v'], cov_basis['e_theta_v'], 0)+dot(cov_basis['e_theta'], cov_basis['e_theta_vv'], 0))+2*iota*(dot(cov_basis['e_theta_vv'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_vv'], 0)+2*dot(cov_basis['e_theta_v'], cov_basis['e_zeta_v'], 0))+2*(dot(cov_basis['e_zeta_v'], cov_basis['e_zeta_v'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta_vv'], 0))) \
+        / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))) \
+        + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0))**2 \
+        / (2*(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))**(3/2))
     
-        magnetic_field_mag['|B|_zz'] = jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_zz']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
-            + jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_z']*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
-            / jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
-            + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*(dot(cov_basis['e_theta_z'], cov_basis['e_theta_z'], 0)+dot(cov_basis['e_theta'], cov_basis['e_theta_zz'], 0))+2*iota*(dot(cov_basis['e_theta_zz'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_zz'], 0)+2*dot(cov_basis['e_theta_z'], cov_basis['e_zeta_z'], 0))+2*(dot(cov_basis['e_zeta_z'], cov_basis['e_zeta_z'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta_vz'], 0))) \
-            / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))) \
-            + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0))**2 \
-            / (2*(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))**(3/2))
+    magnetic_field_mag['|B|_zz'] = lambda: jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_zz']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+        + jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_z']*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
+        / jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+        + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*(dot(cov_basis['e_theta_z'], cov_basis['e_theta_z'], 0)+dot(cov_basis['e_theta'], cov_basis['e_theta_zz'], 0))+2*iota*(dot(cov_basis['e_theta_zz'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_zz'], 0)+2*dot(cov_basis['e_theta_z'], cov_basis['e_zeta_z'], 0))+2*(dot(cov_basis['e_zeta_z'], cov_basis['e_zeta_z'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta_vz'], 0))) \
+        / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))) \
+        + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0))**2 \
+        / (2*(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))**(3/2))
     
-        magnetic_field_mag['|B|_vz'] = jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_vz']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
-            + jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_v']*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
-            / jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
-            + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*(dot(cov_basis['e_theta_z'], cov_basis['e_theta_v'], 0)+dot(cov_basis['e_theta'], cov_basis['e_theta_vz'], 0))+2*iota*(dot(cov_basis['e_theta_vz'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta_v'], cov_basis['e_zeta_z'], 0)+dot(cov_basis['e_theta_z'], cov_basis['e_zeta_v'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_vz'], 0))+2*(dot(cov_basis['e_zeta_z'], cov_basis['e_zeta_v'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta_vz'], 0))) \
-            / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))) \
-            + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0))*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
-            / (2*(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))**(3/2))
+    magnetic_field_mag['|B|_vz'] = lambda: jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_vz']*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+        + jnp.sign(magnetic_field['B^zeta'])*magnetic_field['B^zeta_v']*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
+        / jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0)) \
+        + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*(dot(cov_basis['e_theta_z'], cov_basis['e_theta_v'], 0)+dot(cov_basis['e_theta'], cov_basis['e_theta_vz'], 0))+2*iota*(dot(cov_basis['e_theta_vz'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta_v'], cov_basis['e_zeta_z'], 0)+dot(cov_basis['e_theta_z'], cov_basis['e_zeta_v'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_vz'], 0))+2*(dot(cov_basis['e_zeta_z'], cov_basis['e_zeta_v'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta_vz'], 0))) \
+        / (2*jnp.sqrt(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))) \
+        + jnp.abs(magnetic_field['B^zeta'])*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_v'], 0)+2*iota*(dot(cov_basis['e_theta_v'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_v'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_v'], 0))*(2*iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta_z'], 0)+2*iota*(dot(cov_basis['e_theta_z'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_theta'], cov_basis['e_zeta_z'], 0))+2*dot(cov_basis['e_zeta'], cov_basis['e_zeta_z'], 0)) \
+        / (2*(iota**2*dot(cov_basis['e_theta'], cov_basis['e_theta'], 0)+2*iota*dot(cov_basis['e_theta'], cov_basis['e_zeta'], 0)+dot(cov_basis['e_zeta'], cov_basis['e_zeta'], 0))**(3/2))
 
     return magnetic_field_mag
 
@@ -1655,51 +1702,131 @@ def compute_force_magnitude(coord_der, cov_basis, con_basis, jacobian, magnetic_
 
     Returns
     -------
-    force_mag : dict
-        dictionary of ndarray, shape(N_nodes,) of force magnitudes
+    force_mag : LazyDict
+        dictionary of ndarray, shape(N_nodes,) of force magnitudes.
+        Each element is computed when it is first accessed.
 
     """
-    force_mag = {}
+    force_mag = LazyDict()
     mu0 = 4*jnp.pi*1e-7
     axis = P_transform.grid.axis
     pres_r = P_transform.transform(cP, 1)
 
-    # force balance error covariant components
-    F_rho = jacobian['g']*(plasma_current['J^theta']*magnetic_field['B^zeta'] -
-                           plasma_current['J^zeta']*magnetic_field['B^theta']) - pres_r
-    F_theta = jacobian['g']*plasma_current['J^rho']*magnetic_field['B^zeta']
-    F_zeta = -jacobian['g']*plasma_current['J^rho']*magnetic_field['B^theta']
-
-    # axis terms
-    if len(axis):
-        Jsup_theta = (magnetic_field['B_rho_z'] -
-                      magnetic_field['B_zeta_r']) / mu0
-        Jsup_zeta = (magnetic_field['B_theta_r'] -
-                     magnetic_field['B_rho_v']) / mu0
-        F_rho = put(F_rho, axis, Jsup_theta[axis]*magnetic_field['B^zeta']
-                    [axis] - Jsup_zeta[axis]*magnetic_field['B^theta'][axis])
-        grad_theta = cross(cov_basis['e_zeta'], cov_basis['e_rho'], 0)
-        gsup_vv = dot(grad_theta, grad_theta, 0)
-        gsup_rv = dot(con_basis['e^rho'], grad_theta, 0)
-        gsup_vz = dot(grad_theta, con_basis['e^zeta'], 0)
-        F_theta = put(
-            F_theta, axis, plasma_current['J^rho'][axis]*magnetic_field['B^zeta'][axis])
-        F_zeta = put(F_zeta, axis, -plasma_current['J^rho']
-                     [axis]*magnetic_field['B^theta'][axis])
-        con_basis['g^vv'] = put(con_basis['g^vv'], axis, gsup_vv[axis])
-        con_basis['g^rv'] = put(con_basis['g^rv'], axis, gsup_rv[axis])
-        con_basis['g^vz'] = put(con_basis['g^vz'], axis, gsup_vz[axis])
-
-    # F_i*F_j*g^ij terms
-    Fg_rr = F_rho * F_rho * con_basis['g^rr']
-    Fg_vv = F_theta*F_theta*con_basis['g^vv']
-    Fg_zz = F_zeta * F_zeta * con_basis['g^zz']
-    Fg_rv = F_rho * F_theta*con_basis['g^rv']
-    Fg_rz = F_rho * F_zeta * con_basis['g^rz']
-    Fg_vz = F_theta*F_zeta * con_basis['g^vz']
+    def F_mag():
+        # force balance error covariant components
+        F_rho = jacobian['g']*(plasma_current['J^theta']*magnetic_field['B^zeta'] -
+                               plasma_current['J^zeta']*magnetic_field['B^theta']) - pres_r
+        F_theta = jacobian['g']*plasma_current['J^rho']*magnetic_field['B^zeta']
+        F_zeta = -jacobian['g']*plasma_current['J^rho']*magnetic_field['B^theta']
+        gsup_vv = con_basis['g^vv']
+        gsup_rv = con_basis['g^rv']
+        gsup_vz = con_basis['g^vz']
+
+        # axis terms
+        if len(axis):
+            Jsup_theta = (magnetic_field['B_rho_z'] -
+                          magnetic_field['B_zeta_r']) / mu0
+            Jsup_zeta = (magnetic_field['B_theta_r'] -
+                         magnetic_field['B_rho_v']) / mu0
+            F_rho = put(F_rho, axis, Jsup_theta[axis]*magnetic_field['B^zeta']
+                        [axis] - Jsup_zeta[axis]*magnetic_field['B^theta'][axis])
+            grad_theta = cross(cov_basis['e_zeta'], cov_basis['e_rho'], 0)
+            F_theta = put(
+                F_theta, axis, plasma_current['J^rho'][axis]*magnetic_field['B^zeta'][axis])
+            F_zeta = put(F_zeta, axis, -plasma_current['J^rho']
+                         [axis]*magnetic_field['B^theta'][axis])
+            gsup_vv = put(gsup_vv, axis, dot(grad_theta, grad_theta, 0)[axis])
+            gsup_rv = put(gsup_rv, axis, dot(con_basis['e^rho'], grad_theta, 0)[axis])
+            gsup_vz = put(gsup_vz, axis, dot(grad_theta, con_basis['e^zeta'], 0)[axis])
+
+        # F_i*F_j*g^ij terms
+        Fg_rr = F_rho * F_rho * con_basis['g^rr']
+        Fg_vv = F_theta*F_theta*gsup_vv
+        Fg_zz = F_zeta * F_zeta * con_basis['g^zz']
+        Fg_rv = F_rho * F_theta*gsup_rv
+        Fg_rz = F_rho * F_zeta * con_basis['g^rz']
+        Fg_vz = F_theta*F_zeta * gsup_vz
+
+        return jnp.sqrt(Fg_rr + Fg_vv + Fg_zz + 2*Fg_rv + 2*Fg_rz + 2*Fg_vz)
 
     # magnitudes
-    force_mag['|F|'] = jnp.sqrt(Fg_rr + Fg_vv + Fg_zz + 2*Fg_rv + 2*Fg_rz + 2*Fg_vz)
-    force_mag['|grad(p)|'] = jnp.sqrt(pres_r*pres_r*con_basis['g^rr'])
+    force_mag['|F|'] = F_mag
+    force_mag['|grad(p)|'] = lambda: jnp.sqrt(pres_r*pres_r*con_basis['g^rr'])
 
     return force_mag
+
+
+class _RecordingDerivatives(CoordinateDerivatives):
+    """Coordinate derivatives that record which of them are accessed"""
+
+    def __init__(self, values, derivatives) -> None:
+        super().__init__(values, derivatives)
+        self.accessed = set()
+
+    def __getitem__(self, key):
+        self.accessed.add(key)
+        return super().__getitem__(key)
+
+
+def get_derivatives(quantities, axis=False):
+    """Gets the derivatives of R and Z needed to compute the given quantities
+
+    The quantities are computed with arbitrary values on a small grid, and the
+    derivatives of R and Z that they access are recorded. The compute functions
+    only evaluate each quantity when it is accessed, so this is the minimal set
+    of derivatives for the requested quantities, and Transforms built with it
+    only compute the matrices that are needed.
+
+    Parameters
+    ----------
+    quantities : list of str
+        names of the quantities, which can be keys of the dictionaries returned by
+        ``compute_coordinate_derivatives``, ``compute_covariant_basis``,
+        ``compute_jacobian``, ``compute_contravariant_basis``,
+        ``compute_magnetic_field``, ``compute_plasma_current``,
+        ``compute_magnetic_field_magnitude`` or ``compute_force_magnitude``
+    axis : bool
+        True if the nodes include the magnetic axis, where the limits of some
+        quantities need higher derivatives (Default = False)
+
+    Returns
+    -------
+    derivatives : ndarray of int, shape(N_derivs,3)
+        orders of the derivatives in (rho,theta,zeta) that are needed, which
+        can be passed as ``derivs`` to a Transform
+
+    """
+    grid = ConcentricGrid(M=2, N=1, axis=axis)
+    derivatives = COORDINATE_DERIVATIVES['qs']
+    values = 1 + np.random.default_rng(0).random((2, derivatives.shape[0], grid.num_nodes))
+    I_transform = Transform(grid, PowerSeries(L=1), derivs=1)
+    P_transform = Transform(grid, PowerSeries(L=1), derivs=1)
+    cI = np.ones((2,))
+    cP = np.ones((2,))
+
+    coord_der = _RecordingDerivatives(values, derivatives)
+    cov_basis = compute_covariant_basis(coord_der)
+    jacobian = compute_jacobian(coord_der, cov_basis)
+    con_basis = compute_contravariant_basis(coord_der, cov_basis, jacobian, grid.axis)
+    magnetic_field = compute_magnetic_field(cov_basis, jacobian, cI, 1.0, I_transform)
+    plasma_current = compute_plasma_current(coord_der, cov_basis, jacobian,
+                                            magnetic_field, cI, I_transform)
+    magnetic_field_mag = compute_magnetic_field_magnitude(cov_basis, magnetic_field,
+                                                          cI, I_transform)
+    force_mag = compute_force_magnitude(coord_der, cov_basis, con_basis, jacobian,
+                                        magnetic_field, plasma_current, cP, P_transform)
+    computed = [coord_der, cov_basis, jacobian, con_basis, magnetic_field,
+                plasma_current, magnetic_field_mag, force_mag]
+
+    for key in quantities:
+        for quantity in computed:
+            if key in quantity:
+                quantity[key]
+                break
+        else:
+            raise ValueError(TextColors.FAIL +
+                             "Quantity '{}' is not computed by any function".format(key)
+                             + TextColors.ENDC)
+
+    idx = sorted({coord_der._idx[key][1] for key in coord_der.accessed if key != '0'})
+    return derivatives[idx]
@@ -1,17 +1,19 @@
+import os
 import numpy as np
 import scipy.optimize
 import warnings
 import copy
 
-from desc.backend import jit, use_jax, Timer, TextColors, Tristate
+from desc.backend import jit, vmap, use_jax, Timer, TextColors, Tristate
 from desc.grid import LinearGrid, ConcentricGrid
 from desc.basis import PowerSeries, DoubleFourierSeries, FourierZernikeBasis
 from desc.transform import Transform
-from desc.configuration import Equilibrium, EquilibriaFamily
-from desc.objective_funs import is_nested, ObjectiveFunctionFactory
+from desc.configuration import Equilibrium, EquilibriaFamily, get_derivatives
+from desc.objective_funs import is_nested, ObjectiveFunctionFactory, EQUIL_QUANTITIES
 from desc.equilibrium_io import Checkpoint
 from desc.perturbations import perturb_continuation_params
-from desc.jacobian import AutoDiffJacobian
+from desc.jacobian import AutoDiffJacobian, FiniteDiffJacobian, MatrixFreeJacobian
+from desc.optimize import lsq_lm_batch
 
 
 def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
@@ -24,6 +26,10 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
         3. Step up to higher resolution and perturb the previous solution
         4. Repeat 2 and 3 until at desired resolution
 
+    Without JAX, the jacobians are computed by finite differences. If the
+    environment variable ``DESC_FD_PROCESSES`` is set to more than 1, their
+    function evaluations are split across that many processes.
+
     Parameters
     ----------
     inputs : dict
@@ -62,6 +68,7 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
     xtol = inputs['xtol']               # arr
     gtol = inputs['gtol']               # arr
     nfev = inputs['nfev']               # arr
+    precision = inputs['precision']     # arr
     optim_method = inputs['optim_method']
     errr_mode = inputs['errr_mode']
     bdry_mode = inputs['bdry_mode']
@@ -90,6 +97,77 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
 
     
   
+    # floating point type of the transforms at each step, the state vector and
+    # the residuals returned to the optimizer are always double precision
+    dtypes = {32: np.float32, 64: np.float64}
+
+    # processes for the finite difference jacobians, without JAX
+    fd_processes = int(os.environ.get('DESC_FD_PROCESSES', 1))
+
+    # compiled objective functions, keyed on (resolution, precision, errr_mode, scalar)
+    # the continuation parameters are traced arguments, so steps that only
+    # change them reuse the same executables. The executables capture the
+    # transform matrices, so they are cleared whenever the transforms are rebuilt
+    compiled = {}
+
+    def get_objective(ii, scalar, x, args, compile=True):
+        """Gets the objective function and its jacobian for step ii,
+        compiling them only if the resolution or objective type changed"""
+        key = (M[ii], N[ii], delta_lm[ii], Mnodes[ii], Nnodes[ii], precision[ii],
+               errr_mode, scalar)
+        if key not in compiled:
+            obj_fun = ObjectiveFunctionFactory.get_equil_obj_fun(
+                        errr_mode, scalar=scalar,
+                        R_transform=R_transform, Z_transform=Z_transform,
+                        R1_transform=R1_transform, Z1_transform=Z1_transform,
+                        L_transform=L_transform, P_transform=P_transform,
+                        I_transform=I_transform)
+            compiled[key] = (obj_fun, None, None)
+        obj_fun, equil_obj_jit, jac_obj_jit = compiled[key]
+        if not compile or equil_obj_jit is not None:
+            return obj_fun, equil_obj_jit, jac_obj_jit
+
+        equil_obj = obj_fun.compute
+        if use_jax:
+            if verbose > 0:
+                print("Compiling objective function")
+            equil_obj_jit = jit(equil_obj, static_argnums=(), device=device)
+            if scalar:
+                jac = AutoDiffJacobian(equil_obj, argnum=0, mode='grad')
+                jac_obj_jit = jit(jac.compute, device=device)
+            elif optim_method in ['lsmr-jvp']:
+                # products with the jacobian are compiled inside the operator
+                jac = MatrixFreeJacobian(equil_obj, argnum=0)
+                jac_obj_jit = jac.compute
+            else:
+                jac = AutoDiffJacobian(equil_obj, argnum=0, mode='fwd', chunk_size='auto')
+                jac_obj_jit = jit(jac.compute, device=device)
+            timer.start("Iteration {} compilation".format(ii+1))
+            f0 = equil_obj_jit(x, *args)
+            J0 = jac_obj_jit(x, *args)
+            if optim_method in ['lsmr-jvp']:
+                J0.matvec(x)
+                J0.rmatvec(f0)
+            timer.stop("Iteration {} compilation".format(ii+1))
+            if verbose > 1:
+                timer.disp("Iteration {} compilation".format(ii+1))
+        else:
+            equil_obj_jit = equil_obj
+            if fd_processes > 1:
+                # central differences, with steps resolved by the precision
+                jac = FiniteDiffJacobian(equil_obj, argnum=0, processes=fd_processes,
+                                         rel_step=np.cbrt(np.finfo(dtypes[precision[ii]]).eps))
+                jac_obj_jit = jac.compute
+            else:
+                jac_obj_jit = '2-point'
+
+        compiled[key] = (obj_fun, equil_obj_jit, jac_obj_jit)
+        return compiled[key]
+
+    if use_jax and device is None:
+        import jax
+        device = jax.devices()[0]
+
     arr_len = M.size
     for ii in range(arr_len):
 
@@ -110,6 +188,7 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
             print("Gradient tolerance = {}".format(gtol[ii]))
             print("State vector tolerance = {}".format(xtol[ii]))
             print("Max function evaluations = {}".format(nfev[ii]))
+            print("Precision = {} bit".format(precision[ii]))
             print("================")
 
         # initial solution
@@ -133,6 +212,8 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                 'axis': axis,
                 'output_path': checkpoint_filename
             } 
+            if 'vmec_init' in inputs:
+                inputs_ii['vmec_init'] = inputs['vmec_init']
             timer.start("Transform precomputation")
             if verbose > 0:
                 print("Precomputing Transforms")
@@ -154,14 +235,17 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                                      axis=False, index=zern_mode, surfs=node_mode)
             L_grid = LinearGrid(M=Mnodes[ii], N=2*Nnodes[ii]+1, NFP=NFP, sym=stell_sym)
 
-            # transforms
-            R_transform = Transform(RZ_grid, R_basis, derivs=3)
-            Z_transform = Transform(RZ_grid, Z_basis, derivs=3)
-            R1_transform = Transform(L_grid, R_basis)
-            Z1_transform = Transform(L_grid, Z_basis)
-            L_transform = Transform(L_grid,  L_basis, derivs=0)
-            P_transform = Transform(RZ_grid, P_basis, derivs=1)
-            I_transform = Transform(RZ_grid, I_basis, derivs=1)
+            # transforms, with only the derivatives needed by the objective
+            derivatives = get_derivatives(EQUIL_QUANTITIES[errr_mode],
+                                          axis=RZ_grid.axis.size > 0)
+            dtype = dtypes[precision[ii]]
+            R_transform = Transform(RZ_grid, R_basis, derivs=derivatives, method='fft', dtype=dtype)
+            Z_transform = Transform(RZ_grid, Z_basis, derivs=derivatives, method='fft', dtype=dtype)
+            R1_transform = Transform(L_grid, R_basis, method='fft', dtype=dtype)
+            Z1_transform = Transform(L_grid, Z_basis, method='fft', dtype=dtype)
+            L_transform = Transform(L_grid,  L_basis, derivs=0, method='fft', dtype=dtype)
+            P_transform = Transform(RZ_grid, P_basis, derivs=1, dtype=dtype)
+            I_transform = Transform(RZ_grid, I_basis, derivs=1, dtype=dtype)
             
             timer.stop("Transform precomputation")
             if verbose > 1:
@@ -175,12 +259,14 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                 RZ_grid = ConcentricGrid(Mnodes[ii], Nnodes[ii], NFP=NFP, sym=stell_sym,
                                          axis=False, index=zern_mode, surfs=node_mode)
                 L_grid = LinearGrid(M=Mnodes[ii], N=2*Nnodes[ii]+1, NFP=NFP, sym=stell_sym)
+                Jx = None
 
             # change bases
             if M[ii] != M[ii-1] or N[ii] != N[ii-1] or delta_lm[ii] != delta_lm[ii-1]:
                 equil.change_resolution(L=delta_lm[ii], M=M[ii], N=N[ii]) # update equilibrium bases to the new resolutions
                 R_basis, Z_basis, L_basis = equil.R_basis, equil.Z_basis, equil.L_basis
                 x = equil.x
+                Jx = None
 
             # change transform matrices
             timer.start(
@@ -191,6 +277,9 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                 print("Changing spectral resolution from (L,M,N) = ({},{},{}) to ({},{},{})".format(
                         delta_lm[ii-1], M[ii-1], N[ii-1], delta_lm[ii], M[ii], N[ii]))
 
+            transforms = [R_transform, Z_transform, R1_transform, Z1_transform,
+                          L_transform, P_transform, I_transform]
+            old_state = [(t.grid, t.basis, t.dtype) for t in transforms]
             R_transform.change_resolution(grid=RZ_grid, basis=R_basis)
             Z_transform.change_resolution(grid=RZ_grid, basis=Z_basis)
             R1_transform.change_resolution(grid=L_grid, basis=R_basis)
@@ -198,6 +287,13 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
             L_transform.change_resolution(grid=L_grid, basis=L_basis)
             P_transform.change_resolution(grid=RZ_grid)
             I_transform.change_resolution(grid=RZ_grid)
+            dtype = dtypes[precision[ii]]
+            for transform in transforms:
+                transform.dtype = dtype
+            # the transforms only keep a new grid, basis or dtype if they were rebuilt
+            if any(t.grid is not grid or t.basis is not basis or t.dtype != old_dtype
+                   for t, (grid, basis, old_dtype) in zip(transforms, old_state)):
+                compiled.clear()
             timer.stop(
                 "Iteration {} changing resolution".format(ii+1))
             if verbose > 1:
@@ -211,16 +307,10 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
             deltas = np.array([delta_bdry, delta_pres, delta_zeta])
 
             # need a non-scalar objective function to do the perturbations
-            obj_fun = ObjectiveFunctionFactory.get_equil_obj_fun(
-                    errr_mode, scalar=False,
-                    R_transform=R_transform, Z_transform=Z_transform,
-                    R1_transform=R1_transform, Z1_transform=Z1_transform,
-                    L_transform=L_transform, P_transform=P_transform,
-                    I_transform=I_transform)
-            equil_obj = obj_fun.compute
-            callback = obj_fun.callback
             args = (equil.cRb, equil.cZb, equil.cP, equil.cI, equil.Psi,
                     bdry_ratio[ii-1], pres_ratio[ii-1], zeta_ratio[ii-1], errr_ratio[ii-1])
+            obj_fun, _, _ = get_objective(ii, False, x, args, compile=False)
+            equil_obj = obj_fun.compute
 
             # TODO: should probably perturb before expanding resolution
             # perturbations
@@ -228,48 +318,26 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                 if verbose > 1:
                     print("Perturbing equilibrium")
                 x, timer = perturb_continuation_params(x, equil_obj, deltas, args,
-                                                       pert_order[ii], verbose, timer)
+                                                       pert_order[ii], verbose, timer, Jx=Jx,
+                                                       matrix_free=optim_method in ['lsmr-jvp'],
+                                                       processes=fd_processes)
 
         # equilibrium objective function
         if optim_method in ['bfgs']:
             scalar = True
         else:
             scalar = False
-        obj_fun = ObjectiveFunctionFactory.get_equil_obj_fun(
-                    errr_mode, scalar=scalar,
-                    R_transform=R_transform, Z_transform=Z_transform,
-                    R1_transform=R1_transform, Z1_transform=Z1_transform,
-                    L_transform=L_transform, P_transform=P_transform,
-                    I_transform=I_transform)
-        equil_obj = obj_fun.compute
-        callback = obj_fun.callback
         args = (equil.cRb, equil.cZb, equil.cP, equil.cI, equil.Psi,
-                bdry_ratio[ii-1], pres_ratio[ii-1], zeta_ratio[ii-1], errr_ratio[ii-1])
-
-        if use_jax:
-            if optim_method in ['bfgs']:
-                jac = AutoDiffJacobian(equil_obj, argnum=0, mode='grad')
-            else:
-                jac = AutoDiffJacobian(equil_obj, argnum=0, mode='fwd')
-            if verbose > 0:
-                print("Compiling objective function")
-            if device is None:
-                import jax
-                device = jax.devices()[0]
-            equil_obj_jit = jit(equil_obj, static_argnums=(), device=device)
-            jac_obj_jit = jit(jac.compute, device=device)
-            timer.start("Iteration {} compilation".format(ii+1))
-            f0 = equil_obj_jit(x, *args)
-            J0 = jac_obj_jit(x, *args)
-            timer.stop("Iteration {} compilation".format(ii+1))
-            if verbose > 1:
-                timer.disp("Iteration {} compilation".format(ii+1))
-        else:
-            equil_obj_jit = equil_obj
-            jac_obj_jit = '2-point'
+                bdry_ratio[ii], pres_ratio[ii], zeta_ratio[ii], errr_ratio[ii])
+        obj_fun, equil_obj_jit, jac_obj_jit = get_objective(ii, scalar, x, args)
+        callback = obj_fun.callback
         if verbose > 0:
             print("Starting optimization")
 
+        # finite difference steps that are resolved by the precision of the
+        # transforms, if the jacobian is not computed with autodiff
+        diff_step = np.sqrt(np.finfo(dtype).eps)
+
         x_init = x
         timer.start("Iteration {} solution".format(ii+1))
         if optim_method in ['bfgs']:
@@ -280,7 +348,8 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                                           jac=jac_obj_jit,
                                           tol=gtol[ii],
                                           options={'maxiter': nfev[ii],
-                                                   'disp': verbose})
+                                                   'disp': verbose,
+                                                   'finite_diff_rel_step': diff_step})
 
         elif optim_method in ['trf', 'lm', 'dogleg']:
             out = scipy.optimize.least_squares(equil_obj_jit,
@@ -293,14 +362,35 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
                                                xtol=xtol[ii],
                                                gtol=gtol[ii],
                                                max_nfev=nfev[ii],
+                                               diff_step=diff_step,
+                                               verbose=verbose)
+        elif optim_method in ['lsmr-jvp']:
+            # trust region subproblems are solved iteratively with LSMR, using
+            # only products with the jacobian and its transpose
+            out = scipy.optimize.least_squares(equil_obj_jit,
+                                               x0=x_init,
+                                               args=args,
+                                               jac=jac_obj_jit,
+                                               method='trf',
+                                               tr_solver='lsmr',
+                                               x_scale=1.0,
+                                               ftol=ftol[ii],
+                                               xtol=xtol[ii],
+                                               gtol=gtol[ii],
+                                               max_nfev=nfev[ii],
+                                               diff_step=diff_step,
                                                verbose=verbose)
         else:
             raise NotImplementedError(
-                TextColors.FAIL + "optim_method must be one of 'bfgs', 'trf', 'lm', 'dogleg'" + TextColors.ENDC)
+                TextColors.FAIL + "optim_method must be one of 'bfgs', 'trf', 'lm', 'dogleg', 'lsmr-jvp'" + TextColors.ENDC)
 
         timer.stop("Iteration {} solution".format(ii+1))
 
         equil.x = out['x']
+        x = equil.x
+        # jacobian at the solution, reused by the perturbation of the next
+        # step if the resolution does not change
+        Jx = out['jac'] if optim_method in ['trf', 'lm', 'dogleg', 'lsmr-jvp'] else None
 
         equil_fam.append(copy.deepcopy(equil))
 
@@ -336,3 +426,88 @@ def solve_eq_continuation(inputs, checkpoint_filename=None, device=None):
     print('====================')
 
     return equil_fam, timer
+
+
+def solve_eq_batch(obj_fun, x0, cRb, cZb, cP, cI, Psi_lcfs, bdry_ratio=1.0,
+                   pres_ratio=1.0, zeta_ratio=1.0, errr_ratio=1.0, ftol=1e-6,
+                   xtol=1e-6, gtol=1e-6, nfev=None, verbose=1, device=None):
+    """Solves a batch of equilibria that share the same resolution
+
+    The objective function and its jacobian are vectorized over the batch
+    with vmap, so a single compiled program and a single set of transform
+    matrices are used for all equilibria, which are solved together with a
+    batched Levenberg-Marquardt method.
+
+    Parameters
+    ----------
+    obj_fun : ObjectiveFunction
+        non-scalar equilibrium objective function, eg from
+        ``ObjectiveFunctionFactory.get_equil_obj_fun(errr_mode, scalar=False, ...)``
+    x0 : ndarray, shape(N_x,) or shape(N_batch,N_x)
+        initial guess(es) of the state vector
+    cRb : ndarray, shape(N_Rb,) or shape(N_batch,N_Rb)
+        spectral coefficients of R boundary for each equilibrium
+    cZb : ndarray, shape(N_Zb,) or shape(N_batch,N_Zb)
+        spectral coefficients of Z boundary for each equilibrium
+    cP : ndarray, shape(N_P,) or shape(N_batch,N_P)
+        spectral coefficients of pressure for each equilibrium
+    cI : ndarray, shape(N_I,) or shape(N_batch,N_I)
+        spectral coefficients of rotational transform for each equilibrium
+    Psi_lcfs : float
+        total toroidal flux within the last closed flux surface
+    bdry_ratio : float
+        fraction in range [0,1] of the full non-axisymmetric boundary to use
+    pres_ratio : float
+        fraction in range [0,1] of the full pressure to use
+    zeta_ratio : float
+        fraction in range [0,1] of the full toroidal derivatives to use
+    errr_ratio : float
+        weighting factor for the boundary error
+    ftol : float
+        relative tolerance on the cost function
+    xtol : float
+        relative tolerance on the state vector
+    gtol : float
+        absolute tolerance on the gradient
+    nfev : int
+        maximum number of function evaluations
+    verbose : int
+        level of output
+    device : jax.device or None
+        device handle to JIT compile to (Default value = None)
+
+    Returns
+    -------
+    out : OptimizeResult
+        result of ``desc.optimize.lsq_lm_batch``, out['x'] has shape(N_batch,N_x)
+
+    """
+    if obj_fun.scalar:
+        raise ValueError(TextColors.FAIL +
+                "batched solve requires a non-scalar objective function" + TextColors.ENDC)
+
+    batch = [np.atleast_2d(arr) for arr in (x0, cRb, cZb, cP, cI)]
+    num_batch = max(arr.shape[0] for arr in batch)
+    for arr in batch:
+        if arr.shape[0] not in [1, num_batch]:
+            raise ValueError(TextColors.FAIL +
+                "batched inputs must all have the same number of rows or a single row"
+                + TextColors.ENDC)
+    x0, cRb, cZb, cP, cI = [np.broadcast_to(arr, (num_batch, arr.shape[1]))
+                            for arr in batch]
+
+    equil_obj = obj_fun.compute
+    in_axes = (0, 0, 0, 0, 0, None, None, None, None, None)
+    if use_jax:
+        jac = AutoDiffJacobian(equil_obj, argnum=0, mode='fwd')
+        equil_obj_batch = jit(vmap(equil_obj, in_axes), device=device)
+        jac_obj_batch = jit(vmap(jac.compute, in_axes), device=device)
+    else:
+        jac = FiniteDiffJacobian(equil_obj, argnum=0)
+        equil_obj_batch = vmap(equil_obj, in_axes)
+        jac_obj_batch = vmap(jac.compute, in_axes)
+
+    args = (cRb, cZb, cP, cI, Psi_lcfs, bdry_ratio, pres_ratio, zeta_ratio, errr_ratio)
+    return lsq_lm_batch(equil_obj_batch, jac_obj_batch, x0, args=args,
+                        ftol=ftol, xtol=xtol, gtol=gtol, max_nfev=nfev,
+                        verbose=verbose)
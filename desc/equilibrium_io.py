@@ -1024,7 +1024,8 @@ class Checkpoint():
 
         if inputs is not None:
             arrays = ['Mpol', 'Ntor', 'Mnodes', 'Nnodes', 'bdry_ratio', 'pres_ratio',
-                      'zeta_ratio', 'errr_ratio', 'pert_order', 'ftol', 'xtol', 'gtol', 'nfev']
+                      'zeta_ratio', 'errr_ratio', 'pert_order', 'ftol', 'xtol', 'gtol', 'nfev',
+                      'precision']
             if 'inputs' not in self.f['iterations'][iter_str]:
                 self.f['iterations'][iter_str].create_group('inputs')
             for key, val in inputs.items():
@@ -68,8 +68,33 @@ class Grid(IOAble):
         None
 
         """
-        if self.__sym:  # remove nodes with theta > pi
-            non_sym_idx = np.where(self.__nodes[:, 1] > np.pi)
+        if self.__sym:
+            # stellarator symmetry maps (theta,zeta) to (-theta,-zeta), so the
+            # irreducible domain is theta in [0,pi]. On the lines theta = 0
+            # and theta = pi the nodes with zeta > pi/NFP are also redundant
+            NFP = self.__NFP if self.__NFP is not None else 1
+            r, t, z = self.__nodes.T
+            on_line = np.isclose(t, 0) | np.isclose(t, np.pi)
+            non_sym = (t > np.pi) | (on_line & (z > np.pi/NFP)
+                                     & ~np.isclose(z, np.pi/NFP))
+            non_sym_idx = np.where(non_sym)[0]
+            sym_idx = np.where(~non_sym)[0]
+
+            # add the volumes of the removed nodes to their mirror images
+            def key(r, t, z):
+                return zip(np.round(r, 10), np.round(t % (2*np.pi), 10),
+                           np.round(z % (2*np.pi/NFP), 10))
+            mirror = {k: i for k, i in zip(key(r[sym_idx], t[sym_idx], z[sym_idx]),
+                                           sym_idx)}
+            vol = np.prod(self.__volumes, axis=1)
+            scale = np.ones_like(vol)
+            for k, i in zip(key(r[non_sym_idx], -t[non_sym_idx], -z[non_sym_idx]),
+                            non_sym_idx):
+                j = mirror.get(k)
+                if j is not None and vol[j] != 0:
+                    scale[j] += vol[i]/vol[j]
+            self.__volumes[:, 1] *= scale
+
             self.__nodes = np.delete(self.__nodes, non_sym_idx, axis=0)
             self.__volumes = np.delete(self.__volumes, non_sym_idx, axis=0)
 
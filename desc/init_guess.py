@@ -1,7 +1,11 @@
 import numpy as np
+from collections.abc import Mapping
 
-from desc.backend import put
-from desc.basis import FourierZernikeBasis
+from desc.backend import put, TextColors
+from desc.basis import FourierZernikeBasis, DoubleFourierSeries
+from desc.grid import LinearGrid
+from desc.transform import Transform
+from desc.vmec import VmecOutput, vmec_sfl_theta, vmec_coords
 
 
 def get_initial_guess_scale_bdry(axis, bdry, bdry_ratio,
@@ -31,40 +35,119 @@ def get_initial_guess_scale_bdry(axis, bdry, bdry_ratio,
         Fourier-Zernike coefficients for Z, following indexing given in zern_idx
 
     """
-    modes_R = R_basis.modes
-    modes_Z = Z_basis.modes
-
     cR = np.zeros((R_basis.num_modes,))
     cZ = np.zeros((Z_basis.num_modes,))
 
-    for m, n, bR, bZ in bdry:
+    bdry = np.atleast_2d(bdry)
+    m, n = bdry[:, 0], bdry[:, 1]
+    bR = bdry[:, 2]*np.clip(bdry_ratio+(n == 0), 0, 1)
+    bZ = bdry[:, 3]*np.clip(bdry_ratio+(n == 0), 0, 1)
 
-        bR *= np.clip(bdry_ratio+(n == 0), 0, 1)
-        bZ *= np.clip(bdry_ratio+(n == 0), 0, 1)
+    # axis coefficients of each toroidal mode, the boundary where not given
+    axis_match = np.atleast_2d(axis)[:, 0] == n[:, np.newaxis]
+    axis_idx = np.argmax(axis_match, axis=1)
+    has_axis = np.any(axis_match, axis=1)
+    aR = np.where(has_axis, np.atleast_2d(axis)[axis_idx, 1], bR)
+    aZ = np.where(has_axis, np.atleast_2d(axis)[axis_idx, 2], bZ)
 
-        if m == 0:
+    # m=0 modes split the coefficient between axis and boundary in l=0 and l=2,
+    # other modes are l=|m|
+    m0 = m == 0
+    l = np.concatenate([np.where(m0, 0, np.absolute(m)), 2*np.ones(np.sum(m0))])
+    mm = np.concatenate([m, m[m0]])
+    nn = np.concatenate([n, n[m0]])
+    val_R = np.concatenate([np.where(m0, (bR+aR)/2, bR), ((bR-aR)/2)[m0]])
+    val_Z = np.concatenate([np.where(m0, (bZ+aZ)/2, bZ), ((bZ-aZ)/2)[m0]])
 
-            idx = np.where(axis[:, 0] == n)
-            if idx[0].size == 0:
-                aR = bR
-                aZ = bZ
-            else:
-                aR = axis[idx, 1][0, 0]
-                aZ = axis[idx, 2][0, 0]
+    idx_R = R_basis.get_idx(l=l, m=mm, n=nn)
+    idx_Z = Z_basis.get_idx(l=l, m=mm, n=nn)
+    cR = put(cR, idx_R[idx_R >= 0], val_R[idx_R >= 0])
+    cZ = put(cZ, idx_Z[idx_Z >= 0], val_Z[idx_Z >= 0])
 
-            cR = put(cR, np.where(np.logical_and.reduce(
-                (modes_R[:, 0] == 0, modes_R[:, 1] == 0, modes_R[:, 2] == n)))[0], (bR+aR)/2)
-            cZ = put(cZ, np.where(np.logical_and.reduce(
-                (modes_Z[:, 0] == 0, modes_Z[:, 1] == 0, modes_Z[:, 2] == n)))[0], (bZ+aZ)/2)
-            cR = put(cR, np.where(np.logical_and.reduce(
-                (modes_R[:, 0] == 2, modes_R[:, 1] == 0, modes_R[:, 2] == n)))[0], (bR-aR)/2)
-            cZ = put(cZ, np.where(np.logical_and.reduce(
-                (modes_Z[:, 0] == 2, modes_Z[:, 1] == 0, modes_Z[:, 2] == n)))[0], (bZ-aZ)/2)
+    return cR, cZ
 
-        else:
-            cR = put(cR, np.where(np.logical_and.reduce((modes_R[:, 0] == np.absolute(
-                m), modes_R[:, 1] == m, modes_R[:, 2] == n)))[0], bR)
-            cZ = put(cZ, np.where(np.logical_and.reduce((modes_Z[:, 0] == np.absolute(
-                    m), modes_Z[:, 1] == m, modes_Z[:, 2] == n)))[0], bZ)
 
-    return cR, cZ
+def get_initial_guess_vmec(vmec_data, R_basis:FourierZernikeBasis,
+                           Z_basis:FourierZernikeBasis, L_basis:DoubleFourierSeries,
+                           bdry_ratio=1.0):
+    """Generate initial guess by fitting a VMEC solution
+
+    The VMEC solution is evaluated in straight field line coordinates on a
+    subset of its flux surfaces, with rho = sqrt(s) for the normalized
+    toroidal flux s, and fit in the Fourier-Zernike bases by least squares.
+    Lambda is fit on the last closed flux surface. As for the boundary, the
+    non-axisymmetric modes are scaled by bdry_ratio.
+
+    Parameters
+    ----------
+    vmec_data : str, path-like, dict or VmecOutput
+        VMEC output file, or VMEC data fields read from it
+    R_basis : FourierZernikeBasis
+        spectral basis for R
+    Z_basis : FourierZernikeBasis
+        spectral basis for Z
+    L_basis : DoubleFourierSeries
+        spectral basis for lambda
+    bdry_ratio : float
+        fraction in range [0,1] of the non-axisymmetric modes to use
+
+    Returns
+    -------
+    cR : ndarray, shape(R_basis.num_modes,)
+        Fourier-Zernike coefficients for R
+    cZ : ndarray, shape(Z_basis.num_modes,)
+        Fourier-Zernike coefficients for Z
+    cL : ndarray, shape(L_basis.num_modes,)
+        double Fourier coefficients for lambda
+
+    Raises
+    ------
+    ValueError
+        if the VMEC solution has a different number of field periods or
+        stellarator symmetry than the bases
+
+    """
+    if not isinstance(vmec_data, Mapping):
+        with VmecOutput(vmec_data) as file:
+            return get_initial_guess_vmec(file, R_basis, Z_basis, L_basis, bdry_ratio)
+
+    if vmec_data['NFP'] != R_basis.NFP:
+        raise ValueError(TextColors.FAIL + "VMEC solution has NFP = {}, but the input has NFP = {}".format(
+            vmec_data['NFP'], R_basis.NFP) + TextColors.ENDC)
+    if bool(vmec_data['sym']) != (R_basis.sym == True):
+        raise ValueError(TextColors.FAIL + "VMEC solution has sym = {}, but the input has sym = {}".format(
+            bool(vmec_data['sym']), R_basis.sym == True) + TextColors.ENDC)
+
+    psi = np.asarray(vmec_data['psi'][:])
+    rho_vmec = np.sqrt(np.abs(psi/psi[-1]))
+    ns = rho_vmec.size
+
+    # enough surfaces to resolve the radial polynomials
+    L = max(np.max(R_basis.modes[:, 0]), np.max(Z_basis.modes[:, 0]))
+    num_surfs = min(ns, L+1)
+    surfs = np.unique(np.round(np.linspace(0, ns-1, num_surfs)).astype(int))
+    M = max(R_basis.M, Z_basis.M)
+    N = max(R_basis.N, Z_basis.N)
+    grid = LinearGrid(L=surfs.size, M=2*M+1, N=2*N+1, NFP=R_basis.NFP,
+                      rho=rho_vmec[surfs])
+    s = surfs[np.searchsorted(rho_vmec[surfs], grid.nodes[:, 0])]
+    vartheta = grid.nodes[:, 1]
+    phi = grid.nodes[:, 2]
+
+    theta = vmec_sfl_theta(s, vartheta, phi, vmec_data)
+    R, Z = vmec_coords(s, theta, phi, vmec_data)
+    cR = Transform(grid, R_basis).fit(R)
+    cZ = Transform(grid, Z_basis).fit(Z)
+
+    # lambda = vartheta - theta on the last closed flux surface
+    bdry_grid = LinearGrid(M=2*L_basis.M+1, N=2*L_basis.N+1, NFP=L_basis.NFP)
+    s = np.full((bdry_grid.num_nodes,), ns-1)
+    vartheta = bdry_grid.nodes[:, 1]
+    theta = vmec_sfl_theta(s, vartheta, bdry_grid.nodes[:, 2], vmec_data)
+    cL = Transform(bdry_grid, L_basis).fit(vartheta - theta)
+
+    cR = cR*np.where(R_basis.modes[:, 2] != 0, bdry_ratio, 1)
+    cZ = cZ*np.where(Z_basis.modes[:, 2] != 0, bdry_ratio, 1)
+    cL = cL*np.where(L_basis.modes[:, 2] != 0, bdry_ratio, 1)
+
+    return cR, cZ, cL
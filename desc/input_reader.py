@@ -134,6 +134,8 @@ class InputReader:
                             help='Display detailed progress information')
         parser.add_argument('--vmec', metavar='vmec_path',
                             help='Path to VMEC data for comparison plot')
+        parser.add_argument('--vmec-init', metavar='vmec_path',
+                            help='Path to VMEC data to use as the initial guess')
         parser.add_argument('--gpu', '-g', action='store', nargs='?', default=False, const=True, metavar='gpuID',
                             help='Use GPU if available, and an optional device ID to use a specific GPU.'
                             + ' If no ID is given, default is to select the GPU with most available memory.'
@@ -180,6 +182,7 @@ class InputReader:
             'xtol': np.atleast_1d(1e-6),
             'gtol': np.atleast_1d(1e-6),
             'nfev': np.atleast_1d(None),
+            'precision': np.atleast_1d(int(os.environ.get('DESC_PRECISION', 64))),
             'optim_method': 'trf',
             'errr_mode': 'force',
             'bdry_mode': 'spectral',
@@ -192,6 +195,8 @@ class InputReader:
         }
 
         inputs['output_path'] = self.output_path
+        if self.args.vmec_init:
+            inputs['vmec_init'] = str(pathlib.Path(self.args.vmec_init).resolve())
 
         if self.args.quiet:
             inputs['verbose'] = 0
@@ -291,6 +296,9 @@ class InputReader:
             if match:
                 inputs['nfev'] = np.array(
                     [None if i == 0 else i for i in numbers]).astype(int)
+            match = re.search(r'precision', argument, re.IGNORECASE)
+            if match:
+                inputs['precision'] = np.array(numbers).astype(int)
 
             # continuation parameters
             match = re.search(r'bdry_ratio', argument, re.IGNORECASE)
@@ -436,7 +444,7 @@ class InputReader:
                 TextColors.FAIL + 'Fixed-boundary surface is not assigned' + TextColors.ENDC)
         arrs = ['Mpol', 'Ntor', 'delta_lm', 'Mnodes', 'Nnodes', 'bdry_ratio',
                 'pres_ratio', 'zeta_ratio', 'errr_ratio', 'pert_order',
-                'ftol', 'xtol', 'gtol', 'nfev']
+                'ftol', 'xtol', 'gtol', 'nfev', 'precision']
         arr_len = 0
         for a in arrs:
             arr_len = max(arr_len, len(inputs[a]))
@@ -447,6 +455,10 @@ class InputReader:
                 raise IOError(TextColors.FAIL +
                               'Continuation parameter arrays are not proper lengths' + TextColors.ENDC)
 
+        if not np.all(np.isin(inputs['precision'], [32, 64])):
+            raise IOError(TextColors.FAIL +
+                          'precision must be 32 or 64' + TextColors.ENDC)
+
         # unsupplied values
         if np.sum(inputs['Mnodes']) == 0:
             inputs['Mnodes'] = np.rint(1.5*inputs['Mpol']).astype(int)
@@ -523,6 +535,8 @@ class InputReader:
             ', '.join([str(i) for i in np.atleast_1d(inputs['gtol'])])))
         f.write('nfev = {} \n'.format(
             ', '.join([str(i) for i in np.atleast_1d(inputs['nfev'])])))
+        f.write('precision = {} \n'.format(
+            ', '.join([str(i) for i in np.atleast_1d(inputs['precision'])])))
 
         f.write('\n# solver methods \n')
         f.write('optim_method = {} \n'.format(inputs['optim_method']))
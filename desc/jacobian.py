@@ -1,7 +1,10 @@
+import os
 import numpy as np
+import concurrent.futures
 from abc import ABC, abstractmethod
+from scipy.sparse.linalg import LinearOperator
 
-from desc.backend import use_jax, put, TextColors
+from desc.backend import jnp, use_jax, TextColors
 
 if use_jax:
     import jax
@@ -69,19 +72,28 @@ class AutoDiffJacobian(Jacobian):
     """Computes jacobians using automatic differentiation with JAX
     """
 
-    def __init__(self, fun:callable, argnum:int=0, mode:str='fwd') -> None:
+    def __init__(self, fun:callable, argnum:int=0, mode:str='fwd',
+                 chunk_size=None) -> None:
         """Initializes an AutoDiffJacobian
 
         Parameters
         ----------
         fun : callable
             Function to be differentiated.
-        argnums : int, optional
-            Specifies which positional argument to differentiate with respect to
+        argnums : int or tuple of int, optional
+            Specifies which positional argument to differentiate with respect to.
+            If a tuple, the jacobian is with respect to all of the arguments,
+            flattened and concatenated in order, computed in a single pass.
         mode : str, optional
             Automatic differentiation mode.
             One of 'fwd' (forward mode), 'rev' (reverse mode), or 'grad' (gradient).
             Default = 'fwd'
+        chunk_size : int or str, optional
+            Number of columns of the jacobian computed at once in forward mode,
+            by pushing a chunk of tangent vectors through the function with vmap.
+            Peak memory scales with the chunk size instead of the number of columns.
+            If 'auto', the largest chunk that fits in half of the available memory
+            is used. Default = None, all columns at once with jacfwd
 
         Raises
         ------
@@ -94,6 +106,7 @@ class AutoDiffJacobian(Jacobian):
         """
         self._Jacobian__fun = fun
         self._Jacobian__argnum = argnum
+        self.chunk_size = chunk_size
         self.mode = mode
 
     def compute(self, *args):
@@ -109,10 +122,79 @@ class AutoDiffJacobian(Jacobian):
         -------
         J : ndarray of float, shape(len(f),len(x))
             df/dx, where f is the output of the function fun and x is the input
-            argument at position argnum.
+            argument at position argnum (or the concatenation of the flattened
+            arguments at the positions in argnum).
 
         """
-        return self.__compute(*args)
+        if self.__mode == 'fwd' and self.chunk_size is not None:
+            return self._compute_chunked_(*args)
+        J = self.__compute(*args)
+        if isinstance(self._Jacobian__argnum, tuple):
+            if self.__mode == 'grad':
+                return jnp.concatenate([jnp.ravel(Jk) for Jk in J])
+            return jnp.concatenate([jnp.reshape(Jk, Jk.shape[:Jk.ndim-np.ndim(args[k])] + (-1,))
+                                    for k, Jk in zip(self._Jacobian__argnum, J)], axis=-1)
+        return J
+
+    def _compute_chunked_(self, *args):
+        """Computes the jacobian in forward mode, a chunk of columns at a time"""
+        argnums = self._Jacobian__argnum
+        if not isinstance(argnums, tuple):
+            argnums = (argnums,)
+        shapes = [jnp.shape(args[k]) for k in argnums]
+        sizes = [int(np.prod(shape)) for shape in shapes]
+        splits = np.cumsum(sizes)[:-1]
+        f = jax.eval_shape(self._Jacobian__fun, *args)
+        m = int(np.prod(f.shape))
+        n = int(np.sum(sizes))
+
+        def fun_x(*x):
+            args_x = list(args)
+            for k, xk in zip(argnums, x):
+                args_x[k] = xk
+            return self._Jacobian__fun(*args_x)
+
+        def jvp(v):
+            tangents = tuple(jnp.reshape(vk, shape).astype(jnp.result_type(args[k])) for k, vk, shape
+                             in zip(argnums, jnp.split(v, splits), shapes))
+            return jnp.ravel(jax.jvp(fun_x, tuple(args[k] for k in argnums), tangents)[1])
+
+        chunk_size = self._get_chunk_size_(m, n, np.dtype(f.dtype).itemsize)
+        num_chunks = -(-n // chunk_size)
+
+        def jvp_chunk(start):
+            # rows of the identity for this chunk, past the end they are zero
+            V = jax.nn.one_hot(start + jnp.arange(chunk_size), n, dtype=f.dtype)
+            return jax.vmap(jvp)(V)
+
+        starts = jnp.arange(num_chunks)*chunk_size
+        J = jax.lax.map(jvp_chunk, starts).reshape((num_chunks*chunk_size, m))[:n].T
+        if isinstance(self._Jacobian__argnum, tuple):
+            return J.reshape(f.shape + (n,))
+        return J.reshape(f.shape + shapes[0])
+
+    def _get_chunk_size_(self, m:int, n:int, itemsize:int) -> int:
+        """Number of columns per chunk for a jacobian of shape (m,n)"""
+        if self.chunk_size == 'auto':
+            # each column holds the tangents of the output and the intermediates
+            memory = _available_memory() // 2
+            chunk_size = memory // (10*max(m, n)*itemsize)
+        else:
+            chunk_size = self.chunk_size
+        return int(max(1, min(n, chunk_size)))
+
+    @property
+    def chunk_size(self):
+        return self.__chunk_size
+
+    @chunk_size.setter
+    def chunk_size(self, chunk_size) -> None:
+        if chunk_size is not None and chunk_size != 'auto' and \
+                (not isinstance(chunk_size, (int, np.integer)) or chunk_size < 1):
+            raise ValueError(TextColors.FAIL +
+                             "chunk_size must be a positive integer, 'auto' or None"
+                             + TextColors.ENDC)
+        self.__chunk_size = chunk_size
 
     @property
     def mode(self) -> str:
@@ -133,23 +215,118 @@ class AutoDiffJacobian(Jacobian):
             self.__compute = jax.grad(self._Jacobian__fun, self._Jacobian__argnum)
 
 
+def _available_memory() -> int:
+    """Returns the available physical memory in bytes"""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES')*os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return 2**30
+
+
+class MatrixFreeJacobian(Jacobian):
+    """Computes jacobian-vector products using automatic differentiation with
+    JAX, without forming the jacobian matrix
+    """
+
+    def __init__(self, fun:callable, argnum:int=0) -> None:
+        """Initializes a MatrixFreeJacobian
+
+        Parameters
+        ----------
+        fun : callable
+            Function to be differentiated.
+        argnums : int, optional
+            Specifies which positional argument to differentiate with respect to
+
+        Returns
+        -------
+        None
+
+        """
+        self._Jacobian__fun = fun
+        self._Jacobian__argnum = argnum
+        self.__jvp = jax.jit(self._jvp_)
+        self.__vjp = jax.jit(self._vjp_)
+
+    def _fun_x_(self, args):
+        """Returns fun as a function of argument argnum only"""
+        argnum = self._Jacobian__argnum
+        return lambda x: self._Jacobian__fun(*args[:argnum], x, *args[argnum+1:])
+
+    def _jvp_(self, v, *args):
+        """Jacobian-vector product J*v (forward mode)"""
+        x = args[self._Jacobian__argnum]
+        return jax.jvp(self._fun_x_(args), (x,), (v,))[1]
+
+    def _vjp_(self, u, *args):
+        """Vector-jacobian product J^T*u (reverse mode)"""
+        x = args[self._Jacobian__argnum]
+        return jax.vjp(self._fun_x_(args), x)[1](u)[0]
+
+    def compute(self, *args):
+        """Computes the jacobian as a linear operator
+
+        Parameters
+        ----------
+        *args : list
+            Arguments of the objective function where the jacobian is to be
+            evaluated at.
+
+        Returns
+        -------
+        J : LinearOperator, shape(len(f),len(x))
+            df/dx, where f is the output of the function fun and x is the input
+            argument at position argnum. Products with J and J^T are computed
+            with jax.jvp and jax.vjp, respectively.
+
+        """
+        m = jax.eval_shape(self._Jacobian__fun, *args).size
+        n = np.size(args[self._Jacobian__argnum])
+        return LinearOperator((m, n), dtype=float,
+                              matvec=lambda v: np.asarray(
+                                  self.__jvp(np.ravel(v), *args)),
+                              rmatvec=lambda u: np.asarray(
+                                  self.__vjp(np.ravel(u), *args)))
+
+
 class FiniteDiffJacobian(Jacobian):
     """Computes jacobians using 2nd order centered finite differences
+
+    The perturbations of all of the columns are stacked into a single batch
+    of points, which is evaluated with one call to a vectorized function, or
+    split across a pool of processes. If the sparsity pattern of the jacobian
+    is known, columns that do not share a nonzero row are perturbed together
+    (grouped by a greedy coloring of the columns), so the number of function
+    evaluations is 2x the number of groups instead of 2x the number of columns.
     """
 
-    def __init__(self, fun:callable, argnum:int=0,
-                 rel_step:float=1e-3) -> None:
+    def __init__(self, fun:callable, argnum:int=0, rel_step:float=1e-3,
+                 vectorized:bool=False, processes:int=None, sparsity=None) -> None:
         """Initializes a FiniteDiffJacobian
 
         Parameters
         ----------
         fun : callable
             Function to be differentiated.
-        argnums : int, optional
-            Specifies which positional argument to differentiate with respect to
+        argnums : int or tuple of int, optional
+            Specifies which positional argument to differentiate with respect to.
+            If a tuple, the jacobian is with respect to all of the arguments,
+            flattened and concatenated in order.
         rel_step : float, optional
             Relative step size: dx = max(1, abs(x))*rel_step
             Default = 1e-3
+        vectorized : bool, optional
+            True if fun accepts a batch of points stacked along the first axis
+            of the argument at position argnum, and returns the outputs stacked
+            along the first axis. Default = False
+        processes : int, optional
+            number of processes to split the function evaluations across.
+            fun and the arguments must be picklable. The pool of processes is
+            started on the first call to compute and reused by later calls,
+            until close is called. Default = None, evaluate in this process
+        sparsity : ndarray or sparse matrix of bool, shape(len(f),len(x)), optional
+            sparsity pattern of the jacobian, True (or nonzero) where the
+            jacobian can be nonzero. Default = None, dense
 
         Returns
         -------
@@ -159,6 +336,72 @@ class FiniteDiffJacobian(Jacobian):
         self._Jacobian__fun = fun
         self._Jacobian__argnum = argnum
         self.rel_step = rel_step
+        self.vectorized = vectorized
+        self.__executor = None
+        self.processes = processes
+        self.sparsity = sparsity
+
+    def __del__(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down the pool of processes, if it was started"""
+        if getattr(self, '_FiniteDiffJacobian__executor', None) is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    @property
+    def processes(self) -> int:
+        return self.__processes
+
+    @processes.setter
+    def processes(self, processes:int) -> None:
+        self.close()
+        self.__processes = processes
+
+    @property
+    def sparsity(self):
+        return self.__sparsity
+
+    @sparsity.setter
+    def sparsity(self, sparsity) -> None:
+        if sparsity is not None:
+            if hasattr(sparsity, 'toarray'):
+                sparsity = sparsity.toarray()
+            sparsity = np.atleast_2d(sparsity).astype(bool)
+            self.__groups = self._color_columns_(sparsity)
+        else:
+            self.__groups = None
+        self.__sparsity = sparsity
+
+    @staticmethod
+    def _color_columns_(sparsity):
+        """Groups the columns of a sparsity pattern so that no two columns in
+        a group have a nonzero in the same row, with a greedy coloring
+
+        Parameters
+        ----------
+        sparsity : ndarray of bool, shape(m,n)
+            sparsity pattern of the jacobian
+
+        Returns
+        -------
+        groups : ndarray of int, shape(n,)
+            group of each column
+
+        """
+        groups = np.zeros((sparsity.shape[1],), dtype=int)
+        rows = []   # rows used by each group
+        for j in range(sparsity.shape[1]):
+            for k, used in enumerate(rows):
+                if not np.any(used & sparsity[:, j]):
+                    used |= sparsity[:, j]
+                    groups[j] = k
+                    break
+            else:
+                groups[j] = len(rows)
+                rows.append(sparsity[:, j].copy())
+        return groups
 
     def compute(self, *args):
         """Computes the jacobian matrix
@@ -173,31 +416,210 @@ class FiniteDiffJacobian(Jacobian):
         -------
         J : ndarray of float, shape(len(f),len(x))
             df/dx, where f is the output of the function fun and x is the input
-            argument at position argnum.
+            argument at position argnum (or the concatenation of the flattened
+            arguments at the positions in argnum).
 
         """
+        argnums = self._Jacobian__argnum
+        if not isinstance(argnums, tuple):
+            argnums = (argnums,)
         f0 = np.atleast_1d(self._Jacobian__fun(*args))
-        x0 = np.atleast_1d(args[self._Jacobian__argnum])
         m = f0.size
-        n = x0.size
-        J = np.zeros((m, n))
-        h = np.maximum(1.0, np.abs(x0))*self.rel_step
-        h_vecs = np.diag(np.atleast_1d(h))
-        for i in range(n):
-            x1 = x0 - h_vecs[i]
-            x2 = x0 + h_vecs[i]
-            dx = x2[i] - x1[i]
-            args1 = args[0:self._Jacobian__argnum] + (x1,) + args[self._Jacobian__argnum+1:]
-            args2 = args[0:self._Jacobian__argnum] + (x2,) + args[self._Jacobian__argnum+1:]
-            f1 = self._Jacobian__fun(*args1)
-            f2 = self._Jacobian__fun(*args2)
-            df = f2 - f1
-            dfdx = df / dx
-            J = put(J.T, i, dfdx.flatten()).T
+        J = []
+        offset = 0
+        for argnum in argnums:
+            x0 = np.atleast_1d(args[argnum]).astype(float)
+            n = x0.size
+            h = np.maximum(1.0, np.abs(x0))*self.rel_step
+
+            # each row of E is the perturbation of one group of columns
+            if self.__groups is None:
+                groups = np.arange(n)
+            else:
+                groups = np.unique(self.__groups[offset:offset+n], return_inverse=True)[1]
+            num_groups = np.max(groups) + 1
+            E = np.zeros((num_groups, n))
+            E[groups, np.arange(n)] = h
+            x1 = x0 - E
+            x2 = x0 + E
+            f = self._evaluate_(np.concatenate([x1, x2]), argnum, args).reshape((2*num_groups, m))
+            df = (f[num_groups:] - f[:num_groups])[groups].T
+            dx = (x2 - x1)[groups, np.arange(n)]
+            Jk = df / dx
+            if self.__sparsity is not None:
+                Jk = np.where(self.__sparsity[:, offset:offset+n], Jk, 0)
+            J.append(Jk)
+            offset += n
+        J = np.hstack(J)
         if m == 1:
             J = np.ravel(J)
         return J
 
+    def _evaluate_(self, X, argnum, args):
+        """Evaluates fun at each row of X in the argument at position argnum
+
+        Parameters
+        ----------
+        X : ndarray, shape(k,n)
+            points to evaluate at
+        argnum : int
+            position of the argument
+        args : tuple
+            other arguments of fun
+
+        Returns
+        -------
+        f : ndarray, shape(k,len(f))
+            output of fun at each point
+
+        """
+        if self.vectorized:
+            return np.asarray(self._Jacobian__fun(*args[:argnum], X, *args[argnum+1:]))
+        if self.__processes is not None and self.__processes > 1:
+            if self.__executor is None:
+                self.__executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.__processes)
+            chunks = np.array_split(X, min(self.__processes, X.shape[0]))
+            results = self.__executor.map(_evaluate_points, [self._Jacobian__fun]*len(chunks),
+                                          chunks, [argnum]*len(chunks), [args]*len(chunks))
+            return np.concatenate(list(results))
+        return _evaluate_points(self._Jacobian__fun, X, argnum, args)
+
+
+def _evaluate_points(fun, X, argnum, args):
+    """Evaluates fun at each row of X in the argument at position argnum"""
+    args = tuple(args)
+    return np.stack([np.ravel(fun(*args[:argnum], x, *args[argnum+1:])) for x in X])
+
+
+class AutoDiffHessianProduct():
+    """Computes second directional derivatives using nested forward mode
+    automatic differentiation (jvp of jvp) with JAX, without forming the
+    hessian tensor
+    """
+
+    def __init__(self, fun:callable, argnums:tuple=(0, 0)) -> None:
+        """Initializes an AutoDiffHessianProduct
+
+        Parameters
+        ----------
+        fun : callable
+            Function to be differentiated.
+        argnums : tuple of int, optional
+            Specifies which two positional arguments to differentiate with
+            respect to. They can be the same argument.
+
+        Returns
+        -------
+        None
+
+        """
+        self.fun = fun
+        self.argnums = argnums
+
+    def compute(self, u, v, *args):
+        """Computes the second derivative of fun along two directions
+
+        Parameters
+        ----------
+        u : ndarray
+            direction in the argument at position argnums[0]
+        v : ndarray
+            direction in the argument at position argnums[1]
+        *args : list
+            Arguments of the objective function where the derivative is to be
+            evaluated at.
+
+        Returns
+        -------
+        H : ndarray of float, shape(len(f),)
+            sum_ij d^2f/(da_i db_j) u_i v_j, where f is the output of the
+            function fun and a, b are the inputs at positions argnums.
+
+        """
+        i, j = self.argnums
+        args = list(args)
+        args[i] = jnp.asarray(args[i], dtype=float)
+        args[j] = jnp.asarray(args[j], dtype=float)
+        args = tuple(args)
+        u = jnp.asarray(u, dtype=float).reshape(args[i].shape)
+        v = jnp.asarray(v, dtype=float).reshape(args[j].shape)
+
+        def jvp_v(a):
+            args_a = args[:i] + (a,) + args[i+1:]
+            return jax.jvp(lambda b: self.fun(*args_a[:j], b, *args_a[j+1:]),
+                           (args_a[j],), (v,))[1]
+
+        return jax.jvp(jvp_v, (args[i],), (u,))[1]
+
+
+class FiniteDiffHessianProduct():
+    """Computes second directional derivatives using 2nd order centered
+    finite differences, without forming the hessian tensor
+    """
+
+    def __init__(self, fun:callable, argnums:tuple=(0, 0),
+                 rel_step:float=1e-3) -> None:
+        """Initializes a FiniteDiffHessianProduct
+
+        Parameters
+        ----------
+        fun : callable
+            Function to be differentiated.
+        argnums : tuple of int, optional
+            Specifies which two positional arguments to differentiate with
+            respect to. They can be the same argument.
+        rel_step : float, optional
+            Relative step size along each direction: dx = max(1, |x|)*rel_step
+            Default = 1e-3
+
+        Returns
+        -------
+        None
+
+        """
+        self.fun = fun
+        self.argnums = argnums
+        self.rel_step = rel_step
+
+    def compute(self, u, v, *args):
+        """Computes the second derivative of fun along two directions
+
+        Parameters
+        ----------
+        u : ndarray
+            direction in the argument at position argnums[0]
+        v : ndarray
+            direction in the argument at position argnums[1]
+        *args : list
+            Arguments of the objective function where the derivative is to be
+            evaluated at.
+
+        Returns
+        -------
+        H : ndarray of float, shape(len(f),)
+            sum_ij d^2f/(da_i db_j) u_i v_j, where f is the output of the
+            function fun and a, b are the inputs at positions argnums.
+
+        """
+        i, j = self.argnums
+        u = np.reshape(u, np.shape(args[i]))
+        v = np.reshape(v, np.shape(args[j]))
+        norm_u = np.linalg.norm(u)
+        norm_v = np.linalg.norm(v)
+        if norm_u == 0 or norm_v == 0:
+            return np.zeros_like(np.atleast_1d(self.fun(*args)), dtype=float)
+        hu = np.maximum(1.0, np.linalg.norm(args[i]))*self.rel_step/norm_u
+        hv = np.maximum(1.0, np.linalg.norm(args[j]))*self.rel_step/norm_v
+
+        def f(su, sv):
+            args1 = list(args)
+            args1[i] = args1[i] + su*hu*u
+            args1[j] = args1[j] + sv*hv*v
+            return np.atleast_1d(self.fun(*args1))
+
+        return (f(1, 1) - f(1, -1) - f(-1, 1) + f(-1, -1)) / (4*hu*hv)
+
 
 # these classes currently do not meet the Jacobian API -----------------------
 
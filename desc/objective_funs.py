@@ -1,6 +1,5 @@
 import numpy as np
 from abc import ABC, abstractmethod
-import matplotlib.pyplot
 
 from desc.backend import jnp, put, cross, dot, TextColors
 from desc.configuration import unpack_state
@@ -13,6 +12,19 @@ from desc.transform import Transform
 from desc.equilibrium_io import IOAble
 
 
+# quantities computed by the equilibrium objective of each error mode, used to
+# build Transforms with only the derivatives of R and Z that they need
+# (see desc.configuration.get_derivatives)
+EQUIL_QUANTITIES = {
+    'force': ['g', 'e_rho', 'e_theta', 'e_zeta', 'e^rho', 'e^theta', 'e^zeta',
+              'g^rr', 'g^vv', 'g^zz', 'g^vz', 'B^theta', 'B^zeta', 'B_rho_v',
+              'B_rho_z', 'B_theta_r', 'B_zeta_r', 'J^rho', 'J^theta', 'J^zeta'],
+    'accel': ['R', 'R_r', 'R_v', 'R_z', 'R_rr', 'R_rv', 'R_rz', 'R_vv', 'R_vz', 'R_zz',
+              'Z_r', 'Z_v', 'Z_z', 'Z_rr', 'Z_rv', 'Z_rz', 'Z_vv', 'Z_vz', 'Z_zz',
+              # limits at the magnetic axis
+              'R_rrv', 'R_rvv', 'R_rvz', 'R_rrvv', 'Z_rrv', 'Z_rvv', 'Z_rvz', 'Z_rrvv']}
+
+
 class ObjectiveFunction(IOAble,ABC):
 
     """Objective function used in the optimization of an Equilibrium
@@ -151,6 +163,9 @@ class ForceErrorNodes(ObjectiveFunction):
             errL0 = compute_lambda_err(cL, self.L_transform.basis)
             residual = jnp.concatenate([residual, errL0.flatten()/errr_ratio])
 
+        # the transforms may be single precision, the residual is returned in
+        # the precision of the state vector
+        residual = residual.astype(x.dtype)
         if self.scalar:
             residual = jnp.log1p(jnp.sum(residual**2))
         return residual
@@ -239,6 +254,9 @@ class AccelErrorSpectral(ObjectiveFunction):
             errL0 = compute_lambda_err(cL, self.L_transform.basis)
             residual = jnp.concatenate([residual, errL0.flatten()/errr_ratio])
 
+        # the transforms may be single precision, the residual is returned in
+        # the precision of the state vector
+        residual = residual.astype(x.dtype)
         if self.scalar:
             residual = jnp.log1p(jnp.sum(residual**2))
         return residual
@@ -420,24 +438,66 @@ def curve_self_intersects(x, y):
     return np.any(np.where(np.logical_and(a1*a2 < 0, a3*a4 < 0), True, False))
 
 
-def is_nested(cR, cZ, R_basis, Z_basis, L=10, M=361, zeta=0):
+def is_nested(cR, cZ, R_basis, Z_basis, L=10, M=None, zeta=None):
     """Checks that an equilibrium has properly nested flux surfaces
-        in a given toroidal plane
 
     Parameters
     ----------
-    cR : ndarray, shape(RZ_transform.num_modes,)
+    cR : ndarray, shape(R_basis.num_modes,)
         spectral coefficients of R
-    cZ : ndarray, shape(RZ_transform.num_modes,)
+    cZ : ndarray, shape(Z_basis.num_modes,)
         spectral coefficients of Z
-    basis : FourierZernikeBasis
-        spectral basis for R and Z
+    R_basis : FourierZernikeBasis
+        spectral basis for R
+    Z_basis : FourierZernikeBasis
+        spectral basis for Z
     L : int
         number of surfaces to check (Default value = 10)
     M : int
-        number of poloidal angles to use for the test (Default value = 361)
-    zeta : float
-        toroidal plane to check (Default value = 0)
+        number of poloidal angles to use for the test
+        (Default value = None, 4*M+1 for the poloidal resolution M of R_basis)
+    zeta : float or ndarray of float
+        toroidal plane(s) to check
+        (Default value = None, 2*N+1 planes over one field period)
+
+    Returns
+    -------
+    is_nested : bool
+        whether or not the surfaces are nested
+
+    """
+    NFP = R_basis.NFP
+    if M is None:
+        M = 4*R_basis.M+1
+    if zeta is None:
+        zeta = np.linspace(0, 2*np.pi/NFP, 2*R_basis.N+1, endpoint=False)
+    zeta = np.atleast_1d(zeta)
+    grid = LinearGrid(L=L, M=M, N=zeta.size, NFP=NFP,
+                      rho=np.linspace(1/L, 1, L), zeta=zeta)
+
+    R_r = jnp.matmul(R_basis.evaluate(grid.nodes, np.array([1, 0, 0])), cR)
+    R_v = jnp.matmul(R_basis.evaluate(grid.nodes, np.array([0, 1, 0])), cR)
+    Z_r = jnp.matmul(Z_basis.evaluate(grid.nodes, np.array([1, 0, 0])), cZ)
+    Z_v = jnp.matmul(Z_basis.evaluate(grid.nodes, np.array([0, 1, 0])), cZ)
+    return bool(jacobian_sign_is_constant(R_r, R_v, Z_r, Z_v))
+
+
+def compute_nested(cR, cZ, R_transform, Z_transform):
+    """Checks that flux surfaces are nested at the nodes of a transform.
+    Compatible with JIT, so it can be called with the transforms of the
+    objective function at every iteration.
+
+    Parameters
+    ----------
+    cR : ndarray, shape(R_transform.num_modes,)
+        spectral coefficients of R
+    cZ : ndarray, shape(Z_transform.num_modes,)
+        spectral coefficients of Z
+    R_transform : Transform
+        transforms cR to real space, with first derivatives.
+        Its grid should not contain the magnetic axis, where the jacobian is 0
+    Z_transform : Transform
+        transforms cZ to real space, with first derivatives
 
     Returns
     -------
@@ -445,17 +505,31 @@ def is_nested(cR, cZ, R_basis, Z_basis, L=10, M=361, zeta=0):
         whether or not the surfaces are nested
 
     """
-    grid = LinearGrid(L=L, M=M, N=1, NFP=R_basis.NFP, endpoint=True)
-    R_transf = Transform(grid, R_basis)
-    Z_transf = Transform(grid, Z_basis)
+    R_r = R_transform.transform(cR, 1, 0, 0)
+    R_v = R_transform.transform(cR, 0, 1, 0)
+    Z_r = Z_transform.transform(cZ, 1, 0, 0)
+    Z_v = Z_transform.transform(cZ, 0, 1, 0)
+    return jacobian_sign_is_constant(R_r, R_v, Z_r, Z_v)
+
 
-    Rs = R_transf.transform(cR).reshape((L, -1), order='F')
-    Zs = Z_transf.transform(cZ).reshape((L, -1), order='F')
+def jacobian_sign_is_constant(R_r, R_v, Z_r, Z_v):
+    """Checks that the jacobian of the map (rho,theta) -> (R,Z) in each
+    toroidal plane has the same sign everywhere. It changes sign wherever
+    flux surfaces intersect each other or themselves.
+
+    Parameters
+    ----------
+    R_r, R_v, Z_r, Z_v : ndarray, shape(N_nodes,)
+        radial and poloidal derivatives of R and Z, excluding the magnetic axis
 
-    p = [matplotlib.path.Path(np.stack([R, Z]).T, closed=True) for R, Z in zip(Rs, Zs)]
-    nested = np.all([p[i+1].contains_path(p[i]) for i in range(len(p)-1)])
-    intersects = np.any([curve_self_intersects(R, Z) for R, Z in zip(Rs, Zs)])
-    return nested and not intersects
+    Returns
+    -------
+    is_nested : bool
+        whether or not the surfaces are nested
+
+    """
+    jacobian = R_v*Z_r - R_r*Z_v
+    return jnp.logical_or(jnp.all(jacobian > 0), jnp.all(jacobian < 0))
 
 
 def compute_force_error_nodes(cR, cZ, cP, cI, Psi_lcfs, R_transform,
@@ -503,14 +577,12 @@ def compute_force_error_nodes(cR, cZ, cP, cI, Psi_lcfs, R_transform,
     # compute fields components
     coord_der = compute_coordinate_derivatives(
         cR, cZ, R_transform, Z_transform, zeta_ratio)
-    cov_basis = compute_covariant_basis(
-        coord_der, R_transform.grid.axis, R_transform.derivs)
-    jacobian = compute_jacobian(
-        coord_der, cov_basis, R_transform.grid.axis, R_transform.derivs)
+    cov_basis = compute_covariant_basis(coord_der)
+    jacobian = compute_jacobian(coord_der, cov_basis)
     con_basis = compute_contravariant_basis(
         coord_der, cov_basis, jacobian, R_transform.grid.axis)
     magnetic_field = compute_magnetic_field(
-        cov_basis, jacobian, cI, Psi_lcfs, I_transform, R_transform.derivs)
+        cov_basis, jacobian, cI, Psi_lcfs, I_transform)
     plasma_current = compute_plasma_current(
         coord_der, cov_basis, jacobian, magnetic_field, cI, I_transform)
 
@@ -603,14 +675,12 @@ def compute_force_error_RphiZ(cR, cZ, cP, cI, Psi_lcfs, R_transform,
 
     # compute fields components
     coord_der = compute_coordinate_derivatives(cR, cZ, R_transform, Z_transform)
-    cov_basis = compute_covariant_basis(
-        coord_der, R_transform.grid.axis, R_transform.derivs)
-    jacobian = compute_jacobian(
-        coord_der, cov_basis, R_transform.grid.axis, R_transform.derivs)
+    cov_basis = compute_covariant_basis(coord_der)
+    jacobian = compute_jacobian(coord_der, cov_basis)
     con_basis = compute_contravariant_basis(
         coord_der, cov_basis, jacobian, R_transform.grid.axis)
     magnetic_field = compute_magnetic_field(
-        cov_basis, jacobian, cI, Psi_lcfs, I_transform, R_transform.derivs)
+        cov_basis, jacobian, cI, Psi_lcfs, I_transform)
     plasma_current = compute_plasma_current(
         coord_der, cov_basis, jacobian, magnetic_field, cI, I_transform)
 
@@ -806,12 +876,10 @@ def compute_qs_error_spectral(cR, cZ, cP, cI, Psi_lcfs, R_transform,
     iota = I_transform.transform(cI, 0)
 
     coord_der = compute_coordinate_derivatives(cR, cZ, R_transform, Z_transform)
-    cov_basis = compute_covariant_basis(
-        coord_der, R_transform.grid.axis, R_transform.derivs)
-    jacobian = compute_jacobian(
-        coord_der, cov_basis, R_transform.grid.axis, R_transform.derivs)
+    cov_basis = compute_covariant_basis(coord_der)
+    jacobian = compute_jacobian(coord_der, cov_basis)
     magnetic_field = compute_magnetic_field(
-        cov_basis, jacobian, cI, Psi_lcfs, I_transform, R_transform.derivs)
+        cov_basis, jacobian, cI, Psi_lcfs, I_transform)
     B_mag = compute_magnetic_field_magnitude(
         cov_basis, magnetic_field, cI, I_transform)
 
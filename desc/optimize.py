@@ -0,0 +1,162 @@
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+from desc.backend import jnp, jit, vmap, solve_triangular, TextColors
+
+
+def _lm_step_single_(J, f, lam):
+    """Computes a Levenberg-Marquardt step for a single problem
+
+    The damped least squares problem is solved by QR of the stacked system
+    [J; sqrt(lam)*D], rather than by the normal equations, which would square
+    the condition number of J.
+
+    Parameters
+    ----------
+    J : ndarray, shape(m,n)
+        jacobian matrix
+    f : ndarray, shape(m,)
+        residual vector
+    lam : float
+        damping parameter
+
+    Returns
+    -------
+    dx : ndarray, shape(n,)
+        step minimizing ||f + J*dx||^2 + lam*||D*dx||^2
+    pred : float
+        predicted reduction of the cost 1/2*||f||^2
+    gnorm : float
+        infinity norm of the gradient J^T*f
+
+    """
+    g = jnp.dot(J.T, f)
+    # scale the damping by the diagonal of J^T*J (Marquardt's scaling)
+    d = jnp.maximum(jnp.sum(J**2, axis=0), 1e-12)
+    A = jnp.concatenate([J, jnp.diag(jnp.sqrt(lam*d))])
+    b = jnp.concatenate([f, jnp.zeros((J.shape[1],), dtype=f.dtype)])
+    Q, R = jnp.linalg.qr(A)
+    dx = -solve_triangular(R, jnp.dot(Q.T, b), lower=False)
+    Jdx = jnp.dot(J, dx)
+    pred = -(jnp.dot(g, dx) + 0.5*jnp.dot(Jdx, Jdx))
+    gnorm = jnp.max(jnp.abs(g))
+    return dx, pred, gnorm
+
+
+# batched Levenberg-Marquardt steps, for J of shape(B,m,n), f of shape(B,m)
+# and lam of shape(B,)
+_lm_step_ = jit(vmap(_lm_step_single_))
+
+
+def lsq_lm_batch(fun, jac, x0, args=(), ftol=1e-8, xtol=1e-8, gtol=1e-8,
+                 max_nfev=None, verbose=0):
+    """Solves a batch of independent nonlinear least squares problems
+    min 1/2*||f_b(x_b)||^2 with a Levenberg-Marquardt method
+
+    All problems of the batch are stepped together, so fun and jac can be
+    single compiled (eg vmapped) functions. Each problem has its own damping
+    parameter and convergence status, and converged problems are no longer
+    updated.
+
+    Parameters
+    ----------
+    fun : callable
+        batched residual function, fun(x, *args) -> f of shape(B,m)
+        for x of shape(B,n)
+    jac : callable
+        batched jacobian function, jac(x, *args) -> J of shape(B,m,n)
+    x0 : ndarray, shape(B,n)
+        initial guesses
+    args : tuple
+        additional arguments passed to fun and jac
+    ftol : float
+        tolerance on the relative reduction of the cost
+    xtol : float
+        tolerance on the relative step size
+    gtol : float
+        tolerance on the infinity norm of the gradient
+    max_nfev : int
+        maximum number of function evaluations (Default = 100*n)
+    verbose : int
+        level of output
+
+    Returns
+    -------
+    res : OptimizeResult
+        with fields x (shape(B,n)), fun (shape(B,m)), jac (shape(B,m,n)),
+        cost (shape(B,)), status (shape(B,)), success (shape(B,)), nfev, njev
+        and message. The status of each problem is
+        0 if the maximum number of function evaluations was reached,
+        1 for gtol, 2 for ftol, or 3 for xtol convergence.
+
+    """
+    x = jnp.atleast_2d(jnp.asarray(x0, dtype=float))
+    B, n = x.shape
+    if max_nfev is None:
+        max_nfev = 100*n
+
+    f = fun(x, *args)
+    J = jac(x, *args)
+    cost = 0.5*np.sum(np.asarray(f)**2, axis=1)
+    nfev = 1
+    njev = 1
+
+    lam = np.full((B,), 1e-3)
+    nu = np.full((B,), 2.0)
+    status = np.full((B,), -1)
+
+    while nfev < max_nfev:
+        dx, pred, gnorm = [np.asarray(y) for y in _lm_step_(J, f, jnp.asarray(lam))]
+        status = np.where((status < 0) & (gnorm <= gtol), 1, status)
+        active = status < 0
+        if not np.any(active):
+            break
+
+        # converged problems are not stepped
+        x_new = x + np.where(active[:, np.newaxis], dx, 0)
+        f_new = fun(x_new, *args)
+        nfev += 1
+        cost_new = 0.5*np.sum(np.asarray(f_new)**2, axis=1)
+
+        actual = cost - cost_new
+        ratio = np.where(pred > 0, actual/np.where(pred > 0, pred, 1), -1)
+        accept = active & (ratio > 1e-4)
+
+        # Nielsen's update of the damping parameter, only for unconverged problems
+        lam = np.where(accept, lam*np.maximum(1/3, 1-(2*ratio-1)**3),
+                       np.where(active, lam*nu, lam))
+        nu = np.where(accept, 2.0, np.where(active, 2*nu, nu))
+
+        x_norm = np.linalg.norm(np.asarray(x), axis=1)
+        dx_norm = np.linalg.norm(dx, axis=1)
+        status = np.where(accept & (actual <= ftol*cost), 2, status)
+        # rejected steps shrink with the growing damping, so the step size
+        # condition is checked on every trial step
+        status = np.where(active & (status < 0) & (dx_norm <= xtol*(xtol + x_norm)),
+                          3, status)
+
+        x = jnp.where(accept[:, np.newaxis], x_new, x)
+        f = jnp.where(accept[:, np.newaxis], f_new, f)
+        cost = np.where(accept, cost_new, cost)
+
+        if verbose > 1:
+            print('nfev: {:4d}  cost: {}  converged: {}/{}'.format(
+                nfev, np.array2string(cost, precision=3), np.sum(status > 0), B))
+
+        if np.any(accept):
+            J = jac(x, *args)
+            njev += 1
+
+    status = np.where(status < 0, 0, status)
+    messages = {0: 'maximum number of function evaluations exceeded',
+                1: '`gtol` termination condition is satisfied',
+                2: '`ftol` termination condition is satisfied',
+                3: '`xtol` termination condition is satisfied'}
+    message = [messages[s] for s in status]
+    if verbose > 0:
+        print(TextColors.OKBLUE + '{}/{} problems converged in {} function evaluations'.format(
+            np.sum(status > 0), B, nfev) + TextColors.ENDC)
+
+    return OptimizeResult(x=np.asarray(x), fun=np.asarray(f), jac=np.asarray(J),
+                          cost=cost, status=status, success=status > 0,
+                          nfev=nfev, njev=njev, message=message)
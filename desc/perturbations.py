@@ -1,18 +1,34 @@
 import numpy as np
 import time
+from scipy.sparse.linalg import LinearOperator, lsmr
 
-from desc.backend import use_jax, Timer
-from desc.jacobian import AutoDiffJacobian, FiniteDiffJacobian
+from desc.backend import jnp, put, use_jax, Timer
+from desc.jacobian import AutoDiffJacobian, FiniteDiffJacobian, MatrixFreeJacobian
+from desc.jacobian import AutoDiffHessianProduct, FiniteDiffHessianProduct
 
 if use_jax:
     jac = AutoDiffJacobian
+    hess = AutoDiffHessianProduct
 else:
     jac = FiniteDiffJacobian
+    hess = FiniteDiffHessianProduct
 
 
-def perturb_continuation_params(x, equil_obj, deltas, args, pert_order=1, verbose=False, timer=None):
+def perturb_continuation_params(x, equil_obj, deltas, args, pert_order=1, verbose=False, timer=None,
+                                Jx=None, Jx_svd=None, matrix_free=False, processes=None):
     """perturbs an equilibrium wrt the continuation parameters
 
+    All of the linear solves with df/dx use a single SVD of df/dx. If the
+    jacobian at x is already known (eg from the last iteration of the
+    optimizer) it can be passed in to avoid recomputing it, as well as its SVD.
+    If Jx is a LinearOperator, or matrix_free is True, the linear solves are
+    done iteratively with LSMR using only products with df/dx, so neither
+    df/dx nor its SVD is formed. Singular values of df/dx below 1e-6 times the
+    largest are then not truncated exactly, so the two give slightly different
+    steps when df/dx is close to singular. The second order terms are computed as second directional derivatives
+    along the first order step and the changes in the parameters, so no
+    array larger than df/dx is formed.
+
     Parameters
     ----------
     x : ndarray
@@ -29,6 +45,18 @@ def perturb_continuation_params(x, equil_obj, deltas, args, pert_order=1, verbos
          level of output to display (Default value = False)
     timer : Timer
          Timer object (Default value = None)
+    Jx : ndarray or LinearOperator, optional
+         jacobian of equil_obj wrt x at x, shape(dimF,dimX). If None it is computed.
+    Jx_svd : tuple of ndarray, optional
+         reduced SVD (u, s, vt) of Jx, such as from
+         ``np.linalg.svd(Jx, full_matrices=False)``. If given, Jx is not needed.
+    matrix_free : bool, optional
+         if True and Jx is not given, df/dx is computed as a LinearOperator with
+         ``MatrixFreeJacobian`` (requires JAX, otherwise df/dx is formed).
+         Default = False
+    processes : int, optional
+         number of processes to split the finite difference jacobians across,
+         when JAX is not available. Default = None, a single process
 
     Returns
     -------
@@ -41,10 +69,10 @@ def perturb_continuation_params(x, equil_obj, deltas, args, pert_order=1, verbos
 
     delta_strings = ['boundary', 'pressure', 'zeta'] if len(deltas) == 3 else [
         None]*len(deltas)
+    jac_kwargs = {} if use_jax else {'processes': processes}
     f = equil_obj(x, *args)
     dimF = len(f)
     dimX = len(x)
-    dimC = 1
     if timer is None:
         timer = Timer()
     timer.start('Total perturbation')
@@ -53,72 +81,91 @@ def perturb_continuation_params(x, equil_obj, deltas, args, pert_order=1, verbos
     if pert_order >= 1:
 
         # partial derivatives wrt x
-        timer.start('df/dx computation')
-        obj_jac_x = jac(equil_obj, argnum=0).compute
-        Jx = obj_jac_x(x, *args).reshape((dimF, dimX))
-        timer.stop('df/dx computation')
+        if Jx is None and Jx_svd is None:
+            timer.start('df/dx computation')
+            if matrix_free and use_jax:
+                Jx = MatrixFreeJacobian(equil_obj, argnum=0).compute(x, *args)
+            else:
+                obj_jac_x = jac(equil_obj, argnum=0, **jac_kwargs).compute
+                Jx = obj_jac_x(x, *args).reshape((dimF, dimX))
+            timer.stop('df/dx computation')
+            if verbose > 1:
+                timer.disp('df/dx computation')
         RHS = f
-        if verbose > 1:
-            timer.disp('df/dx computation')
 
-        # partial derivatives wrt c
-        for i in range(deltas.size):
-            if deltas[i] != 0:
-                if verbose > 1:
-                    print("Perturbing {}".format(delta_strings[i]))
-                timer.start('df/dc computation ({})'.format(delta_strings[i]))
-                obj_jac_c = jac(equil_obj, argnum=6+i).compute
-                Jc = obj_jac_c(x, *args).reshape((dimF, dimC))
-                timer.stop("df/dc computation ({})".format(delta_strings[i]))
-                RHS += np.tensordot(Jc, np.atleast_1d(deltas[i]), axes=1)
-                if verbose > 1:
-                    timer.disp(
-                        "df/dc computation ({})".format(delta_strings[i]))
+        if isinstance(Jx, LinearOperator):
+            # least squares solutions with df/dx from products with it and its
+            # transpose. conlim only stops the iterations once the estimated
+            # condition number exceeds 1e6, it is not a spectral cutoff, so this
+            # only approximates the truncated SVD below for ill-conditioned df/dx.
+            # The default limit of min(Jx.shape) iterations is too few to converge
+            # once round-off breaks the orthogonality of the Krylov basis
+            def Jxi(b):
+                return lsmr(Jx, b, atol=1e-10, btol=1e-10, conlim=1e6,
+                            maxiter=10*min(Jx.shape))[0]
+        else:
+            # pseudo-inverse of df/dx from a single factorization
+            timer.start('df/dx factorization')
+            if Jx_svd is None:
+                Jx_svd = np.linalg.svd(Jx, full_matrices=False)
+            u, s, vt = Jx_svd
+            large = s > 1e-6*np.max(s)
+            Jx_pinv = np.dot(vt[large].T / s[large], u[:, large].T)
+            timer.stop('df/dx factorization')
+            if verbose > 1:
+                timer.disp('df/dx factorization')
+
+            def Jxi(b):
+                return np.dot(Jx_pinv, b)
+
+        # partial derivatives wrt all of the changed parameters, in one pass
+        idx = np.nonzero(np.asarray(deltas))[0]
+        if idx.size:
+            if verbose > 1:
+                print("Perturbing {}".format(', '.join(str(delta_strings[i]) for i in idx)))
+            timer.start('df/dc computation')
+            obj_jac_c = jac(equil_obj, argnum=tuple(6+i for i in idx), **jac_kwargs).compute
+            Jc = obj_jac_c(x, *args).reshape((dimF, idx.size))
+            timer.stop('df/dc computation')
+            RHS += np.dot(Jc, np.asarray(deltas)[idx])
+            if verbose > 1:
+                timer.disp('df/dc computation')
 
     # 2nd order
     if pert_order >= 2:
 
-        # partial derivatives wrt x
-        Jxi = np.linalg.pinv(Jx, rcond=1e-6)
+        # partial derivatives wrt x, along the first order step
         timer.start("df/dxx computation")
-        obj_jac_xx = jac(jac(equil_obj, argnum=0).compute, argnum=0).compute
-        Jxx = obj_jac_xx(x, *args).reshape((dimF, dimX, dimX))
+        dx1 = Jxi(RHS)
+        RHS += 0.5 * hess(equil_obj, argnums=(0, 0)).compute(dx1, dx1, x, *args)
         timer.stop("df/dxx computation")
-        RHS += 0.5 * np.tensordot(Jxx, np.tensordot(np.tensordot(Jxi, RHS, axes=1),
-                                                    np.tensordot(RHS.T, Jxi.T, axes=1), axes=0), axes=2)
         if verbose > 1:
             timer.disp("df/dxx computation")
 
-        # partial derivatives wrt c
+        # partial derivatives wrt c, along the change in c
         for i in range(deltas.size):
             if deltas[i] != 0:
                 if verbose > 1:
                     print("Perturbing {}".format(delta_strings[i]))
                 timer.start("df/dcc computation ({})".format(delta_strings[i]))
-                obj_jac_cc = jac(
-                    jac(equil_obj, argnum=6+i).compute, argnum=6+i).compute
-                Jcc = obj_jac_cc(x, *args).reshape((dimF, dimC, dimC))
+                dc = np.atleast_1d(deltas[i])
+                RHS += 0.5 * hess(equil_obj, argnums=(6+i, 6+i)).compute(dc, dc, x, *args)
                 timer.stop("df/dcc computation ({})".format(delta_strings[i]))
-                RHS += 0.5 * np.tensordot(Jcc, np.tensordot(np.atleast_1d(deltas[i]),
-                                                            np.atleast_1d(deltas[i]), axes=0), axes=2)
                 if verbose > 1:
                     timer.disp(
                         "df/dcc computation ({})".format(delta_strings[i]))
 
                 timer.start("df/dxc computation ({})".format(delta_strings[i]))
-                obj_jac_xc = jac(
-                    jac(equil_obj, argnum=0).compute, argnum=6+i).compute
-                Jxc = obj_jac_xc(x, *args).reshape((dimF, dimX, dimC))
+                RHS -= hess(equil_obj, argnums=(0, 6+i)).compute(
+                    Jxi(RHS), dc, x, *args)
                 timer.stop("df/dxc computation ({})".format(delta_strings[i]))
-                RHS -= np.tensordot(Jxc, np.tensordot(Jxi, np.tensordot(RHS, np.atleast_1d(deltas[i]),
-                                                                        axes=0), axes=1), axes=2)
                 if verbose > 1:
                     timer.disp(
                         "df/dxc computation ({})".format(delta_strings[i]))
 
     # perturbation
     if pert_order > 0:
-        dx = -np.linalg.lstsq(Jx, RHS, rcond=1e-6)[0]
+        dx = -Jxi(RHS)
     else:
         dx = np.zeros_like(x)
     timer.stop('Total perturbation')
@@ -128,7 +175,7 @@ def perturb_continuation_params(x, equil_obj, deltas, args, pert_order=1, verbos
 
 
 def get_system_derivatives(equil_obj, args, arg_dict, pert_order=1, verbose=False):
-    """computes Jacobian and Hessian arrays
+    """computes Jacobian arrays and products with the Hessians
 
     Parameters
     ----------
@@ -149,16 +196,21 @@ def get_system_derivatives(equil_obj, args, arg_dict, pert_order=1, verbose=Fals
     Jx : ndarray
         jacobian wrt to state vector
     Jc : ndarray
-        jacobian wrt to other parameters specified in arg_dict
-    Jxx : ndarray
-        hessian wrt to state vector.
-        Only calculated if pert_order > 1
-    Jcc : ndarray
-        hessian wrt to other parameters specified in arg_dict.
-        Only calculated if pert_order > 1
-    Jxc : ndarray
-        hessian wrt to state vector and other parameters.
-        Only calculated if pert_order > 1
+        jacobian wrt to other parameters specified in arg_dict, computed for
+        all of the arguments in a single pass
+    Jxx : callable
+        Jxx(u, v) is the product of the hessian wrt to state vector with the
+        directions u and v, shape(dimF,). The hessian is not formed.
+        Only returned if pert_order > 1
+    Jcc : callable
+        Jcc(u, v) is the product of the hessian wrt to the other parameters
+        specified in arg_dict (concatenated, in the same order as the columns
+        of Jc) with the directions u and v.
+        Only returned if pert_order > 1
+    Jxc : callable
+        Jxc(u, v) is the product of the hessian wrt to the state vector and
+        the other parameters with the directions u (in x) and v (in c).
+        Only returned if pert_order > 1
 
     """
 
@@ -184,58 +236,41 @@ def get_system_derivatives(equil_obj, args, arg_dict, pert_order=1, verbose=Fals
         if verbose > 1:
             print("df/dx computation time: {} s".format(t1-t0))
 
-        # partial derivatives wrt c
-        flag = True
-        for i in arg_idx:
-            dimC = args[i].size
+        # partial derivatives wrt c, all of the arguments in one pass
+        if len(arg_idx):
             t0 = time.perf_counter()
-            obj_jac_c = jac(equil_obj, argnum=i).compute
-            Jc_i = obj_jac_c(*args).reshape((dimF, dimC))
-            Jc_i = Jc_i[:, arg_dict[i]]
+            obj_jac_c = jac(equil_obj, argnum=tuple(arg_idx)).compute
+            Jc = obj_jac_c(*args).reshape((dimF, -1))
+            sizes = [np.size(args[i]) for i in arg_idx]
+            offsets = np.cumsum([0] + sizes[:-1])
+            Jc = Jc[:, np.concatenate([offset + np.arange(size)[arg_dict[i]] for i, size,
+                                       offset in zip(arg_idx, sizes, offsets)])]
             t1 = time.perf_counter()
             if verbose > 1:
                 print("df/dc computation time: {} s".format(t1-t0))
-            if flag:
-                Jc = Jc_i
-                flag = False
-            else:
-                Jc = np.concatenate((Jc, Jc_i), axis=1)
 
     # 2nd order
     if pert_order >= 2:
 
-        # partial derivatives wrt x
-        t0 = time.perf_counter()
-        obj_jac_xx = jac(jac(equil_obj, argnum=0).compute, argnum=0).compute
-        Jxx = obj_jac_xx(*args).reshape((dimF, dimX, dimX))
-        t1 = time.perf_counter()
-        if verbose > 1:
-            print("df/dxx computation time: {} s".format(t1-t0))
-
-        # partial derivatives wrt c
-        flag = True
-        for i in arg_idx:
-            dimC = args[i].size
-            t0 = time.perf_counter()
-            obj_jac_cc = jac(jac(equil_obj, argnum=i).compute, argnum=i).compute
-            Jcc_i = obj_jac_cc(*args).reshape((dimF, dimC, dimC))
-            Jcc_i = Jcc_i[:, arg_dict[i], arg_dict[i]]
-            t1 = time.perf_counter()
-            if verbose > 1:
-                print("df/dcc computation time: {} s".format(t1-t0))
-            obj_jac_xc = jac(jac(equil_obj, argnum=0).compute, argnum=i).compute
-            Jxc_i = obj_jac_xc(*args).reshape((dimF, dimX, dimC))
-            Jxc_i = Jxc_i[:, :, arg_dict[i]]
-            t2 = time.perf_counter()
-            if verbose > 1:
-                print("df/dxc computation time: {} s".format(t2-t1))
-            if flag:
-                Jcc = Jcc_i
-                Jxc = Jxc_i
-                flag = False
-            else:
-                Jcc = np.concatenate((Jcc, Jcc_i), axis=2)
-                Jxc = np.concatenate((Jxc, Jxc_i), axis=2)
+        # products with the hessians along given directions, as functions of
+        # the state vector and the parameters in arg_dict concatenated
+        c = np.concatenate([np.atleast_1d(args[i]).flatten()[arg_dict[i]]
+                            for i in arg_idx])
+
+        def fun_xc(x, c):
+            args_xc = list(args)
+            args_xc[0] = x
+            k = 0
+            for i in arg_idx:
+                arg = jnp.array(args[i], dtype=float).flatten()
+                n = np.arange(arg.size)[arg_dict[i]].size
+                args_xc[i] = put(arg, arg_dict[i], c[k:k+n]).reshape(np.shape(args[i]))
+                k += n
+            return equil_obj(*args_xc)
+
+        Jxx = lambda u, v: hess(fun_xc, argnums=(0, 0)).compute(u, v, args[0], c)
+        Jcc = lambda u, v: hess(fun_xc, argnums=(1, 1)).compute(u, v, args[0], c)
+        Jxc = lambda u, v: hess(fun_xc, argnums=(0, 1)).compute(u, v, args[0], c)
 
     t1 = time.perf_counter()
     if verbose > 1:
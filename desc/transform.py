@@ -1,13 +1,181 @@
 import numpy as np
 import functools
+import warnings
+import hashlib
+import os
+from collections import OrderedDict
 from itertools import permutations, combinations_with_replacement
 
-from desc.backend import jnp, conditional_decorator, jit, use_jax, TextColors, equals
+from desc.backend import jnp, conditional_decorator, jit, use_jax, TextColors, equals, put, opsindex
 from desc.grid import Grid
 from desc.basis import Basis
 from desc.equilibrium_io import IOAble
 
 
+# derivatives of R and Z needed for the force balance equations, and for the
+# quasi-symmetry triple product (or the limits at the magnetic axis)
+COORDINATE_DERIVATIVES = {
+    'force': np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
+                       [2, 0, 0], [1, 1, 0], [1, 0, 1], [0, 2, 0],
+                       [0, 1, 1], [0, 0, 2]]),
+    'qs': np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
+                    [2, 0, 0], [1, 1, 0], [1, 0, 1], [0, 2, 0],
+                    [0, 1, 1], [0, 0, 2], [3, 0, 0], [2, 1, 0],
+                    [2, 0, 1], [1, 2, 0], [1, 1, 1], [1, 0, 2],
+                    [0, 3, 0], [0, 2, 1], [0, 1, 2], [0, 0, 3],
+                    [2, 2, 0]])}
+
+
+class TransformCache():
+    """Content-addressed cache of transform matrices
+
+    Matrices are keyed on a hash of the basis type, NFP, basis modes, node
+    coordinates and derivative orders (or rcond for pseudo-inverses), so
+    Transforms with identical grids and bases share the same arrays.
+    Recently used matrices are kept in memory up to a total size limit, and
+    optionally saved to a directory as .npy files, which are memory-mapped
+    when loaded and can be shared between processes.
+
+    The default cache used by all Transforms is ``desc.transform.transform_cache``.
+    Its size (in MB, Default = 1024) and directory (Default = None, no disk
+    cache) can be set with the environment variables
+    ``DESC_TRANSFORM_CACHE_MB`` and ``DESC_TRANSFORM_CACHE_DIR``.
+
+    """
+
+    def __init__(self, max_bytes=2**30, path=None) -> None:
+        """Initializes a TransformCache
+
+        Parameters
+        ----------
+        max_bytes : int
+            maximum total size of the matrices kept in memory
+        path : str or path-like
+            directory of the on-disk cache. If None, only the memory cache is used.
+
+        Returns
+        -------
+        None
+
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._arrays = OrderedDict()
+        self._nbytes = 0
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def key(*args) -> str:
+        """Computes the cache key of a matrix
+
+        Parameters
+        ----------
+        args : tuple
+            arrays and other hashable descriptors of the matrix
+
+        Returns
+        -------
+        key : str
+            hex digest of the inputs
+
+        """
+        h = hashlib.sha1()
+        for arg in args:
+            if isinstance(arg, np.ndarray):
+                arg = np.ascontiguousarray(arg)
+                h.update(str((arg.dtype, arg.shape)).encode())
+                h.update(arg.tobytes())
+            else:
+                h.update(repr(arg).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Gets a matrix from the cache
+
+        Parameters
+        ----------
+        key : str
+            cache key
+
+        Returns
+        -------
+        A : ndarray or None
+            the cached matrix, or None if it is not in the cache
+
+        """
+        if key in self._arrays:
+            self._arrays.move_to_end(key)
+            self.hits += 1
+            return self._arrays[key]
+        if self.path is not None:
+            fname = os.path.join(self.path, key + '.npy')
+            if os.path.exists(fname):
+                A = np.load(fname, mmap_mode='r')
+                self._add_(key, A)
+                self.hits += 1
+                return A
+        self.misses += 1
+        return None
+
+    def put(self, key, A) -> None:
+        """Adds a matrix to the cache
+
+        Parameters
+        ----------
+        key : str
+            cache key
+        A : ndarray
+            matrix to store
+
+        Returns
+        -------
+        None
+
+        """
+        A = np.asarray(A)
+        A.setflags(write=False)
+        self._add_(key, A)
+        if self.path is not None:
+            fname = os.path.join(self.path, key + '.npy')
+            if not os.path.exists(fname):
+                # write to a temporary file first so other processes never
+                # load a partially written file
+                tmpname = os.path.join(self.path, '{}.{}.tmp.npy'.format(key, os.getpid()))
+                np.save(tmpname, A)
+                os.replace(tmpname, fname)
+
+    def _add_(self, key, A) -> None:
+        """Adds a matrix to the memory cache, evicting the least recently used"""
+        if A.nbytes > self.max_bytes:
+            return
+        self._arrays[key] = A
+        self._nbytes += A.nbytes
+        while self._nbytes > self.max_bytes:
+            _, B = self._arrays.popitem(last=False)
+            self._nbytes -= B.nbytes
+
+    def clear(self) -> None:
+        """Clears the memory cache (the disk cache is not modified)"""
+        self._arrays.clear()
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """int: total size of the matrices in the memory cache"""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+
+transform_cache = TransformCache(
+    max_bytes=int(float(os.environ.get('DESC_TRANSFORM_CACHE_MB', 1024))*2**20),
+    path=os.environ.get('DESC_TRANSFORM_CACHE_DIR'))
+
+
 class Transform(IOAble):
     """Transform
 
@@ -23,6 +191,10 @@ class Transform(IOAble):
         combinations of derivatives needed
         Each row is one set, columns represent the order of derivatives
         for [rho, theta, zeta]
+    method : str
+        method of computing the transform, ``'direct'`` or ``'fft'``
+    dtype : dtype
+        floating point type of the transform matrices
     matrices : ndarray
         DESCRIPTION
     pinv : ndarray
@@ -32,7 +204,8 @@ class Transform(IOAble):
     _save_attrs_ = ['grid', 'basis', 'derives', 'matrices']
 
     def __init__(self, grid:Grid=None, basis:Basis=None, derivs=0, rcond=1e-6,
-            load_from=None, file_format=None, obj_lib=None) -> None:
+            method='direct', dtype=np.float64, load_from=None, file_format=None,
+            obj_lib=None) -> None:
         """Initializes a Transform
 
         Parameters
@@ -41,7 +214,7 @@ class Transform(IOAble):
             DESCRIPTION
         basis : Basis
             DESCRIPTION
-        derivs : int or string
+        derivs : int, string or ndarray
             order of derivatives needed, if an int (Default = 0)
             OR
             type of calculation being performed, if a string
@@ -49,8 +222,33 @@ class Transform(IOAble):
             equilibrium from the force balance equations
             ``'qs'``: all of the derivatives needed to calculate quasi-
             symmetry from the triple-product equation
+            OR
+            orders of the derivatives in (rho,theta,zeta) needed, if an
+            ndarray of int, shape(N_derivs,3), eg from
+            ``desc.configuration.get_derivatives``
        rcond : float
             relative cutoff for singular values in least squares fit
+        method : str
+            ``'direct'`` (Default): dense matrix of the full basis at each node.
+            If the basis only varies with some of the node coordinates (eg a
+            profile on a grid with repeated rho, or any basis on a surface of
+            constant rho) it is only evaluated at the unique coordinates and
+            mode numbers, and broadcast to the nodes with an index map.
+            ``'fft'``: dense matrices of the radial & poloidal basis functions
+            at the unique (rho,theta) nodes only, the toroidal Fourier series is
+            evaluated with a real FFT. Requires the nodes to be equally spaced
+            in zeta over one field period with at least 2*N+1 toroidal planes,
+            otherwise the direct method is used.
+            ``'factored'``: tables of the radial, poloidal and toroidal factors
+            of the basis functions at the unique node coordinates, which are
+            multiplied together at each node when transforming. Uses
+            O((Nr+Nt+Nz)*modes) memory per derivative instead of O(nodes*modes).
+        dtype : data-type
+            floating point type of the transform matrices and of the values
+            computed by ``transform``, eg ``np.float32`` to halve the memory
+            and bandwidth of the transforms. The matrices are always evaluated
+            in double precision, and the least squares fit is always done in
+            double precision. (Default = np.float64)
 
         Returns
         -------
@@ -62,9 +260,9 @@ class Transform(IOAble):
             self.__basis = basis
             self.__derivs = derivs
             self.__rcond = rcond
+            self.__method = method
+            self.__dtype = np.dtype(dtype)
 
-            self.__matrices = {i: {j: {k: {}
-                         for k in range(4)} for j in range(4)} for i in range(4)}
             self.__derivatives = self._get_derivatives_(self.__derivs)
 
             self._sort_derivatives_()
@@ -98,7 +296,7 @@ class Transform(IOAble):
 
         Parameters
         ----------
-        derivs : int or string
+        derivs : int, string or ndarray
             order of derivatives needed, if an int (Default = 0)
             OR
             type of calculation being performed, if a string
@@ -106,6 +304,10 @@ class Transform(IOAble):
             equilibrium from the force balance equations
             ``'qs'``: all of the derivatives needed to calculate quasi-
             symmetry from the triple-product equation
+            OR
+            orders of the derivatives in (rho,theta,zeta) needed, if an
+            ndarray of int, shape(N_derivs,3), eg from
+            ``desc.configuration.get_derivatives``
 
         Returns
         -------
@@ -115,7 +317,9 @@ class Transform(IOAble):
             for [rho, theta, zeta]
 
         """
-        if isinstance(derivs, int) and derivs >= 0:
+        if isinstance(derivs, np.ndarray):
+            derivatives = np.unique(np.atleast_2d(derivs).astype(int), axis=0)
+        elif isinstance(derivs, int) and derivs >= 0:
             derivatives = np.array([[]])
             combos = combinations_with_replacement(range(derivs+1), 3)
             for combo in list(combos):
@@ -126,23 +330,16 @@ class Transform(IOAble):
                     else:
                         derivatives = np.array([perm])
         elif derivs.lower() == 'force':
-            derivatives = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
-                                    [2, 0, 0], [1, 1, 0], [1, 0, 1], [0, 2, 0],
-                                    [0, 1, 1], [0, 0, 2]])
-            # FIXME: this assumes the Grid is sorted (which it should be)
-            if np.all(self.__grid.nodes[:, 0] == np.array([0, 0, 0])):
-                axis = np.array([[2, 1, 0], [1, 2, 0], [1, 1, 1], [2, 2, 0]])
-                derivatives = np.vstack([derivatives, axis])
+            # the limits at the magnetic axis need the third derivatives
+            if self.__grid.axis.size > 0:
+                derivatives = COORDINATE_DERIVATIVES['qs']
+            else:
+                derivatives = COORDINATE_DERIVATIVES['force']
         elif derivs.lower() == 'qs':
-            derivatives = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
-                                    [2, 0, 0], [1, 1, 0], [1, 0, 1], [0, 2, 0],
-                                    [0, 1, 1], [0, 0, 2], [3, 0, 0], [2, 1, 0],
-                                    [2, 0, 1], [1, 2, 0], [1, 1, 1], [1, 0, 2],
-                                    [0, 3, 0], [0, 2, 1], [0, 1, 2], [0, 0, 3],
-                                    [2, 2, 0]])
+            derivatives = COORDINATE_DERIVATIVES['qs']
         else:
             raise NotImplementedError(TextColors.FAIL +
-                  "order options are 'force', 'qs', or a non-negative int"
+                  "order options are 'force', 'qs', a non-negative int, or an array of derivatives"
                   + TextColors.ENDC)
         return derivatives
 
@@ -158,22 +355,347 @@ class Transform(IOAble):
                        self.__derivatives[:, 1], self.__derivatives[:, 2]))
         self.__derivatives = self.__derivatives[sort_idx]
 
+    def _check_inputs_fft_(self) -> bool:
+        """Checks if the grid and basis are compatible with the FFT method
+
+        Returns
+        -------
+        bool
+            True if the nodes are equally spaced in zeta over one field period
+            and there are enough toroidal planes to resolve the basis,
+            False otherwise
+
+        """
+        zeta = np.unique(self.__grid.nodes[:, 2])
+        n_max = np.max(np.abs(self.__basis.modes[:, 2]))
+        dz = 2*np.pi/(self.__basis.NFP*zeta.size)
+
+        if not np.allclose(zeta, zeta[0] + dz*np.arange(zeta.size)):
+            warnings.warn(TextColors.WARNING +
+                "FFT method requires equally spaced nodes over one field period in zeta, using direct method instead" +
+                          TextColors.ENDC)
+            return False
+        if zeta.size < 2*n_max+1:
+            warnings.warn(TextColors.WARNING +
+                "FFT method requires at least {} toroidal planes to resolve the basis, using direct method instead".format(2*n_max+1) +
+                          TextColors.ENDC)
+            return False
+        return True
+
+    def _build_fft_(self) -> None:
+        """Builds the index maps between the full grid & basis and the
+        (rho,theta) x zeta and (l,m) x n tensor products used by the FFT method
+
+        Returns
+        -------
+        None
+
+        """
+        nodes = self.__grid.nodes
+        modes = self.__basis.modes
+
+        rt_nodes, rt_idx = np.unique(nodes[:, :2], axis=0, return_inverse=True)
+        zeta = np.unique(nodes[:, 2])
+        dz = 2*np.pi/(self.__basis.NFP*zeta.size)
+        z_idx = np.rint((nodes[:, 2]-zeta[0])/dz).astype(int)
+
+        lm_modes, lm_idx = np.unique(modes[:, :2], axis=0, return_inverse=True)
+        N = np.max(np.abs(modes[:, 2]))
+        n_idx = modes[:, 2] + N
+
+        self.__fft = {'rt_nodes': np.hstack([rt_nodes, np.zeros((rt_nodes.shape[0], 1))]),
+                      'lm_modes': np.hstack([lm_modes, np.zeros((lm_modes.shape[0], 1), dtype=int)]),
+                      'rt_idx': rt_idx.flatten(), 'z_idx': z_idx,
+                      'lm_idx': lm_idx.flatten(), 'n_idx': n_idx,
+                      'N': N, 'num_z': zeta.size, 'zeta0': zeta[0]}
+
     def _build_(self) -> None:
         """Builds the transform matrices for each derivative order
         """
-        for d in self.__derivatives:
-            self.__matrices[d[0]][d[1]][d[2]] = self.__basis.evaluate(
-                                                        self.__grid.nodes, d)
+        if self.__method == 'fft' and self._check_inputs_fft_():
+            self._build_fft_()
+        else:
+            self.__fft = {}
+        if self.__method == 'factored':
+            self._build_factored_()
+        else:
+            self.__factored = {}
+        if not self.__fft and not self.__factored:
+            self._build_reduced_()
+        else:
+            self.__reduced = {}
+        self.__matrices = {i: {j: {k: {}
+                     for k in range(4)} for j in range(4)} for i in range(4)}
+        self.__stack = {}
+        self._build_matrices_(self.__derivatives)
+
+    def _build_factored_(self) -> None:
+        """Builds the index maps between the nodes and their unique rho, theta
+        and zeta coordinates used by the factored method
+
+        Returns
+        -------
+        None
+
+        """
+        nodes = self.__grid.nodes
+        self.__factored = {}
+        for i, x in enumerate(['r', 't', 'z']):
+            coords, idx = np.unique(nodes[:, i], return_inverse=True)
+            self.__factored[x+'_coords'] = coords
+            self.__factored[x+'_idx'] = idx.flatten()
+            self.__factored[x+'_tables'] = {}
+
+        # if the grid is (close to) a tensor product of (rho,theta) and zeta
+        # nodes, the toroidal factor is contracted with a matrix product on
+        # the tensor product grid
+        rt_nodes, rt_idx = np.unique(np.vstack([self.__factored['r_idx'],
+                                                self.__factored['t_idx']]).T,
+                                     axis=0, return_inverse=True)
+        if rt_nodes.shape[0]*self.__factored['z_coords'].size <= 2*nodes.shape[0]:
+            self.__factored['rt_r_idx'] = rt_nodes[:, 0]
+            self.__factored['rt_t_idx'] = rt_nodes[:, 1]
+            self.__factored['rt_idx'] = rt_idx.flatten()
+
+    def _build_reduced_(self) -> None:
+        """Builds the index maps between the nodes and modes and their unique
+        coordinates and mode numbers, for the direct method
+
+        Only the coordinates that the basis functions vary with on the grid
+        are kept. A profile basis (eg PowerSeries) only depends on rho, so it
+        is evaluated at the unique rho of the nodes. On a surface of constant
+        rho (eg the boundary) the radial factor of each mode is a constant,
+        so modes that only differ in l are combined and the basis is evaluated
+        for the unique (m,n) at the unique (theta,zeta). The values at the
+        nodes are broadcast from the unique coordinates with an index map.
+
+        Returns
+        -------
+        None
+
+        """
+        nodes = self.__grid.nodes
+        modes = self.__basis.modes
+        axes = []
+        for i in range(3):
+            coords = np.unique(nodes[:, i])
+            x = np.zeros((coords.size, 3))
+            x[:, i] = coords
+            if coords.size > 1 and np.any(self.__basis.evaluate_factors(x)[i] != 1):
+                axes.append(i)
+
+        self.__reduced = {}
+        if not len(axes):
+            return
+        _, node_first, node_idx = np.unique(nodes[:, axes], axis=0,
+                                            return_index=True, return_inverse=True)
+        _, mode_first, mode_idx = np.unique(modes[:, axes], axis=0,
+                                            return_index=True, return_inverse=True)
+        if node_first.size < nodes.shape[0] or mode_first.size < modes.shape[0]:
+            self.__reduced = {'nodes': nodes[node_first], 'modes': modes[mode_first],
+                              'node_idx': node_idx.flatten(),
+                              'mode_idx': mode_idx.flatten(), 'axes': axes}
+
+    def _build_matrices_(self, derivatives) -> None:
+        """Builds the transform matrices for the given derivative orders
+
+        Parameters
+        ----------
+        derivatives : ndarray
+            combinations of derivatives to build
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.__factored and not self.__reduced and not self.__fft:
+            if len(derivatives) or not self.__stack:
+                self._build_stack_()
+            return
+        for d in derivatives:
+            if self.__factored:
+                # factor tables are shared by all derivatives of the same order
+                # in each coordinate
+                factors = {}
+                for i, (x, name) in enumerate(zip(['r', 't', 'z'],
+                                                  ['radial', 'poloidal', 'toroidal'])):
+                    tables = self.__factored[x+'_tables']
+                    if d[i] not in tables:
+                        tables[d[i]] = self._cast_(self._evaluate_factor_(i, d[i]))
+                    factors[name] = tables[d[i]]
+                self.__matrices[d[0]][d[1]][d[2]] = factors
+            elif self.__reduced:
+                self.__matrices[d[0]][d[1]][d[2]] = self._evaluate_reduced_(d)
+            elif self.__fft:
+                # the toroidal derivative is applied in Fourier space
+                self.__matrices[d[0]][d[1]][d[2]] = self._cast_(self._evaluate_(
+                        self.__fft['rt_nodes'], np.array([d[0], d[1], 0]),
+                        modes=self.__fft['lm_modes']))
+
+    def _build_stack_(self) -> None:
+        """Builds the transform matrices of the direct method as a single
+        array, stacked in the order of self.derivatives
+
+        The stacked array is what is stored in the transform cache, and the
+        matrix of each derivative is a view of it, so there is only one copy
+        of the matrices. Derivatives that were built before (eg before the
+        derivatives were changed) are kept at the end of the stack, and their
+        matrices are copied from the old stack rather than evaluated again.
+
+        Returns
+        -------
+        None
+
+        """
+        derivatives = self.__derivatives
+        A_old = None
+        if self.__stack:
+            old = self.__stack['derivatives']
+            derivatives = np.vstack([derivatives,
+                                     old[~(old[:, None] == derivatives).all(-1).any(-1)]])
+            if np.array_equal(derivatives, old):
+                return
+            A_old = self.__stack['matrices']
+            if A_old.dtype != np.float64:
+                # the cached matrices are always double precision
+                A_old = transform_cache.get(self.__stack['key'])
+        derivatives = derivatives.astype(int)
+
+        key = transform_cache.key('stack', self.__basis.__class__.__name__,
+                                  self.__basis.NFP, self.__basis.modes,
+                                  self.__grid.nodes, derivatives)
+        A = transform_cache.get(key)
+        if A is None:
+            A = np.empty((derivatives.shape[0], self.__grid.num_nodes,
+                          self.__basis.num_modes))
+            for i, d in enumerate(derivatives):
+                j = np.nonzero((old == d).all(-1))[0] if A_old is not None else []
+                A[i] = A_old[j[0]] if len(j) else self.__basis.evaluate(self.__grid.nodes, d)
+            transform_cache.put(key, A)
+        A = self._cast_(A)
+        self.__stack = {'derivatives': derivatives, 'matrices': A, 'key': key}
+        for i, d in enumerate(derivatives):
+            self.__matrices[d[0]][d[1]][d[2]] = A[i]
+
+    def _cast_(self, A):
+        """Casts a matrix to the floating point type of the Transform,
+        without copying it if it already has that type"""
+        return A.astype(self.__dtype, copy=False)
+
+    def _evaluate_(self, nodes, derivatives, modes=None):
+        """Evaluates the basis at the given nodes, using the transform cache
+
+        Parameters
+        ----------
+        nodes : ndarray of float, size(N,3)
+            node coordinates, in (rho,theta,zeta)
+        derivatives : ndarray of int, shape(3,)
+            order of derivatives to compute in (rho,theta,zeta)
+        modes : ndarray of int, shape(K,3), optional
+            basis modes to evaluate, if different from self.basis.modes
+
+        Returns
+        -------
+        A : ndarray, shape(N,K)
+            basis functions evaluated at nodes
+
+        """
+        if modes is None:
+            modes = self.__basis.modes
+        key = transform_cache.key(self.__basis.__class__.__name__,
+                                  self.__basis.NFP, modes, nodes,
+                                  tuple(int(d) for d in derivatives))
+        A = transform_cache.get(key)
+        if A is None:
+            A = self.__basis.evaluate(nodes, derivatives, modes=modes)
+            transform_cache.put(key, A)
+        return A
+
+    def _evaluate_factor_(self, axis, order):
+        """Evaluates one factor of the basis at the unique node coordinates,
+        using the transform cache
+
+        Parameters
+        ----------
+        axis : int
+            coordinate of the factor, 0 for rho, 1 for theta, 2 for zeta
+        order : int
+            order of the derivative with respect to that coordinate
+
+        Returns
+        -------
+        A : ndarray, shape(N_unique,K)
+            factor of the basis functions at the unique coordinates
+
+        """
+        coords = self.__factored[['r', 't', 'z'][axis]+'_coords']
+        key = transform_cache.key('factor', axis, self.__basis.__class__.__name__,
+                                  self.__basis.NFP, self.__basis.modes, coords, int(order))
+        A = transform_cache.get(key)
+        if A is None:
+            nodes = np.zeros((coords.size, 3))
+            nodes[:, axis] = coords
+            derivatives = np.zeros((3,), dtype=int)
+            derivatives[axis] = order
+            A = self.__basis.evaluate_factors(nodes, derivatives)[axis]
+            transform_cache.put(key, A)
+        return A
+
+    def _evaluate_reduced_(self, derivatives):
+        """Evaluates the basis at the unique node coordinates and mode numbers,
+        using the transform cache
+
+        Parameters
+        ----------
+        derivatives : ndarray of int, shape(3,)
+            order of derivatives to compute in (rho,theta,zeta)
+
+        Returns
+        -------
+        A : dict of ndarray
+            ``'matrix'``: shape(N_unique_nodes,N_unique_modes), product of the
+            factors of the basis that vary with the nodes.
+            ``'weights'``: shape(N_unique_modes,N_coeffs), product of the factors
+            that are constant over the nodes, mapping the coefficients to the
+            unique modes.
+
+        """
+        axes = self.__reduced['axes']
+        key = transform_cache.key('reduced', self.__basis.__class__.__name__,
+                                  self.__basis.NFP, self.__reduced['modes'],
+                                  self.__reduced['nodes'], tuple(int(d) for d in derivatives))
+        A = transform_cache.get(key)
+        if A is None:
+            factors = self.__basis.evaluate_factors(
+                self.__reduced['nodes'], derivatives, modes=self.__reduced['modes'])
+            A = np.prod([factors[i] for i in axes], axis=0)
+            transform_cache.put(key, A)
+
+        factors = self.__basis.evaluate_factors(self.__grid.nodes[:1], derivatives)
+        weights = np.zeros((self.__reduced['modes'].shape[0], self.__basis.num_modes))
+        weights[self.__reduced['mode_idx'], np.arange(self.__basis.num_modes)] = \
+            np.prod([factors[i][0] for i in range(3) if i not in axes], axis=0)
+        return {'matrix': self._cast_(A), 'weights': self._cast_(weights)}
 
     def _build_pinv_(self) -> None:
         """Builds the transform matrices for each derivative order
         """
-        # FIXME: this assumes the derivatives are sorted (which they should be)
-        if np.all(self.__derivatives[0, :] == np.array([0, 0, 0])):
-            A = self.__matrices[0][0][0]
-        else:
-            A = self.__basis.evaluate(self.__grid.nodes, np.array([0, 0, 0]))
-        self.__pinv = jnp.linalg.pinv(A, rcond=self.__rcond)
+        key = transform_cache.key('pinv', self.__basis.__class__.__name__,
+                                  self.__basis.NFP, self.__basis.modes,
+                                  self.__grid.nodes, self.__rcond)
+        pinv = transform_cache.get(key)
+        if pinv is None:
+            # FIXME: this assumes the derivatives are sorted (which they should be)
+            if np.all(self.__derivatives[0, :] == np.array([0, 0, 0])) \
+                    and not self.__fft and not self.__factored and not self.__reduced \
+                    and self.__dtype == np.float64:
+                A = self.__matrices[0][0][0]
+            else:
+                A = self._evaluate_(self.__grid.nodes, np.array([0, 0, 0]))
+            pinv = jnp.linalg.pinv(A, rcond=self.__rcond)
+            transform_cache.put(key, pinv)
+        self.__pinv = pinv
 
     def _def_save_attrs_(self) -> None:
         """Defines attributes to save
@@ -205,17 +727,190 @@ class Transform(IOAble):
             array of values of function at node locations
 
         """
+        A = self._get_matrix_(dr, dt, dz)
+        self._check_coeffs_(c)
+        c = jnp.asarray(c, dtype=self.__dtype)
+
+        if self.__factored:
+            return self._transform_factored_(A, c)
+        if self.__reduced:
+            return self._transform_reduced_(A, c)
+        if self.__fft:
+            return self._transform_fft_(c, np.array([[dr, dt, dz]]))[0]
+        return jnp.matmul(A, c)
+
+    def transform_all(self, c, derivatives=None):
+        """Transform from spectral domain to physical for several derivative
+        orders in a single pass
+
+        With the direct method the matrices of all the derivatives are
+        stacked into one array, so the transform is a single batched matrix
+        product. With the FFT method the radial & poloidal product is shared
+        between derivatives that only differ in the toroidal order, and a
+        single inverse FFT is done for all of them.
+
+        Parameters
+        ----------
+        c : ndarray, shape(N_coeffs,)
+            spectral coefficients, indexed as (lm,n) flattened in row major order
+        derivatives : ndarray of int, shape(N_derivs,3), optional
+            orders of the derivatives to compute in (rho,theta,zeta).
+            (Default = self.derivatives)
+
+        Returns
+        -------
+        x : ndarray, shape(N_derivs,N_nodes)
+            array of values of function at node locations, one row for each
+            row of derivatives
+
+        """
+        if derivatives is None:
+            derivatives = self.__derivatives
+        derivatives = np.atleast_2d(derivatives)
+        A = [self._get_matrix_(*d) for d in derivatives]
+        self._check_coeffs_(c)
+        c = jnp.asarray(c, dtype=self.__dtype)
+
+        if self.__factored:
+            return jnp.stack([self._transform_factored_(a, c) for a in A])
+        if self.__reduced:
+            return jnp.stack([self._transform_reduced_(a, c) for a in A])
+        if self.__fft:
+            return self._transform_fft_(c, derivatives)
+        A_stack = self._get_stack_(derivatives)
+        if A_stack is None:
+            return jnp.stack([jnp.matmul(a, c) for a in A])
+        return jnp.matmul(A_stack, c)
+
+    def _get_matrix_(self, dr=0, dt=0, dz=0):
+        """Gets the transform matrix of a derivative order, checking that it
+        has been built"""
         A = self.__matrices[dr][dt][dz]
-        if type(A) is dict:
+        if type(A) is dict and not len(A):
             raise ValueError(TextColors.FAIL +
                  "Derivative orders are out of initialized bounds" +
                              TextColors.ENDC)
-        if A.shape[1] != c.size:
+        return A
+
+    def _check_coeffs_(self, c) -> None:
+        """Checks that the coefficients are compatible with the basis"""
+        if c.size != self.__basis.num_modes:
             raise ValueError(TextColors.FAIL +
-                 "Coefficients dimension ({}) is incompatible with the number of basis modes({})".format(c.size, A.shape[1]) +
+                 "Coefficients dimension ({}) is incompatible with the number of basis modes({})".format(c.size, self.__basis.num_modes) +
                              TextColors.ENDC)
 
-        return jnp.matmul(A, c)
+    def _get_stack_(self, derivatives):
+        """Gets the stacked transform matrices of the given derivative orders,
+        without copying them
+
+        Parameters
+        ----------
+        derivatives : ndarray of int, shape(N_derivs,3)
+            orders of the derivatives in (rho,theta,zeta)
+
+        Returns
+        -------
+        A : ndarray, shape(N_derivs,N_nodes,N_coeffs) or None
+            slice of the stacked matrices, or None if the derivatives are not
+            consecutive rows of the stack
+
+        """
+        idx = (derivatives[:, None] == self.__stack['derivatives']).all(-1).argmax(-1)
+        if np.array_equal(idx, np.arange(idx[0], idx[0] + idx.size)):
+            return self.__stack['matrices'][idx[0]:idx[0] + idx.size]
+        return None
+
+    def _transform_factored_(self, A, c):
+        """Transform from spectral domain to physical from the factor tables
+
+        Parameters
+        ----------
+        A : dict of ndarray
+            radial, poloidal and toroidal factors of the basis functions at
+            the unique node coordinates
+        c : ndarray, shape(N_coeffs,)
+            spectral coefficients
+
+        Returns
+        -------
+        x : ndarray, shape(N_nodes,)
+            array of values of function at node locations
+
+        """
+        if 'rt_idx' in self.__factored:
+            c_rt = A['radial'][self.__factored['rt_r_idx']] \
+                * A['poloidal'][self.__factored['rt_t_idx']] * c
+            x = jnp.matmul(c_rt, A['toroidal'].T)
+            return x[self.__factored['rt_idx'], self.__factored['z_idx']]
+        return jnp.einsum('ik,ik,ik->i', A['radial'][self.__factored['r_idx']],
+                          A['poloidal'][self.__factored['t_idx']],
+                          A['toroidal'][self.__factored['z_idx']]*c)
+
+    def _transform_reduced_(self, A, c):
+        """Transform from spectral domain to physical from the basis evaluated
+        at the unique node coordinates and mode numbers
+
+        Parameters
+        ----------
+        A : dict of ndarray
+            matrix and mode weights, such as computed by ``_evaluate_reduced_``
+        c : ndarray, shape(N_coeffs,)
+            spectral coefficients
+
+        Returns
+        -------
+        x : ndarray, shape(N_nodes,)
+            array of values of function at node locations
+
+        """
+        x = jnp.matmul(A['matrix'], jnp.matmul(A['weights'], c))
+        return x[self.__reduced['node_idx']]
+
+    def _transform_fft_(self, c, derivatives):
+        """Transform from spectral domain to physical using a real FFT in zeta
+
+        Parameters
+        ----------
+        c : ndarray, shape(N_coeffs,)
+            spectral coefficients
+        derivatives : ndarray of int, shape(N_derivs,3)
+            orders of the derivatives to compute in (rho,theta,zeta)
+
+        Returns
+        -------
+        x : ndarray, shape(N_derivs,N_nodes)
+            array of values of function at node locations
+
+        """
+        N = self.__fft['N']
+        num_z = self.__fft['num_z']
+
+        # coefficients of each toroidal mode n=-N..N at each (rho,theta) node,
+        # the radial & poloidal matrices do not depend on the toroidal derivative
+        c_lmn = put(jnp.zeros((self.__fft['lm_modes'].shape[0], 2*N+1), dtype=c.dtype),
+                    opsindex[self.__fft['lm_idx'], self.__fft['n_idx']], c)
+        c_rtn = {}
+        for d in derivatives:
+            if (d[0], d[1]) not in c_rtn:
+                c_rtn[(d[0], d[1])] = jnp.matmul(self.__matrices[d[0]][d[1]][d[2]], c_lmn)
+        c_rtn = jnp.stack([c_rtn[(d[0], d[1])] for d in derivatives])
+
+        # a*cos(n*NFP*z) + b*sin(n*NFP*z) = Re[(a-ib)*exp(i*n*NFP*z)]
+        n = np.arange(N+1)
+        dz = derivatives[:, 2:3]
+        a = c_rtn[:, :, N:]
+        b = jnp.concatenate([jnp.zeros(c_rtn.shape[:2] + (1,), dtype=c_rtn.dtype),
+                             c_rtn[:, :, :N][:, :, ::-1]], axis=2)
+        scale = np.where(n == 0, num_z, num_z/2) * (1j*n*self.__basis.NFP)**dz \
+            * np.exp(1j*n*self.__basis.NFP*self.__fft['zeta0'])
+        scale = scale.astype(np.result_type(self.__dtype, np.complex64))
+        X = (a - 1j*b)*scale[:, np.newaxis, :]
+        X = jnp.concatenate([X, jnp.zeros(X.shape[:2] + (num_z//2+1-(N+1),),
+                                          dtype=X.dtype)], axis=2)
+
+        # numpy's FFT is always computed in double precision
+        x = jnp.fft.irfft(X, n=num_z, axis=2).astype(c_rtn.dtype)
+        return x[:, self.__fft['rt_idx'], self.__fft['z_idx']]
 
     @conditional_decorator(functools.partial(jit, static_argnums=(0,)), use_jax)
     def fit(self, x):
@@ -320,7 +1015,7 @@ class Transform(IOAble):
 
         Parameters
         ----------
-        derivs : int or string
+        derivs : int, string or ndarray
             order of derivatives needed, if an int (Default = 0)
             OR
             type of calculation being performed, if a string
@@ -328,27 +1023,56 @@ class Transform(IOAble):
             equilibrium from the force balance equations
             ``'qs'``: all of the derivatives needed to calculate quasi-
             symmetry from the triple-product equation
+            OR
+            orders of the derivatives in (rho,theta,zeta) needed, if an
+            ndarray of int, shape(N_derivs,3), eg from
+            ``desc.configuration.get_derivatives``
 
         Returns
         -------
         None
 
         """
-        if derivs != self.__derivs:
+        if not np.array_equal(derivs, self.__derivs):
             self.__derivs = derivs
 
             old_derivatives = self.__derivatives
-            self.__derivatives = self.get_derivatives(self.__derivs)
-            self.sort_derivatives()
+            self.__derivatives = self._get_derivatives_(self.__derivs)
+            self._sort_derivatives_()
             new_derivatives = self.__derivatives
 
             new_not_in_old = (
                 new_derivatives[:, None] == old_derivatives).all(-1).any(-1)
             derivs_to_add = new_derivatives[~new_not_in_old]
 
-            for d in derivs_to_add:
-                self.__matrices[d[0]][d[1]][d[2]] = self.__basis.evaluate(
-                                                        self.__grid.nodes, d)
+            self._build_matrices_(derivs_to_add)
+
+    @property
+    def method(self):
+        return self.__method
+
+    @property
+    def dtype(self):
+        return self.__dtype
+
+    @dtype.setter
+    def dtype(self, dtype) -> None:
+        """Changes the floating point type and rebuilds the matrices, from the
+        double precision matrices in the transform cache
+
+        Parameters
+        ----------
+        dtype : data-type
+            floating point type of the transform matrices, eg ``np.float32``
+
+        Returns
+        -------
+        None
+
+        """
+        if np.dtype(dtype) != self.__dtype:
+            self.__dtype = np.dtype(dtype)
+            self._build_()
 
     @property
     def matrices(self):
@@ -1,14 +1,97 @@
 import numpy as np
-from scipy.optimize import fsolve
+import concurrent.futures
+from collections.abc import Mapping
 from netCDF4 import Dataset
 
-from desc.backend import sign
 from desc.grid import LinearGrid
 from desc.basis import FourierZernikeBasis
 from desc.transform import Transform
 
 
-# TODO: add other fields including B, rmns, zmnc, lmnc, etc
+class VmecOutput(Mapping):
+    """Lazy reader for VMEC wout nc files
+
+    Fields are read from the file only when they are sliced, so a few
+    surfaces or modes of a high resolution output can be read without
+    loading the full arrays, eg ``vmec_data['rmnc'][[0, 10, -1]]``.
+    Can be used as a context manager, which closes the file on exit.
+
+    Parameters
+    ----------
+    fname : str or path-like
+        filename of VMEC output file
+
+    """
+
+    # DESC name: VMEC name
+    _fields = {
+        'NFP': 'nfp',
+        'psi': 'phi',  # toroidal flux is saved as 'phi'
+        'iota': 'iotaf',
+        'pres': 'presf',
+        'xm': 'xm',
+        'xn': 'xn',
+        'rmnc': 'rmnc',
+        'rmns': 'rmns',
+        'zmns': 'zmns',
+        'zmnc': 'zmnc',
+        'lmns': 'lmns',
+        'lmnc': 'lmnc',
+        # fields on the Nyquist mode spectrum
+        'xm_nyq': 'xm_nyq',
+        'xn_nyq': 'xn_nyq',
+        'gmnc': 'gmnc',  # jacobian
+        'gmns': 'gmns',
+        'bmnc': 'bmnc',  # |B|
+        'bmns': 'bmns',
+        'bsupumnc': 'bsupumnc',
+        'bsupumns': 'bsupumns',
+        'bsupvmnc': 'bsupvmnc',
+        'bsupvmns': 'bsupvmns',
+        'bsubsmns': 'bsubsmns',
+        'bsubsmnc': 'bsubsmnc',
+        'bsubumnc': 'bsubumnc',
+        'bsubumns': 'bsubumns',
+        'bsubvmnc': 'bsubvmnc',
+        'bsubvmns': 'bsubvmns',
+    }
+    _scalars = ['NFP']
+
+    def __init__(self, fname) -> None:
+        self.__file = Dataset(fname, mode='r')
+        self.__file.set_auto_mask(False)
+        self.__keys = [key for key, name in self._fields.items()
+                       if name in self.__file.variables] + ['sym']
+
+    def __getitem__(self, key):
+        """Gets a field, as a netCDF variable that is read when sliced"""
+        if key == 'sym':
+            return 'rmns' not in self.__file.variables
+        if key not in self.__keys:
+            raise KeyError(key)
+        variable = self.__file.variables[self._fields[key]]
+        if key in self._scalars:
+            return int(variable[...])
+        return variable
+
+    def __iter__(self):
+        return iter(self.__keys)
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the file"""
+        if self.__file.isopen():
+            self.__file.close()
+
+
 def read_vmec_output(fname):
     """Reads VMEC data from wout nc file
 
@@ -23,30 +106,16 @@ def read_vmec_output(fname):
         the VMEC data fields
 
     """
-
-    file = Dataset(fname, mode='r')
-
-    vmec_data = {
-        'NFP': file.variables['nfp'][:],
-        'psi': file.variables['phi'][:],  # toroidal flux is saved as 'phi'
-        'xm': file.variables['xm'][:],
-        'xn': file.variables['xn'][:],
-        'rmnc': file.variables['rmnc'][:],
-        'zmns': file.variables['zmns'][:],
-        'lmns': file.variables['lmns'][:]
-    }
-    try:
-        vmec_data['rmns'] = file.variables['rmns'][:]
-        vmec_data['zmnc'] = file.variables['zmnc'][:]
-        vmec_data['lmnc'] = file.variables['lmnc'][:]
-        vmec_data['sym'] = False
-    except:
-        vmec_data['sym'] = True
+    keys = ['psi', 'xm', 'xn', 'rmnc', 'zmns', 'lmns', 'rmns', 'zmnc', 'lmnc']
+    with VmecOutput(fname) as file:
+        vmec_data = {key: file[key][:] for key in keys if key in file}
+        vmec_data['NFP'] = file['NFP']
+        vmec_data['sym'] = file['sym']
 
     return vmec_data
 
 
-def vmec_error(equil, vmec_data, Nt=8, Nz=4):
+def vmec_error(equil, vmec_data, Nt=8, Nz=4, processes=None):
     """Computes error in SFL coordinates compared to VMEC solution
 
     Parameters
@@ -59,6 +128,9 @@ def vmec_error(equil, vmec_data, Nt=8, Nz=4):
         number of poloidal angles to sample (Default value = 8)
     Nz : int
         number of toroidal angles to sample (Default value = 8)
+    processes : int
+        number of processes to split the interpolation of the VMEC solution
+        across (Default value = None, interpolate in this process)
 
     Returns
     -------
@@ -66,49 +138,193 @@ def vmec_error(equil, vmec_data, Nt=8, Nz=4):
         average Euclidean distance between VMEC and DESC sample points
 
     """
-    ns = np.size(vmec_data['psi'])
-    rho = np.sqrt(vmec_data['psi'])
+    psi = vmec_data['psi'][:]
+    rho = np.sqrt(np.abs(psi/psi[-1]))  # normalized toroidal flux s = rho^2
+    ns = np.size(rho)
     grid = LinearGrid(L=ns, M=Nt, N=Nz, NFP=equil.NFP, rho=rho)
     R_basis = equil.R_basis
     Z_basis = equil.Z_basis
     R_transf = Transform(grid, R_basis)
     Z_transf = Transform(grid, Z_basis)
-    vartheta = np.unique(grid.nodes[:, 1])
-    phi = np.unique(grid.nodes[:, 2])
 
-    R_desc = R_transf.transform(equil.cR).reshape((ns, Nt, Nz), order='F')
-    Z_desc = Z_transf.transform(equil.cZ).reshape((ns, Nt, Nz), order='F')
+    R_desc = R_transf.transform(equil.cR)
+    Z_desc = Z_transf.transform(equil.cZ)
+
+    # surface index of each node
+    s = np.searchsorted(rho, grid.nodes[:, 0])
+    vartheta = grid.nodes[:, 1]
+    phi = grid.nodes[:, 2]
 
     print('Interpolating VMEC solution to sfl coordinates')
-    R_vmec = np.zeros((ns, Nt, Nz))
-    Z_vmec = np.zeros((ns, Nt, Nz))
-    for k in range(Nz):         # toroidal angle
-        for i in range(ns):     # flux surface
-            theta = np.zeros((Nt,))
-            for j in range(Nt): # poloidal angle
-                f0 = sfl_err(np.array([0]), vartheta[j], phi[k], vmec_data, i)
-                f2pi = sfl_err(np.array([2*np.pi]),
-                               vartheta[j], phi[k], vmec_data, i)
-                flag = (sign(f0) + sign(f2pi)) / 2
-                args = (vartheta[j], phi[k], vmec_data, i, flag)
-                t = fsolve(sfl_err, vartheta[j], args=args)
-                if flag != 0:
-                    t = np.remainder(t+np.pi, 2*np.pi)
-                theta[j] = t   # theta angle that corresponds to vartheta[j]
-            R_vmec[i, :, k] = vmec_transf(
-                vmec_data['rmnc'][i, :], vmec_data['xm'], vmec_data['xn'], theta, phi[k], trig='cos').flatten()
-            Z_vmec[i, :, k] = vmec_transf(
-                vmec_data['zmns'][i, :], vmec_data['xm'], vmec_data['xn'], theta, phi[k], trig='sin').flatten()
-            if not vmec_data['sym']:
-                R_vmec[i, :, k] += vmec_transf(vmec_data['rmns'][i, :], vmec_data['xm'],
-                                               vmec_data['xn'], theta, phi[k], trig='sin').flatten()
-                Z_vmec[i, :, k] += vmec_transf(vmec_data['zmnc'][i, :], vmec_data['xm'],
-                                               vmec_data['xn'], theta, phi[k], trig='cos').flatten()
-        print('{}%'.format((k+1)/Nz*100))
+    if processes is not None and processes > 1:
+        # open files cannot be sent to other processes
+        keys = ['xm', 'xn', 'rmnc', 'zmns', 'lmns', 'rmns', 'zmnc', 'lmnc']
+        vmec_data = dict({key: vmec_data[key][:] for key in keys if key in vmec_data},
+                         sym=vmec_data['sym'])
+        # no more processes than nodes, so none of the chunks are empty
+        processes = min(processes, grid.num_nodes)
+        chunks = np.array_split(np.arange(grid.num_nodes), processes)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            results = executor.map(vmec_sfl_coords,
+                                   [s[idx] for idx in chunks],
+                                   [vartheta[idx] for idx in chunks],
+                                   [phi[idx] for idx in chunks],
+                                   [vmec_data]*processes)
+            R_vmec, Z_vmec = [np.concatenate(x) for x in zip(*results)]
+    else:
+        R_vmec, Z_vmec = vmec_sfl_coords(s, vartheta, phi, vmec_data)
 
     return np.mean(np.sqrt((R_vmec - R_desc)**2 + (Z_vmec - Z_desc)**2))
 
 
+def vmec_sfl_coords(s, vartheta, phi, vmec_data):
+    """Computes the VMEC solution at points given in SFL coordinates
+
+    Parameters
+    ----------
+    s : ndarray of int, shape(N_points,)
+        flux surface index of each point
+    vartheta : ndarray, shape(N_points,)
+        sfl poloidal angles
+    phi : ndarray, shape(N_points,)
+        VMEC/sfl toroidal angles
+    vmec_data : dict
+        dictionary of VMEC equilibrium parameters
+
+    Returns
+    -------
+    R : ndarray, shape(N_points,)
+        R coordinates of the points
+    Z : ndarray, shape(N_points,)
+        Z coordinates of the points
+
+    """
+    theta = vmec_sfl_theta(s, vartheta, phi, vmec_data)
+    return vmec_coords(s, theta, phi, vmec_data)
+
+
+def vmec_sfl_theta(s, vartheta, phi, vmec_data, tol=1e-12, maxiter=100):
+    """Solves vartheta = theta + lambda(theta) for the VMEC poloidal angle theta
+    with Newton's method at all points simultaneously
+
+    Parameters
+    ----------
+    s : ndarray of int, shape(N_points,)
+        flux surface index of each point
+    vartheta : ndarray, shape(N_points,)
+        sfl poloidal angles
+    phi : ndarray, shape(N_points,)
+        VMEC/sfl toroidal angles
+    vmec_data : dict
+        dictionary of VMEC equilibrium parameters
+    tol : float
+        tolerance on the residual of the sfl condition (Default value = 1e-12)
+    maxiter : int
+        maximum number of Newton iterations (Default value = 100)
+
+    Returns
+    -------
+    theta : ndarray, shape(N_points,)
+        VMEC poloidal angles of the points
+
+    """
+    xm = vmec_data['xm'][:]
+    xn = vmec_data['xn'][:]
+    # only read the surfaces that are needed
+    surfs, s = np.unique(s, return_inverse=True)
+    lmns = vmec_data['lmns'][surfs][s]
+    lmnc = None if vmec_data['sym'] else vmec_data['lmnc'][surfs][s]
+
+    # theta -> theta + lambda(theta) is monotonic for nested surfaces, so
+    # Newton's method with bounded steps converges from theta = vartheta
+    theta = np.array(vartheta, dtype=float)
+    for i in range(maxiter):
+        l, l_t = vmec_transf_points(lmns, xm, xn, theta, phi, trig='sin', dt=True)
+        if lmnc is not None:
+            l_c, l_ct = vmec_transf_points(lmnc, xm, xn, theta, phi, trig='cos', dt=True)
+            l += l_c
+            l_t += l_ct
+        f = theta + l - vartheta
+        if np.max(np.abs(f)) < tol:
+            break
+        theta -= np.clip(f/np.maximum(1 + l_t, 1e-3), -np.pi/4, np.pi/4)
+    return theta
+
+
+def vmec_coords(s, theta, phi, vmec_data):
+    """Computes the VMEC solution at points given in VMEC coordinates
+
+    Parameters
+    ----------
+    s : ndarray of int, shape(N_points,)
+        flux surface index of each point
+    theta : ndarray, shape(N_points,)
+        VMEC poloidal angles
+    phi : ndarray, shape(N_points,)
+        VMEC toroidal angles
+    vmec_data : dict
+        dictionary of VMEC equilibrium parameters
+
+    Returns
+    -------
+    R : ndarray, shape(N_points,)
+        R coordinates of the points
+    Z : ndarray, shape(N_points,)
+        Z coordinates of the points
+
+    """
+    xm = vmec_data['xm'][:]
+    xn = vmec_data['xn'][:]
+    surfs, s = np.unique(s, return_inverse=True)
+    R = vmec_transf_points(vmec_data['rmnc'][surfs][s], xm, xn, theta, phi, trig='cos')
+    Z = vmec_transf_points(vmec_data['zmns'][surfs][s], xm, xn, theta, phi, trig='sin')
+    if not vmec_data['sym']:
+        R += vmec_transf_points(vmec_data['rmns'][surfs][s], xm, xn, theta, phi, trig='sin')
+        Z += vmec_transf_points(vmec_data['zmnc'][surfs][s], xm, xn, theta, phi, trig='cos')
+    return R, Z
+
+
+def vmec_transf_points(xmna, xm, xn, theta, phi, trig='sin', dt=False):
+    """Compute Fourier transform of VMEC data at individual points
+
+    Parameters
+    ----------
+    xmna : ndarray, shape(N_points,N_modes)
+        Fourier coefficients on the flux surface of each point
+    xm : ndarray, shape(N_modes,)
+        poloidal mode numbers
+    xn : ndarray, shape(N_modes,)
+        toroidal mode numbers
+    theta : ndarray, shape(N_points,)
+        poloidal angles
+    phi : ndarray, shape(N_points,)
+        toroidal angles
+    trig : string
+        type of transform, options are 'sin' or 'cos' (Default value = 'sin')
+    dt : bool
+        also return the poloidal derivative (Default value = False)
+
+    Returns
+    -------
+    f : ndarray, shape(N_points,)
+        transformed data at the points
+    f_t : ndarray, shape(N_points,)
+        poloidal derivative of the transformed data, only if dt is True
+
+    """
+    # VMEC convention, cos/sin(m*theta - n*phi)
+    angle = np.outer(theta, xm) - np.outer(phi, xn)
+    if trig == 'sin':
+        f = np.sum(xmna*np.sin(angle), axis=1)
+        f_t = np.sum(xmna*xm*np.cos(angle), axis=1) if dt else None
+    elif trig == 'cos':
+        f = np.sum(xmna*np.cos(angle), axis=1)
+        f_t = -np.sum(xmna*xm*np.sin(angle), axis=1) if dt else None
+    if dt:
+        return f, f_t
+    return f
+
+
 def sfl_err(theta, vartheta, zeta, vmec_data, s, flag=0):
     """f(theta) = vartheta - theta - lambda(theta)
 
@@ -188,10 +404,10 @@ def vmec_transf(xmna, xm, xn, theta, phi, trig='sin'):
         xmn = np.tile(np.atleast_2d(np.atleast_2d(xmna)[k, :]).T, (1, lt))
         if trig == 'sin':
             f[k, :, :] = np.tensordot(
-                (xmn*sinmt).T, cosnp, axes=1) + np.tensordot((xmn*cosmt).T, sinnp, axes=1)
+                (xmn*sinmt).T, cosnp, axes=1) - np.tensordot((xmn*cosmt).T, sinnp, axes=1)
         elif trig == 'cos':
             f[k, :, :] = np.tensordot(
-                (xmn*cosmt).T, cosnp, axes=1) - np.tensordot((xmn*sinmt).T, sinnp, axes=1)
+                (xmn*cosmt).T, cosnp, axes=1) + np.tensordot((xmn*sinmt).T, sinnp, axes=1)
     return f
 
 
@@ -2,9 +2,14 @@ import pickle
 import numpy as np
 import os
 import sys
+import time
 import itertools
 import copy
 import datetime
+import traceback
+import multiprocessing
+import concurrent.futures
+import h5py
 
 
 def make_bash_scripts(number, output_dir, ncpu, ngpu, req_mem, times, mode='traverse'):
@@ -44,15 +49,16 @@ def make_bash_scripts(number, output_dir, ncpu, ngpu, req_mem, times, mode='trav
             f.write('exit')
 
 
-def main(scenario_index=-2):
+def make_scenarios(base_inputs):
+    """Creates the list of scenarios to scan over.
 
-    checkpt_dir = os.path.expanduser(
-        "/projects/EKOLEMEN/DESC/scan_results_10_29/")
-    if not os.path.exists(checkpt_dir):
-        os.makedirs(checkpt_dir)
+    Args:
+        base_inputs (dict): inputs of the base equilibrium, used for all
+            parameters that are not scanned
 
-    base_name = 'QAS'
-    base_inputs = read_input('./examples/DESC/' + base_name)
+    Returns:
+        scenarios (list): list of input dictionaries, one per scenario
+    """
 
     hyperparams = {'Mpol': [np.array([6, 8, 10, 12]),
                             np.array([6, 9, 12]),
@@ -128,6 +134,181 @@ def main(scenario_index=-2):
             if key not in scenario:
                 scenario[key] = val
 
+    return scenarios
+
+
+def _init_worker(cpu_queue):
+    """Initializes a worker process of the local scan.
+
+    Pins the worker to its own set of CPUs. The BLAS thread counts and the
+    transform cache directory are set in the parent's environment before the
+    workers are spawned, since numpy is already imported (and has sized its
+    thread pools) when the initializer runs.
+
+    Args:
+        cpu_queue (multiprocessing.Queue): queue of CPU sets, one per worker
+    """
+    cpus = cpu_queue.get()
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+
+def run_scenario(scenario_index, scenario, out_fname):
+    """Solves a single scenario.
+
+    Args:
+        scenario_index (int): index of the scenario
+        scenario (dict): inputs of the scenario
+        out_fname (str): checkpoint file for the solution
+
+    Returns:
+        result (dict): status, timings and final state vector of the scenario
+    """
+    from desc.continuation import solve_eq_continuation
+
+    result = {'index': scenario_index, 'pid': os.getpid()}
+    t0 = time.perf_counter()
+    try:
+        equil_fam, timer = solve_eq_continuation(
+            scenario, checkpoint_filename=out_fname, device=None)
+        result['status'] = 'success'
+        result['x'] = np.asarray(equil_fam[-1].x)
+        result['timers'] = dict(timer._times)
+    except Exception:
+        result['status'] = 'failed'
+        result['error'] = traceback.format_exc()
+    result['wall_time'] = time.perf_counter() - t0
+    return result
+
+
+def write_result(summary_fname, scenario, result):
+    """Writes the result of a scenario to the HDF5 summary file.
+
+    Args:
+        summary_fname (str): path to the HDF5 summary file
+        scenario (dict): inputs of the scenario
+        result (dict): output of run_scenario
+    """
+    with h5py.File(summary_fname, 'a') as f:
+        name = 'scenario_' + str(result['index'])
+        if name in f:
+            del f[name]
+        group = f.create_group(name)
+        for key in ['status', 'wall_time', 'pid', 'error']:
+            if key in result:
+                group.attrs[key] = result[key]
+        if 'x' in result:
+            group.create_dataset('x', data=result['x'])
+        timers = group.create_group('timers')
+        for key, val in result.get('timers', {}).items():
+            timers.attrs[key] = val
+        inputs = group.create_group('inputs')
+        for key, val in scenario.items():
+            try:
+                inputs.create_dataset(key, data=val)
+            except (TypeError, ValueError):
+                inputs.attrs[key] = str(val)
+
+
+def finished_scenarios(summary_fname):
+    """Finds the scenarios already solved successfully.
+
+    Args:
+        summary_fname (str): path to the HDF5 summary file
+
+    Returns:
+        finished (set): indices of finished scenarios
+    """
+    if not os.path.exists(summary_fname):
+        return set()
+    with h5py.File(summary_fname, 'r') as f:
+        return {int(name.split('_')[-1]) for name, group in f.items()
+                if group.attrs.get('status') == 'success'}
+
+
+def run_local(scenarios, checkpt_dir, base_name, num_workers=None, cpus_per_worker=1):
+    """Runs the scan on the local machine with a process pool.
+
+    Each worker is pinned to its own CPUs and solves scenarios one after
+    another, so the startup cost is paid once per worker instead of once
+    per scenario, and all workers share a transform cache on disk. Results are written to
+    one HDF5 summary file as they finish. Rerunning the scan skips the
+    scenarios that already finished successfully, so an interrupted scan
+    can be resumed.
+
+    Args:
+        scenarios (list): list of scenario input dictionaries
+        checkpt_dir (str): directory for the checkpoints, cache and summary
+        base_name (str): name of the base equilibrium
+        num_workers (int): number of worker processes
+            (Default = available CPUs / cpus_per_worker)
+        cpus_per_worker (int): how many CPUs to pin to each worker
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count()))
+    if num_workers is None:
+        num_workers = max(len(cpus)//cpus_per_worker, 1)
+
+    summary_fname = os.path.join(checkpt_dir, base_name + '_summary.h5')
+    cache_dir = os.path.join(checkpt_dir, 'transform_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+
+    finished = finished_scenarios(summary_fname)
+    queue = [i for i in range(len(scenarios)) if i not in finished]
+    print('{} scenarios, {} finished, {} to run on {} workers'.format(
+        len(scenarios), len(finished), len(queue), num_workers))
+
+    # spawn instead of fork, JAX is not fork safe
+    ctx = multiprocessing.get_context('spawn')
+    cpu_queue = ctx.Queue()
+    for i in range(num_workers):
+        cpu_queue.put(cpus[i*cpus_per_worker:(i+1)*cpus_per_worker])
+
+    # spawned workers inherit the environment when they start, before they
+    # import numpy, so this keeps BLAS from oversubscribing the pinned CPUs
+    worker_env = {'OMP_NUM_THREADS': str(cpus_per_worker),
+                  'MKL_NUM_THREADS': str(cpus_per_worker),
+                  'OPENBLAS_NUM_THREADS': str(cpus_per_worker),
+                  'DESC_TRANSFORM_CACHE_DIR': cache_dir}
+    parent_env = {key: os.environ.get(key) for key in worker_env}
+    os.environ.update(worker_env)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=num_workers, mp_context=ctx, initializer=_init_worker,
+                initargs=(cpu_queue,)) as executor:
+            futures = {executor.submit(
+                run_scenario, i, scenarios[i],
+                os.path.join(checkpt_dir, base_name + '_scenario_' + str(i))): i
+                for i in queue}
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                result = future.result()
+                write_result(summary_fname, scenarios[i], result)
+                print(datetime.datetime.today().strftime('%c'),
+                      ' Scenario {}: {} in {:.1f} s'.format(
+                          i, result['status'], result['wall_time']))
+    finally:
+        for key, val in parent_env.items():
+            if val is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = val
+
+
+def main(scenario_index=-2):
+
+    checkpt_dir = os.path.expanduser(
+        "/projects/EKOLEMEN/DESC/scan_results_10_29/")
+    if not os.path.exists(checkpt_dir):
+        os.makedirs(checkpt_dir)
+
+    base_name = 'QAS'
+    from desc.input_reader import InputReader
+    base_inputs = InputReader(['./examples/DESC/' + base_name]).inputs
+    scenarios = make_scenarios(base_inputs)
+
     num_scenarios = len(scenarios)
     num_cores = 8
     ngpu = 0
@@ -148,6 +329,13 @@ def main(scenario_index=-2):
         print('Jobs submitted, exiting')
         return
 
+    ###############
+    # Local Run
+    ###############
+    if scenario_index == -3:
+        run_local(scenarios, checkpt_dir, base_name, cpus_per_worker=num_cores)
+        return
+
     ###############
     # Load Scenario and Data
     ###############
@@ -4,6 +4,8 @@ import numpy as np
 from desc.grid import LinearGrid
 from desc.basis import polyder_vec, polyval_vec, powers, jacobi, fourier
 from desc.basis import PowerSeries, DoubleFourierSeries, FourierZernikeBasis
+from desc.basis import find_modes, copy_coeffs
+from desc.backend import Tristate
 
 
 class TestBasis(unittest.TestCase):
@@ -74,6 +76,33 @@ class TestBasis(unittest.TestCase):
         np.testing.assert_allclose(values, correct_vals, atol=1e-8)
         np.testing.assert_allclose(derivs, correct_ders, atol=1e-8)
 
+    def test_jacobi_high_order(self):
+        """Tests jacobi function derivatives and values at high resolution
+        """
+        l = np.array([3, 4, 6])
+        m = np.array([1, -2, 2])
+        r = np.linspace(0, 1, 11)  # rho coordinates
+
+        # correct second & third derivative functions
+        def d2Z3_1(x): return 18*x
+        def d2Z4_2(x): return 48*x**2 - 6
+        def d2Z6_2(x): return 450*x**4 - 240*x**2 + 12
+        def d3Z3_1(x): return 18 + 0*x
+        def d3Z4_2(x): return 96*x
+        def d3Z6_2(x): return 1800*x**3 - 480*x
+
+        correct_d2 = np.array([d2Z3_1(r), d2Z4_2(r), d2Z6_2(r)]).T
+        correct_d3 = np.array([d3Z3_1(r), d3Z4_2(r), d3Z6_2(r)]).T
+
+        np.testing.assert_allclose(jacobi(r, l, m, 2), correct_d2, atol=1e-8)
+        np.testing.assert_allclose(jacobi(r, l, m, 3), correct_d3, atol=1e-8)
+
+        # R_l^m(1) = 1 and |R_l^m| <= 1 for all modes
+        basis = FourierZernikeBasis(M=30, N=0, index='fringe')
+        values = jacobi(r, basis.modes[:, 0], basis.modes[:, 1], 0)
+        np.testing.assert_allclose(values[-1, :], 1, atol=1e-8)
+        self.assertTrue(np.all(np.abs(values) <= 1 + 1e-8))
+
     def test_fourier(self):
         """Tests fourier function
         """
@@ -120,3 +149,62 @@ class TestBasis(unittest.TestCase):
         values = basis.evaluate(grid.nodes, derivatives=np.array([0, 0, 0]))
 
         np.testing.assert_allclose(values, correct_vals, atol=1e-8)
+
+    def test_change_resolution(self):
+        """Tests that changing resolution gives the same modes as a new basis
+        """
+        basis = FourierZernikeBasis(L=-1, M=3, N=1, NFP=2, sym=Tristate(True))
+        basis.change_resolution(L=8, M=4, N=2)
+        correct = FourierZernikeBasis(L=8, M=4, N=2, NFP=2, sym=Tristate(True))
+        np.testing.assert_array_equal(basis.modes, correct.modes)
+
+        basis = DoubleFourierSeries(M=2, N=1, sym=Tristate(False))
+        basis.change_resolution(M=3, N=0)
+        correct = DoubleFourierSeries(M=3, N=0, sym=Tristate(False))
+        np.testing.assert_array_equal(basis.modes, correct.modes)
+
+    def test_copy_coeffs(self):
+        """Tests mapping coefficients between bases against a direct search
+        """
+        old = FourierZernikeBasis(L=-1, M=4, N=2, index='fringe')
+        new = FourierZernikeBasis(L=-1, M=6, N=1, index='ansi')
+        c_old = np.random.random((old.num_modes,))
+
+        c_new = np.zeros((new.num_modes,))
+        for i, mode in enumerate(new.modes):
+            idx = np.where(np.all(old.modes == mode, axis=1))[0]
+            if idx.size:
+                c_new[i] = c_old[idx[0]]
+
+        np.testing.assert_allclose(copy_coeffs(c_old, old.modes, new.modes), c_new,
+                                   atol=1e-8)
+        np.testing.assert_array_equal(find_modes(old.modes, old.modes),
+                                      np.arange(old.num_modes))
+        np.testing.assert_array_equal(find_modes(old.modes, [[0, 0, 5], [12, 0, 0]]),
+                                      [-1, -1])
+
+    def test_get_idx(self):
+        """Tests mode index lookups and masks
+        """
+        basis = FourierZernikeBasis(L=-1, M=3, N=2, NFP=3, sym=Tristate(True))
+        for i, (l, m, n) in enumerate(basis.modes):
+            self.assertEqual(basis.get_idx(l, m, n), i)
+        np.testing.assert_array_equal(
+            basis.get_idx(basis.modes[:, 0], basis.modes[:, 1], basis.modes[:, 2]),
+            np.arange(basis.num_modes))
+        self.assertEqual(basis.get_idx(1, 1, -1), -1)   # removed by symmetry
+        self.assertEqual(basis.get_idx(0, 0, 3), -1)    # above resolution
+        np.testing.assert_array_equal(basis.get_idx(l=[-1, 0, 7], m=[0, -7, 0], n=0),
+                                      [-1, -1, -1])      # outside the range of modes
+        np.testing.assert_array_equal(basis.get_idx(l=[0, 2], m=0, n=1),
+                                      [basis.get_idx(0, 0, 1), basis.get_idx(2, 0, 1)])
+
+        np.testing.assert_array_equal(basis.axisymmetric_mask, basis.modes[:, 2] == 0)
+        np.testing.assert_array_equal(basis.nonnegative_mask, np.logical_and(
+            basis.modes[:, 1] >= 0, basis.modes[:, 2] >= 0))
+        np.testing.assert_array_equal(basis.chevron_mask,
+                                      basis.modes[:, 0] == np.abs(basis.modes[:, 1]))
+
+        basis.change_resolution(L=4, M=4, N=0)
+        self.assertEqual(basis.get_idx(4, 4, 0), basis.num_modes-1)
+        self.assertEqual(basis.get_idx(0, 0, 1), -1)
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+
+from desc.backend import Tristate
+from desc.grid import LinearGrid
+from desc.basis import DoubleFourierSeries, FourierZernikeBasis
+from desc.transform import Transform
+from desc.boundary_conditions import compute_bdry_err, get_bdry_bases, lstsq_qr
+
+
+class TestBoundaryConditions(unittest.TestCase):
+    """Tests boundary condition functions"""
+
+    def test_lstsq_qr(self):
+        """Tests QR least squares against the pseudo-inverse
+        """
+        A = np.random.random((20, 6))
+        b = np.random.random((20, 2))
+        np.testing.assert_allclose(lstsq_qr(A, b), np.linalg.pinv(A) @ b, atol=1e-8)
+        # underdetermined
+        np.testing.assert_allclose(lstsq_qr(A.T, b[:6]), np.linalg.pinv(A.T) @ b[:6],
+                                   atol=1e-8)
+        # rank deficient, sin(4*theta) vanishes on 8 equally spaced nodes
+        theta = np.linspace(0, 2*np.pi, 8, endpoint=False)
+        A = np.sin(np.arange(1, 5)[np.newaxis]*theta[:, np.newaxis])
+        b = np.sin(theta) + 0.5*np.sin(3*theta)
+        np.testing.assert_allclose(lstsq_qr(A, b), np.linalg.pinv(A) @ b, atol=1e-8)
+        # near singular, directions with singular values below the cutoff are
+        # truncated as by pinv
+        U, _ = np.linalg.qr(np.random.random((20, 6)))
+        V, _ = np.linalg.qr(np.random.random((6, 6)))
+        A = np.dot(U*np.array([1, 1e-2, 1e-5, 1e-7, 1e-10, 0]), V.T)
+        b = np.random.random((20,))
+        x = lstsq_qr(A, b)
+        np.testing.assert_allclose(x, np.linalg.pinv(A, rcond=1e-6) @ b, rtol=1e-6)
+        np.testing.assert_allclose(np.dot(V[:, 3:].T, x), 0, atol=1e-6)
+
+    def test_bdry_err(self):
+        """Tests boundary error against a pseudo-inverse fit of the LCFS
+        """
+        grid = LinearGrid(M=9, N=7, NFP=2, sym=True)
+        R_basis = FourierZernikeBasis(M=3, N=2, NFP=2, sym=Tristate(True))
+        Z_basis = FourierZernikeBasis(M=3, N=2, NFP=2, sym=Tristate(False))
+        L_basis = DoubleFourierSeries(M=3, N=2, NFP=2, sym=Tristate(False))
+        R1_transform = Transform(grid, R_basis)
+        Z1_transform = Transform(grid, Z_basis)
+        L_transform = Transform(grid, L_basis)
+
+        cR = np.random.random((R_basis.num_modes,))
+        cZ = np.random.random((Z_basis.num_modes,))
+        cL = 0.01*np.random.random((L_basis.num_modes,))
+
+        Rb_basis, Zb_basis, Rb_mask, Zb_mask = get_bdry_bases(3, 2, 2, False)
+        nodes = grid.nodes.copy()
+        nodes[:, 1] -= L_transform.transform(cL)
+        cRb = np.linalg.pinv(Rb_basis.evaluate(nodes)) @ R1_transform.transform(cR)
+        cZb = np.linalg.pinv(Zb_basis.evaluate(nodes)) @ Z1_transform.transform(cZ)
+
+        errR, errZ = compute_bdry_err(cR, cZ, cL, cRb, cZb, R1_transform,
+                                      Z1_transform, L_transform, 1.0)
+        np.testing.assert_allclose(errR, 0, atol=1e-8)
+        np.testing.assert_allclose(errZ, 0, atol=1e-8)
+
+        # the axisymmetric modes are not scaled by the boundary ratio
+        errR, errZ = compute_bdry_err(cR, cZ, cL, cRb, cZb, R1_transform,
+                                      Z1_transform, L_transform, 0.0)
+        np.testing.assert_allclose(errR, np.where(Rb_mask, cRb, 0), atol=1e-8)
+        np.testing.assert_allclose(errZ, np.where(Zb_mask, cZb, 0), atol=1e-8)
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+
+from desc.grid import ConcentricGrid
+from desc.basis import PowerSeries, FourierZernikeBasis
+from desc.transform import Transform
+from desc.configuration import LazyDict, get_derivatives
+from desc.objective_funs import compute_force_error_nodes, EQUIL_QUANTITIES
+
+
+class TestComputeFunctions(unittest.TestCase):
+    """Tests computing only the quantities and derivatives that are needed"""
+
+    def test_lazy_dict(self):
+        """Tests that quantities are only computed once, when accessed"""
+        calls = []
+        d = LazyDict()
+        d['a'] = lambda: calls.append('a') or np.arange(3.0)
+        d['b'] = lambda: calls.append('b') or 2*d['a']
+        d.put('b', np.array([0]), lambda: -1)
+        self.assertEqual(calls, [])
+        self.assertTrue('b' in d)
+        self.assertEqual(calls, [])
+
+        np.testing.assert_allclose(d['b'], [-1, 2, 4], atol=1e-8)
+        np.testing.assert_allclose(d['b'], [-1, 2, 4], atol=1e-8)
+        self.assertEqual(calls, ['b', 'a'])
+        self.assertEqual(list(d.keys()), ['a', 'b'])
+
+    def test_get_derivatives(self):
+        """Tests the derivatives needed for some quantities"""
+        np.testing.assert_allclose(get_derivatives(['g']),
+                                   [[0, 0, 0], [1, 0, 0], [0, 1, 0]], atol=1e-8)
+        np.testing.assert_allclose(get_derivatives(['|B|']),
+                                   [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], atol=1e-8)
+        # the current needs the second derivatives, and the third at the axis
+        self.assertEqual(np.max(np.sum(get_derivatives(['J^rho']), axis=1)), 2)
+        self.assertEqual(np.max(np.sum(get_derivatives(['J^rho'], axis=True), axis=1)), 4)
+        with self.assertRaises(ValueError):
+            get_derivatives(['foo'])
+
+    def test_force_error_derivatives(self):
+        """Tests the force error with only the derivatives it needs"""
+        R_basis = FourierZernikeBasis(M=3, N=1, NFP=2)
+        Z_basis = FourierZernikeBasis(M=3, N=1, NFP=2)
+        P_basis = PowerSeries(L=2)
+        I_basis = PowerSeries(L=2)
+        cR = np.zeros((R_basis.num_modes,))
+        cZ = np.zeros((Z_basis.num_modes,))
+        cR[R_basis.get_idx(0, 0, 0)] = 10
+        cR[R_basis.get_idx(1, 1, 0)] = 1
+        cR[R_basis.get_idx(2, 2, 1)] = 0.05
+        cZ[Z_basis.get_idx(1, -1, 0)] = -1
+        cZ[Z_basis.get_idx(2, -2, -1)] = 0.05
+        cP = np.array([1e3, 0, -1e3])
+        cI = np.array([1, 0, 0.2])
+
+        for axis in [False, True]:
+            grid = ConcentricGrid(M=4, N=2, NFP=2, axis=axis)
+            P_transform = Transform(grid, P_basis, derivs=1)
+            I_transform = Transform(grid, I_basis, derivs=1)
+            derivatives = get_derivatives(EQUIL_QUANTITIES['force'], axis=axis)
+            self.assertEqual(len(derivatives), 17 if axis else 10)
+
+            f_all = compute_force_error_nodes(
+                cR, cZ, cP, cI, 1.0, Transform(grid, R_basis, derivs=3),
+                Transform(grid, Z_basis, derivs=3), P_transform, I_transform, 1.0, 1.0)
+            f = compute_force_error_nodes(
+                cR, cZ, cP, cI, 1.0, Transform(grid, R_basis, derivs=derivatives),
+                Transform(grid, Z_basis, derivs=derivatives), P_transform, I_transform, 1.0, 1.0)
+            np.testing.assert_allclose(f, f_all, atol=1e-8)
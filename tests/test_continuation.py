@@ -1,5 +1,54 @@
 import unittest
+import numpy as np
+import scipy.optimize
+
+from desc.grid import LinearGrid, ConcentricGrid
+from desc.transform import Transform
+from desc.configuration import Equilibrium, get_derivatives
+from desc.objective_funs import ObjectiveFunctionFactory, EQUIL_QUANTITIES
+from desc.continuation import solve_eq_batch
 
 
 class TestContinuation(unittest.TestCase):
     """tests for continuation functions"""
+
+    def test_solve_eq_batch(self):
+        """Tests a batch of Solov'ev equilibria against individual solves"""
+        bdry = np.array([[0, 0, 3.999, 0], [1, 0, 1.026, 0], [-1, 0, 0, 1.58],
+                         [2, 0, -0.068, 0], [-2, 0, 0, 0.01]])
+        inputs = {'L': 0, 'M': 4, 'N': 0, 'cP': np.array([0.125, 0, -0.125]),
+                  'cI': np.array([1.0, 0, 0]), 'Psi': 1.0, 'NFP': 1, 'bdry': bdry,
+                  'sym': True, 'index': 'ansi', 'bdry_mode': 'spectral',
+                  'bdry_ratio': 1.0, 'axis': np.array([[0, 4.0, 0]]),
+                  'output_path': None}
+        equil = Equilibrium(inputs=inputs)
+
+        RZ_grid = ConcentricGrid(8, 0, NFP=1, sym=True, axis=False, index='ansi',
+                                 surfs='cheb2')
+        L_grid = LinearGrid(M=8, N=1, NFP=1, sym=True)
+        derivatives = get_derivatives(EQUIL_QUANTITIES['force'], axis=False)
+        obj_fun = ObjectiveFunctionFactory.get_equil_obj_fun(
+            'force', scalar=False,
+            R_transform=Transform(RZ_grid, equil.R_basis, derivs=derivatives),
+            Z_transform=Transform(RZ_grid, equil.Z_basis, derivs=derivatives),
+            R1_transform=Transform(L_grid, equil.R_basis),
+            Z1_transform=Transform(L_grid, equil.Z_basis),
+            L_transform=Transform(L_grid, equil.L_basis),
+            P_transform=Transform(RZ_grid, equil.P_basis, derivs=1),
+            I_transform=Transform(RZ_grid, equil.I_basis, derivs=1))
+
+        # vacuum and finite pressure
+        cP = np.array([0*equil.cP, equil.cP])
+        out = solve_eq_batch(obj_fun, equil.x, equil.cRb, equil.cZb, cP, equil.cI,
+                             equil.Psi, errr_ratio=1e-5, ftol=1e-6, xtol=1e-6,
+                             gtol=1e-6, nfev=200, verbose=0)
+        np.testing.assert_array_equal(out['success'], True)
+
+        for i in range(2):
+            args = (equil.cRb, equil.cZb, cP[i], equil.cI, equil.Psi,
+                    1.0, 1.0, 1.0, 1e-5)
+            ref = scipy.optimize.least_squares(obj_fun.compute, equil.x, args=args,
+                                               method='lm', ftol=1e-6, xtol=1e-6,
+                                               gtol=1e-6)
+            self.assertLessEqual(out['cost'][i], ref.cost*(1 + 1e-4))
+            np.testing.assert_allclose(out['cost'][i], ref.cost, rtol=1e-3)
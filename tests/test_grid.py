@@ -62,3 +62,30 @@ class TestGrid(unittest.TestCase):
                                       grid_fringe.volumes[:, 1]*
                                       grid_fringe.volumes[:, 2]),
                                (2*np.pi)**2/NFP)
+
+    def test_symmetry(self):
+
+        M = 8
+        N = 5
+        NFP = 3
+
+        grid = LinearGrid(M=M, N=N, NFP=NFP, sym=True)
+        t = grid.nodes[:, 1]
+        z = grid.nodes[:, 2]
+
+        # theta in [0,pi], and zeta in [0,pi/NFP] on the lines theta = 0,pi
+        self.assertTrue(np.all(t <= np.pi))
+        on_line = np.isclose(t, 0) | np.isclose(t, np.pi)
+        self.assertTrue(np.all(z[on_line] <= np.pi/NFP))
+        self.assertEqual(grid.num_nodes, 21)
+
+        self.assertAlmostEqual(np.sum(grid.volumes[:, 0]*
+                                      grid.volumes[:, 1]*
+                                      grid.volumes[:, 2]),
+                               (2*np.pi)**2/NFP)
+
+        grid = ConcentricGrid(M=6, N=3, NFP=2, sym=True, axis=False)
+        self.assertAlmostEqual(np.sum(grid.volumes[:, 0]*
+                                      grid.volumes[:, 1]*
+                                      grid.volumes[:, 2]),
+                               (2*np.pi)**2/2)
@@ -1,6 +1,7 @@
 import unittest
 import os
 import pathlib
+import tempfile
 import h5py
 from desc.input_reader import InputReader
 from desc.equilibrium_io import hdf5Writer, hdf5Reader
@@ -53,7 +54,7 @@ class TestInputReader(unittest.TestCase):
         self.assertEqual(os.environ['DESC_USE_NUMPY'], '', 'numpy environment '
             'variable incorrect with default argument')
         self.assertFalse(ir.args.version, 'version is not default False')
-        self.assertEqual(len(ir.inputs), 28, 'number of inputs does not match '
+        self.assertEqual(len(ir.inputs), 29, 'number of inputs does not match '
 
             'number expected in MIN_INPUT')
         # test equality of arguments
@@ -87,7 +88,8 @@ class MockObject:
 class Testhdf5Writer(unittest.TestCase):
 
     def setUp(self):
-        self.filename = 'writer_test_file'
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'writer_test_file')
         self.file_mode = 'w'
 
     def test_given_filename(self):
@@ -155,10 +157,14 @@ class Testhdf5Writer(unittest.TestCase):
             self.assertTrue(key in initial.keys())
         f.close()
 
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
 class Testhdf5Reader(unittest.TestCase):
 
     def setUp(self):
-        self.filename = 'reader_test_file'
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'reader_test_file')
         self.file_mode = 'r'
         self.thedict = {'a':'a', 'b':'b', 'c':'c'}
         f = h5py.File(self.filename, 'w')
@@ -233,3 +239,6 @@ class Testhdf5Reader(unittest.TestCase):
 
     def test_load_equilibrium(self):
         pass
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
@@ -2,7 +2,16 @@ import unittest
 import numpy as np
 
 from desc.backend import jnp
-from desc.jacobian import AutoDiffJacobian, FiniteDiffJacobian
+from desc.jacobian import AutoDiffJacobian, FiniteDiffJacobian, MatrixFreeJacobian
+
+
+def banded_fun(x, a):
+    """Vectorized function with a tridiagonal jacobian"""
+    x = np.atleast_2d(x)
+    f = a*x**2
+    f[:, 1:] += x[:, :-1]
+    f[:, :-1] -= np.sin(x[:, 1:])
+    return np.squeeze(f)
 
 
 class TestJacobian(unittest.TestCase):
@@ -73,3 +82,117 @@ class TestJacobian(unittest.TestCase):
         J_FD = jac_FD.compute(x, y, a)
 
         np.testing.assert_allclose(J_FD, J_AD, atol=1e-8)
+
+    def test_matrix_free(self):
+
+        def test_fun(x, y, a):
+            return jnp.cos(x) + x*y + a
+
+        x = np.array([1, 5, 0.01, 200])
+        y = np.array([60, 1, 100, 0.02])
+        a = -2
+        v = np.array([1, -2, 3, 0.5])
+
+        jac_AD = AutoDiffJacobian(test_fun, argnum=0)
+        J_AD = jac_AD.compute(x, y, a)
+
+        jac_MF = MatrixFreeJacobian(test_fun, argnum=0)
+        J_MF = jac_MF.compute(x, y, a)
+
+        np.testing.assert_allclose(J_MF.matvec(v), J_AD @ v, atol=1e-8)
+        np.testing.assert_allclose(J_MF.rmatvec(v), J_AD.T @ v, atol=1e-8)
+
+    def test_finite_diff_argnums(self):
+
+        def test_fun(x, y, a):
+            return x*y + a*x
+
+        x = np.array([1, 5, 0.01, 200])
+        y = np.array([60, 1, 100, 0.02])
+        a = -2.0
+
+        jac = FiniteDiffJacobian(test_fun, argnum=(1, 2))
+        J = jac.compute(x, y, a)
+        correct_J = np.hstack([np.diag(x), x[:, np.newaxis]])
+
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+
+    def test_finite_diff_batched(self):
+
+        x = np.linspace(-1, 2, 9)
+        a = 3.0
+        correct_J = FiniteDiffJacobian(banded_fun).compute(x, a)
+
+        J = FiniteDiffJacobian(banded_fun, vectorized=True).compute(x, a)
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+
+        jac = FiniteDiffJacobian(banded_fun, processes=2)
+        J = jac.compute(x, a)
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+        # the pool of processes is reused between calls
+        executor = jac._FiniteDiffJacobian__executor
+        J = jac.compute(x, a)
+        self.assertIs(jac._FiniteDiffJacobian__executor, executor)
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+        jac.close()
+        self.assertIsNone(jac._FiniteDiffJacobian__executor)
+
+    def test_finite_diff_sparsity(self):
+
+        x = np.linspace(-1, 2, 9)
+        a = 3.0
+        sparsity = np.abs(np.subtract.outer(np.arange(9), np.arange(9))) <= 1
+        correct_J = FiniteDiffJacobian(banded_fun).compute(x, a)
+
+        calls = []
+        def counted_fun(x, a):
+            calls.append(x)
+            return banded_fun(x, a)
+
+        jac = FiniteDiffJacobian(counted_fun, sparsity=sparsity)
+        J = jac.compute(x, a)
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+        # a tridiagonal pattern needs 3 groups of columns
+        self.assertEqual(len(calls), 1 + 2*3)
+
+        jac = FiniteDiffJacobian(banded_fun, vectorized=True, sparsity=sparsity)
+        J = jac.compute(x, a)
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+
+    def test_auto_diff_chunked(self):
+
+        def test_fun(x, y, a):
+            return jnp.cos(x) + x*y + a
+
+        x = np.array([1, 5, 0.01, 200, -3])
+        y = np.array([60, 1, 100, 0.02, 4])
+        a = -2.0
+
+        correct_J = AutoDiffJacobian(test_fun, argnum=0).compute(x, y, a)
+        for chunk_size in [1, 2, 5, 'auto']:
+            jac = AutoDiffJacobian(test_fun, argnum=0, chunk_size=chunk_size)
+            J = jac.compute(x, y, a)
+            np.testing.assert_allclose(J, correct_J, atol=1e-8)
+
+        jac = AutoDiffJacobian(test_fun, argnum=(0, 2), chunk_size=2)
+        J = jac.compute(x, y, a)
+        correct_J = np.hstack([np.diag(y - np.sin(x)), np.ones((5, 1))])
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
+
+        with self.assertRaises(ValueError):
+            AutoDiffJacobian(test_fun, chunk_size=0)
+
+    def test_auto_diff_argnums(self):
+
+        def test_fun(x, y, a):
+            return jnp.cos(x) + x*y + a*x
+
+        x = np.array([1, 5, 0.01, 200])
+        y = np.array([60, 1, 100, 0.02])
+        a = -2.0
+
+        jac = AutoDiffJacobian(test_fun, argnum=(0, 2))
+        J = jac.compute(x, y, a)
+        correct_J = np.hstack([np.diag(-np.sin(x) + y + a), x[:, np.newaxis]])
+
+        np.testing.assert_allclose(J, correct_J, atol=1e-8)
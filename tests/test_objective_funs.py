@@ -4,7 +4,7 @@ import numpy as np
 from desc.grid import LinearGrid, ConcentricGrid
 from desc.basis import PowerSeries, DoubleFourierSeries, FourierZernikeBasis
 from desc.transform import Transform
-from desc.objective_funs import is_nested, curve_self_intersects
+from desc.objective_funs import is_nested, compute_nested, curve_self_intersects
 from desc.objective_funs import ObjectiveFunctionFactory, ForceErrorNodes, AccelErrorSpectral
 
 
@@ -44,6 +44,40 @@ class TestIsNested(unittest.TestCase):
 """
 
 
+class TestNested(unittest.TestCase):
+    """Tests flux surface nesting checks"""
+
+    def test_is_nested(self):
+        """Tests nesting of circular and self intersecting surfaces"""
+        basis = FourierZernikeBasis(M=2, N=0)
+        # R = 10 + rho*cos(theta), Z = -rho*sin(theta)
+        cR = np.array([0, 0, 10, 0, 1, 0])
+        cZ = np.array([0, -1, 0, 0, 0, 0])
+        self.assertTrue(is_nested(cR, cZ, basis, basis))
+        self.assertTrue(is_nested(cR, -cZ, basis, basis))
+
+        cR[5] = 5
+        self.assertFalse(is_nested(cR, cZ, basis, basis))
+
+    def test_compute_nested(self):
+        """Tests nesting check with precomputed transforms over several planes"""
+        basis = FourierZernikeBasis(M=2, N=1, NFP=2)
+        grid = LinearGrid(L=5, M=31, N=3, NFP=2, rho=np.linspace(0.2, 1, 5))
+        R_transform = Transform(grid, basis, derivs=1)
+        Z_transform = Transform(grid, basis, derivs=1)
+
+        cR = np.zeros((basis.num_modes,))
+        cZ = np.zeros((basis.num_modes,))
+        cR[np.where((basis.modes == [0, 0, 0]).all(axis=1))[0]] = 10
+        cR[np.where((basis.modes == [1, 1, 0]).all(axis=1))[0]] = 1
+        cZ[np.where((basis.modes == [1, -1, 0]).all(axis=1))[0]] = -1
+        self.assertTrue(compute_nested(cR, cZ, R_transform, Z_transform))
+
+        # surfaces only intersect in the planes away from zeta = 0
+        cR[np.where((basis.modes == [2, 2, -1]).all(axis=1))[0]] = 5
+        self.assertFalse(compute_nested(cR, cZ, R_transform, Z_transform))
+
+
 class TestObjectiveFunctionFactory(unittest.TestCase):
     """Test basic functionality of ObjectiveFunctionFactory"""
 
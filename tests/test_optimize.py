@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+from desc.backend import vmap
+from desc.optimize import lsq_lm_batch, _lm_step_
+
+
+def rosenbrock(x, a, b):
+    return np.array([a - x[0], np.sqrt(b)*(x[1] - x[0]**2)])
+
+
+def rosenbrock_jac(x, a, b):
+    return np.array([[-1.0, 0.0], [-2*np.sqrt(b)*x[0], np.sqrt(b)]])
+
+
+class TestOptimize(unittest.TestCase):
+    """Tests batched optimizers"""
+
+    def test_vmap(self):
+        """Tests vectorized map over mapped and unmapped arguments
+        """
+        fun = vmap(lambda x, y: x*y + 1, in_axes=(0, None))
+        x = np.arange(6).reshape((3, 2))
+        np.testing.assert_allclose(fun(x, 2.0), 2*x + 1, atol=1e-8)
+
+    def test_vmap_tuple(self):
+        """Tests vectorized map of a function with several outputs
+        """
+        fun = vmap(lambda x: (x.sum(), 2*x))
+        x = np.arange(6).reshape((3, 2))
+        s, y = fun(x)
+        np.testing.assert_allclose(s, x.sum(axis=1), atol=1e-8)
+        np.testing.assert_allclose(y, 2*x, atol=1e-8)
+
+    def test_lm_step_float32(self):
+        """Tests that single precision steps are accurate for ill-conditioned jacobians
+        """
+        rng = np.random.default_rng(0)
+        U, _ = np.linalg.qr(rng.normal(size=(20, 5)))
+        V, _ = np.linalg.qr(rng.normal(size=(5, 5)))
+        J = np.dot(U*np.logspace(0, -4, 5), V.T)   # condition number 1e4
+        f = rng.normal(size=(20,))
+        dx_ref = -np.linalg.lstsq(J, f, rcond=None)[0]
+
+        dx, pred, gnorm = _lm_step_(J[np.newaxis].astype(np.float32),
+                                    f[np.newaxis].astype(np.float32),
+                                    np.array([1e-12], dtype=np.float32))
+        # the normal equations square the condition number to 1e8, which
+        # leaves no significant digits in single precision
+        np.testing.assert_allclose(dx[0], dx_ref, rtol=1e-2, atol=1e-2*np.abs(dx_ref).max())
+        self.assertGreater(pred[0], 0)
+
+    def test_lsq_lm_batch(self):
+        """Tests batched Levenberg-Marquardt on Rosenbrock problems
+        """
+        a = np.array([1.0, 2.0, -1.0, 0.5])
+        b = np.array([100.0, 10.0, 1.0, 50.0])
+        x0 = np.array([[-1.2, 1.0], [0.0, 0.0], [1.0, 1.0], [2.0, -1.0]])
+        fun = vmap(rosenbrock)
+        jac = vmap(rosenbrock_jac)
+
+        out = lsq_lm_batch(fun, jac, x0, args=(a, b), ftol=1e-12, xtol=1e-12,
+                           gtol=1e-12, max_nfev=1000)
+        np.testing.assert_array_equal(out['success'], True)
+        np.testing.assert_allclose(out['x'], np.array([a, a**2]).T, atol=1e-8)
+        np.testing.assert_allclose(out['cost'], 0, atol=1e-8)
+
+    def test_lsq_lm_batch_converged(self):
+        """Tests that problems which have converged are left alone while
+        the rest of the batch is still being solved
+        """
+        a = np.array([1.0, 1.0])
+        b = np.array([1e4, 1e4])
+        x0 = np.array([[1.0, 1.0], [-1.2, 1.0]])
+        fun = vmap(rosenbrock)
+        jac = vmap(rosenbrock_jac)
+
+        # the damping of a converged problem used to grow until it overflowed
+        with np.errstate(over='raise', invalid='raise'):
+            out = lsq_lm_batch(fun, jac, x0, args=(a, b), ftol=0, xtol=0,
+                               gtol=0, max_nfev=200)
+        self.assertEqual(out['status'][0], 1)
+        np.testing.assert_allclose(out['x'], np.array([a, a**2]).T, atol=1e-8)
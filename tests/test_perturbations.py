@@ -1,7 +1,14 @@
 import unittest
 import numpy as np
+from scipy.sparse.linalg import aslinearoperator
 from desc.backend import jnp
-from desc.perturbations import perturb_continuation_params
+from desc.perturbations import perturb_continuation_params, get_system_derivatives
+
+
+def quadratic_fun(x, a0, a1, a2, a3, a4, c0, c1, c2, c3):
+    """test function defined at module level, so it can be sent to other processes"""
+    A = jnp.array([[2.0, 1.0], [-1.0, 3.0]])
+    return jnp.dot(A, x) + c0*jnp.array([1.0, -2.0]) + c1*x**2 - a0
 
 
 class TestPerturbations(unittest.TestCase):
@@ -76,3 +83,120 @@ class TestPerturbations(unittest.TestCase):
             np.argsort(err[0, :]), np.linspace(0, n-1, n), atol=1e-8)
         np.testing.assert_allclose(
             np.argsort(err[1, :]), np.linspace(0, n-1, n), atol=1e-8)
+
+    def test_perturb_given_jacobian(self):
+        """Tests perturbing with a given jacobian and its SVD"""
+
+        A = np.array([[2.0, 1.0], [-1.0, 3.0]])
+        b = np.array([1.0, -2.0])
+
+        def test_fun(x, a0, a1, a2, a3, a4, c0, c1, c2, c3):
+            return jnp.dot(A, x) + c0*b + c1*x**2 - a0
+
+        x = np.array([0.5, -0.25])
+        args = [1.0, 0, 0, 0, 0, 0.5, 0.2, 0, 0]
+        deltas = np.array([0.1, -0.05, 0, 0])
+        Jx = A + 2*args[6]*np.diag(x)
+
+        for pert_order in [1, 2]:
+            y, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0)
+            y_Jx, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0, Jx=Jx)
+            y_svd, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0,
+                Jx_svd=np.linalg.svd(Jx, full_matrices=False))
+            np.testing.assert_allclose(y_Jx, y, atol=1e-6)
+            np.testing.assert_allclose(y_svd, y_Jx, atol=1e-8)
+
+    def test_perturb_matrix_free(self):
+        """Tests perturbing with a jacobian that is only given as an operator"""
+
+        A = np.array([[2.0, 1.0], [-1.0, 3.0], [0.5, 0.5]])
+        b = np.array([1.0, -2.0, 0.5])
+
+        def test_fun(x, a0, a1, a2, a3, a4, c0, c1, c2, c3):
+            return jnp.dot(A, x) + c0*b + c1*jnp.dot(A, x**2) - a0
+
+        x = np.array([0.5, -0.25])
+        args = [1.0, 0, 0, 0, 0, 0.5, 0.2, 0, 0]
+        deltas = np.array([0.1, -0.05, 0, 0])
+        Jx = A + 2*args[6]*A*x
+
+        for pert_order in [1, 2]:
+            y, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0, Jx=Jx)
+            y_op, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0,
+                Jx=aslinearoperator(Jx))
+            np.testing.assert_allclose(y_op, y, atol=1e-8)
+
+    def test_perturb_matrix_free_ill_conditioned(self):
+        """Tests that dense and matrix-free perturbations agree for an
+        ill-conditioned jacobian, to the accuracy of the LSMR iterations"""
+
+        rng = np.random.default_rng(0)
+        U, _ = np.linalg.qr(rng.normal(size=(30, 8)))
+        V, _ = np.linalg.qr(rng.normal(size=(8, 8)))
+        A = np.dot(U*np.logspace(0, -3, 8), V.T)   # condition number 1e3
+        b = rng.normal(size=(30,))
+
+        def test_fun(x, a0, a1, a2, a3, a4, c0, c1, c2, c3):
+            return jnp.dot(A, x) + c0*b + c1*jnp.dot(A, x**2) - a0
+
+        x = 0.1*rng.normal(size=(8,))
+        args = [1.0, 0, 0, 0, 0, 0.5, 0.2, 0, 0]
+        deltas = np.array([0.1, -0.05, 0, 0])
+        Jx = A + 2*args[6]*A*x
+
+        for pert_order in [1, 2]:
+            y, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0, Jx=Jx)
+            y_op, timer = perturb_continuation_params(
+                x, test_fun, deltas, args, pert_order=pert_order, verbose=0,
+                Jx=aslinearoperator(Jx))
+            # LSMR stops at a relative residual of 1e-10, amplified by the
+            # condition number
+            np.testing.assert_allclose(y_op - x, y - x, rtol=1e-6,
+                                       atol=1e-6*np.max(np.abs(y - x)))
+
+    def test_perturb_processes(self):
+        """Tests that splitting the jacobians across processes gives the same result"""
+
+        x = np.array([0.5, -0.25])
+        args = [1.0, 0, 0, 0, 0, 0.5, 0.2, 0, 0]
+        deltas = np.array([0.1, -0.05, 0, 0])
+
+        for pert_order in [1, 2]:
+            y, timer = perturb_continuation_params(
+                x, quadratic_fun, deltas, args, pert_order=pert_order, verbose=0)
+            y_proc, timer = perturb_continuation_params(
+                x, quadratic_fun, deltas, args, pert_order=pert_order, verbose=0,
+                processes=2)
+            np.testing.assert_allclose(y_proc, y, atol=1e-10)
+
+    def test_system_derivatives_2nd_order(self):
+        """Tests the products with the hessians against dense hessians"""
+
+        def test_fun(x, c, d):
+            return jnp.array([x[0]**2*c[0] + x[1]*c[1]**2 + d[0]*x[0],
+                              x[0]*x[1]*c[2] + c[0]*c[1] - d[0]**2])
+
+        x = np.array([1.0, -0.5])
+        c = np.array([0.5, 2.0, -1.0])
+        d = np.array([0.3])
+        Jx, Jc, Jxx, Jcc, Jxc = get_system_derivatives(
+            test_fun, (x, c, d), {1: np.array([0, 2]), 2: np.array([0])}, pert_order=2)
+
+        # exact hessians wrt x and (c[0], c[2], d)
+        Hxx = np.array([[[2*c[0], 0], [0, 0]],
+                        [[0, c[2]], [c[2], 0]]])
+        Hcc = np.array([[[0, 0, 0], [0, 0, 0], [0, 0, 0]],
+                        [[0, 0, 0], [0, 0, 0], [0, 0, -2]]])
+        Hxc = np.array([[[2*x[0], 0, 1], [0, 0, 0]],
+                        [[0, x[1], 0], [0, x[0], 0]]])
+        u = np.array([0.7, -1.2])
+        v = np.array([0.4, 1.5, -0.8])
+        np.testing.assert_allclose(Jxx(u, u), np.einsum('fij,i,j', Hxx, u, u), atol=1e-6)
+        np.testing.assert_allclose(Jcc(v, v), np.einsum('fij,i,j', Hcc, v, v), atol=1e-6)
+        np.testing.assert_allclose(Jxc(u, v), np.einsum('fij,i,j', Hxc, u, v), atol=1e-6)
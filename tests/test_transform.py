@@ -1,9 +1,10 @@
 import unittest
+import tempfile
 import numpy as np
 
-from desc.grid import LinearGrid, ConcentricGrid
+from desc.grid import Grid, LinearGrid, ConcentricGrid
 from desc.basis import PowerSeries, DoubleFourierSeries, FourierZernikeBasis
-from desc.transform import Transform
+from desc.transform import Transform, TransformCache, transform_cache
 
 
 class TestTransform(unittest.TestCase):
@@ -137,6 +138,202 @@ class TestTransform(unittest.TestCase):
 
         np.testing.assert_allclose(values, correct_vals, atol=1e-8)
 
+    def test_fft(self):
+        """Tests the FFT method against the direct method
+        """
+        grid = ConcentricGrid(M=4, N=3, NFP=3, sym=True)
+        basis = FourierZernikeBasis(M=3, N=3, NFP=3, sym=True)
+        transf_direct = Transform(grid, basis, derivs=2, method='direct')
+        transf_fft = Transform(grid, basis, derivs=2, method='fft')
+
+        c = np.random.random((basis.num_modes,))
+
+        for d in transf_direct.derivatives:
+            np.testing.assert_allclose(transf_fft.transform(c, *d),
+                                       transf_direct.transform(c, *d), atol=1e-8)
+
+        # not enough toroidal planes, falls back to the direct method
+        grid = LinearGrid(M=7, N=3)
+        with self.assertWarns(UserWarning):
+            transf_fft = Transform(grid, basis, method='fft')
+        transf_direct = Transform(grid, basis, method='direct')
+        np.testing.assert_allclose(transf_fft.transform(c),
+                                   transf_direct.transform(c), atol=1e-8)
+
+    def test_factored(self):
+        """Tests the factored method against the direct method
+        """
+        grid = ConcentricGrid(M=4, N=3, NFP=3, sym=True)
+        basis = FourierZernikeBasis(M=3, N=3, NFP=3, sym=True)
+        transf_direct = Transform(grid, basis, derivs=2, method='direct')
+        transf_factored = Transform(grid, basis, derivs=2, method='factored')
+
+        c = np.random.random((basis.num_modes,))
+
+        for d in transf_direct.derivatives:
+            np.testing.assert_allclose(transf_factored.transform(c, *d),
+                                       transf_direct.transform(c, *d), atol=1e-8)
+        x = transf_direct.transform(c)
+        np.testing.assert_allclose(transf_factored.fit(x), transf_direct.fit(x), atol=1e-8)
+
+        # nodes that are not a tensor product in zeta
+        class ScatteredGrid(Grid):
+            def change_resolution(self):
+                pass
+        grid = ScatteredGrid(np.random.random((50, 3))*np.array([1, 2*np.pi, 2*np.pi/3]))
+        transf_direct = Transform(grid, basis, derivs=1, method='direct')
+        transf_factored = Transform(grid, basis, derivs=1, method='factored')
+        for d in transf_direct.derivatives:
+            np.testing.assert_allclose(transf_factored.transform(c, *d),
+                                       transf_direct.transform(c, *d), atol=1e-8)
+
+        # 1D and 2D bases
+        grid = LinearGrid(L=5, M=4, N=2)
+        for basis in [PowerSeries(L=3), DoubleFourierSeries(M=2, N=1)]:
+            transf_direct = Transform(grid, basis, derivs=1, method='direct')
+            transf_factored = Transform(grid, basis, derivs=1, method='factored')
+            c = np.random.random((basis.num_modes,))
+            for d in transf_direct.derivatives:
+                np.testing.assert_allclose(transf_factored.transform(c, *d),
+                                           transf_direct.transform(c, *d), atol=1e-8)
+
+    def test_reduced(self):
+        """Tests evaluating the basis at the unique coordinates and modes
+        against the full basis at each node
+        """
+        # profile on a grid with repeated rho
+        grid = ConcentricGrid(M=4, N=2, NFP=2)
+        basis = PowerSeries(L=4)
+        c = np.random.random((basis.num_modes,))
+        transf = Transform(grid, basis, derivs=1)
+        A = transf.matrices[1][0][0]
+        self.assertEqual(A['matrix'].shape, (np.unique(grid.nodes[:, 0]).size, basis.num_modes))
+        for d in [[0, 0, 0], [1, 0, 0]]:
+            np.testing.assert_allclose(transf.transform(c, *d),
+                                       basis.evaluate(grid.nodes, d) @ c, atol=1e-8)
+
+        # surface of constant rho
+        grid = LinearGrid(M=7, N=5, NFP=2, rho=np.array(1.0))
+        basis = FourierZernikeBasis(M=3, N=2, NFP=2)
+        c = np.random.random((basis.num_modes,))
+        transf = Transform(grid, basis, derivs=1)
+        A = transf.matrices[0][0][0]
+        num_mn = np.unique(basis.modes[:, 1:], axis=0).shape[0]
+        self.assertEqual(A['matrix'].shape, (grid.num_nodes, num_mn))
+        self.assertEqual(A['weights'].shape, (num_mn, basis.num_modes))
+        x = transf.transform_all(c)
+        for i, d in enumerate(transf.derivatives):
+            np.testing.assert_allclose(x[i], basis.evaluate(grid.nodes, d) @ c, atol=1e-8)
+        # modes that only differ in l are degenerate on the surface
+        x = transf.transform(c)
+        np.testing.assert_allclose(transf.transform(transf.fit(x)), x, atol=1e-8)
+
+    def test_dtype(self):
+        """Tests single precision transforms against double precision
+        """
+        grid = ConcentricGrid(M=4, N=3, NFP=3, sym=True)
+        basis = FourierZernikeBasis(M=3, N=3, NFP=3, sym=True)
+        c = np.random.random((basis.num_modes,))
+
+        for method in ['direct', 'fft', 'factored']:
+            transf_64 = Transform(grid, basis, derivs=1, method=method)
+            transf_32 = Transform(grid, basis, derivs=1, method=method, dtype=np.float32)
+            x_64 = transf_64.transform_all(c)
+            x_32 = transf_32.transform_all(c)
+            self.assertEqual(x_32.dtype, np.float32)
+            np.testing.assert_allclose(x_32, x_64, rtol=1e-5, atol=1e-5)
+
+            # back to double precision from the cached matrices
+            transf_32.dtype = np.float64
+            np.testing.assert_allclose(transf_32.transform_all(c), x_64, atol=1e-8)
+            np.testing.assert_allclose(transf_32.fit(x_64[0]), transf_64.fit(x_64[0]),
+                                       atol=1e-8)
+
+    def test_transform_all(self):
+        """Tests transforming all derivatives at once against each derivative
+        """
+        grid = ConcentricGrid(M=4, N=3, NFP=3, sym=True)
+        basis = FourierZernikeBasis(M=3, N=3, NFP=3, sym=True)
+        c = np.random.random((basis.num_modes,))
+        derivatives = np.array([[0, 0, 0], [1, 0, 1], [0, 2, 0], [0, 1, 2], [2, 0, 0]])
+
+        for method in ['direct', 'fft', 'factored']:
+            transf = Transform(grid, basis, derivs=2, method=method)
+            x = transf.transform_all(c)
+            self.assertEqual(x.shape, (len(transf.derivatives), grid.num_nodes))
+            for i, d in enumerate(transf.derivatives):
+                np.testing.assert_allclose(x[i], transf.transform(c, *d), atol=1e-8)
+            x = transf.transform_all(c, derivatives)
+            for i, d in enumerate(derivatives):
+                np.testing.assert_allclose(x[i], transf.transform(c, *d), atol=1e-8)
+
+        with self.assertRaises(ValueError):
+            transf.transform_all(c, np.array([[3, 0, 0]]))
+
+    def test_cache(self):
+        """Tests the transform matrix cache
+        """
+        grid = ConcentricGrid(M=3, N=2)
+        basis = FourierZernikeBasis(M=3, N=2)
+
+        transf_1 = Transform(grid, basis, derivs=1)
+        hits = transform_cache.hits
+        transf_2 = Transform(ConcentricGrid(M=3, N=2),
+                             FourierZernikeBasis(M=3, N=2), derivs=1)
+        # one stack of the matrices of all derivatives, and the pseudo-inverse
+        self.assertEqual(transform_cache.hits - hits, 2)
+        self.assertTrue(transf_1.matrices[1][0][0].base is transf_2.matrices[1][0][0].base)
+
+        # the matrices are views of the cached stack, not copies of it
+        transform_cache.clear()
+        transf_3 = Transform(grid, basis, derivs=1)
+        stack = transf_3.matrices[0][0][0].base
+        for d in transf_3.derivatives:
+            self.assertTrue(transf_3.matrices[d[0]][d[1]][d[2]].base is stack)
+        pinv_nbytes = basis.num_modes*grid.num_nodes*8
+        self.assertEqual(transform_cache.nbytes, stack.nbytes + pinv_nbytes)
+
+        # least recently used matrices are evicted
+        cache = TransformCache(max_bytes=3*8*100)
+        for i in range(4):
+            cache.put(cache.key(i), np.ones((10, 10)))
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get(cache.key(0)))
+        self.assertIsNotNone(cache.get(cache.key(3)))
+
+        # disk cache
+        with tempfile.TemporaryDirectory() as path:
+            cache = TransformCache(path=path)
+            key = cache.key(grid.nodes, basis.modes)
+            cache.put(key, transf_1.matrices[0][0][0])
+            cache.clear()
+            np.testing.assert_allclose(cache.get(key), transf_1.matrices[0][0][0])
+
+    def test_set_derivatives(self):
+        """Tests that adding derivatives only evaluates the new matrices
+        """
+        grid = ConcentricGrid(M=3, N=2)
+        basis = FourierZernikeBasis(M=3, N=2)
+        c = np.random.random((basis.num_modes,))
+        transform_cache.clear()
+
+        for dtype in [np.float64, np.float32]:
+            transf = Transform(grid, basis, derivs=0, dtype=dtype)
+            evaluated = []
+            evaluate = basis.evaluate
+            basis.evaluate = lambda nodes, derivatives, **kwargs: \
+                evaluated.append(derivatives) or evaluate(nodes, derivatives, **kwargs)
+            try:
+                transf.derivatives = 1
+            finally:
+                del basis.evaluate
+            self.assertEqual(len(evaluated), len(transf.derivatives) - 1)
+
+            transf_1 = Transform(grid, basis, derivs=1, dtype=dtype)
+            np.testing.assert_allclose(transf.transform_all(c), transf_1.transform_all(c),
+                                       atol=1e-6)
+            transform_cache.clear()
+
     def test_set_grid(self):
         """Tests the grid setter method
         """
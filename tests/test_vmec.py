@@ -0,0 +1,127 @@
+import unittest
+import numpy as np
+
+from desc.backend import Tristate
+from desc.grid import LinearGrid
+from desc.basis import DoubleFourierSeries, FourierZernikeBasis
+from desc.transform import Transform
+from desc.init_guess import get_initial_guess_vmec
+from desc.input_reader import InputReader
+from desc.vmec import VmecOutput, read_vmec_output, vmec_sfl_coords, vmec_transf, sfl_err
+
+
+class TestVMEC(unittest.TestCase):
+    """Tests VMEC interface functions"""
+
+    def test_vmec_output(self):
+        """Tests lazy reading of VMEC output against eager reading"""
+        fname = 'examples/VMEC/wout_HELIOTRON.nc'
+        vmec_data = read_vmec_output(fname)
+        with VmecOutput(fname) as file:
+            self.assertEqual(file['NFP'], vmec_data['NFP'])
+            self.assertEqual(file['sym'], vmec_data['sym'])
+            self.assertIn('bmnc', file)
+            self.assertNotIn('rmns', file)
+            with self.assertRaises(KeyError):
+                file['rmns']
+            np.testing.assert_allclose(file['rmnc'][[0, 10, -1]],
+                                       vmec_data['rmnc'][[0, 10, -1]], atol=1e-8)
+            np.testing.assert_allclose(file['lmns'][5, 2:4],
+                                       vmec_data['lmns'][5, 2:4], atol=1e-8)
+            np.testing.assert_allclose(file['bmnc'][-1].shape, file['xm_nyq'].shape)
+
+    def test_sfl_coords(self):
+        """Tests batched Newton solve for the VMEC poloidal angle"""
+        vmec_data = read_vmec_output('examples/VMEC/wout_HELIOTRON.nc')
+        ns = np.size(vmec_data['psi'])
+        s = np.array([1, ns//2, ns-1, ns-1])
+        vartheta = np.array([0.1, 2, 3.5, 6])
+        phi = np.array([0, 0.1, 0.2, 0.3])
+
+        R, Z = vmec_sfl_coords(s, vartheta, phi, vmec_data)
+
+        for i in range(s.size):
+            # find theta on a fine grid, then check the sfl condition there
+            theta = np.linspace(0, 2*np.pi, 2**14, endpoint=False)
+            R_i = vmec_transf(vmec_data['rmnc'][s[i]], vmec_data['xm'],
+                              vmec_data['xn'], theta, phi[i], trig='cos').flatten()
+            Z_i = vmec_transf(vmec_data['zmns'][s[i]], vmec_data['xm'],
+                              vmec_data['xn'], theta, phi[i], trig='sin').flatten()
+            j = np.argmin((R_i-R[i])**2 + (Z_i-Z[i])**2)
+            err = sfl_err(theta[j:j+1], vartheta[i], phi[i], vmec_data, s[i])
+            np.testing.assert_allclose(np.remainder(err+np.pi, 2*np.pi)-np.pi, 0, atol=1e-3)
+
+    def test_initial_guess_vmec(self):
+        """Tests fitting the initial guess to a VMEC solution"""
+        fname = 'examples/VMEC/wout_DSHAPE.nc'
+        R_basis = FourierZernikeBasis(M=16, N=0, sym=Tristate(True), index='fringe')
+        Z_basis = FourierZernikeBasis(M=16, N=0, sym=Tristate(False), index='fringe')
+        L_basis = DoubleFourierSeries(M=16, N=0, sym=Tristate(False))
+        cR, cZ, cL = get_initial_guess_vmec(fname, R_basis, Z_basis, L_basis)
+
+        with VmecOutput(fname) as vmec_data:
+            ns = vmec_data['psi'].size
+            s = np.array([ns//4, ns//2, ns-1])
+            rho = np.sqrt(vmec_data['psi'][s]/vmec_data['psi'][-1])
+            grid = LinearGrid(L=3, M=7, rho=rho, zeta=np.array([0.0]))
+            R_vmec, Z_vmec = vmec_sfl_coords(
+                s[np.searchsorted(rho, grid.nodes[:, 0])],
+                grid.nodes[:, 1], grid.nodes[:, 2], vmec_data)
+
+        R_desc = Transform(grid, R_basis).transform(cR)
+        Z_desc = Transform(grid, Z_basis).transform(cZ)
+        np.testing.assert_allclose(R_desc, R_vmec, atol=1e-3)
+        np.testing.assert_allclose(Z_desc, Z_vmec, atol=1e-3)
+
+    def test_initial_guess_vmec_3D(self):
+        """Tests the boundary of a 3D initial guess against the DESC input boundary"""
+        inputs = InputReader(['examples/DESC/HELIOTRON']).inputs
+        NFP = inputs['NFP']
+        bdry = inputs['bdry']
+        R_basis = FourierZernikeBasis(M=6, N=3, NFP=NFP, sym=Tristate(True))
+        Z_basis = FourierZernikeBasis(M=6, N=3, NFP=NFP, sym=Tristate(False))
+        L_basis = DoubleFourierSeries(M=6, N=3, NFP=NFP, sym=Tristate(False))
+        cR, cZ, cL = get_initial_guess_vmec('examples/VMEC/wout_HELIOTRON.nc',
+                                            R_basis, Z_basis, L_basis)
+
+        # fitted rho=1 surface and the input boundary curve in the same planes
+        zeta = np.linspace(0, 2*np.pi/NFP, 4, endpoint=False)
+        grid = LinearGrid(L=1, M=25, N=4, NFP=NFP, rho=np.array([1.0]), zeta=zeta)
+        R_desc = Transform(grid, R_basis).transform(cR)
+        Z_desc = Transform(grid, Z_basis).transform(cZ)
+        bdry_grid = LinearGrid(L=1, M=1000, N=4, NFP=NFP, rho=np.array([1.0]), zeta=zeta)
+        bdry_basis = DoubleFourierSeries(M=int(np.max(np.abs(bdry[:, 0]))),
+                                         N=int(np.max(np.abs(bdry[:, 1]))), NFP=NFP)
+        modes = np.hstack([np.zeros((bdry.shape[0], 1)), bdry[:, :2]]).astype(int)
+        A = bdry_basis.evaluate(bdry_grid.nodes, modes=modes)
+        R_bdry = np.dot(A, bdry[:, 2])
+        Z_bdry = np.dot(A, bdry[:, 3])
+
+        for z in zeta:
+            i = grid.nodes[:, 2] == z
+            j = bdry_grid.nodes[:, 2] == z
+            dist = np.sqrt((R_desc[i, np.newaxis] - R_bdry[np.newaxis, j])**2 +
+                           (Z_desc[i, np.newaxis] - Z_bdry[np.newaxis, j])**2)
+            self.assertLess(np.max(np.min(dist, axis=1)), 0.05)
+
+    def test_initial_guess_vmec_inputs(self):
+        """Tests the checks and boundary ratio of the VMEC initial guess"""
+        fname = 'examples/VMEC/wout_HELIOTRON.nc'
+        NFP = read_vmec_output(fname)['NFP']
+        R_basis = FourierZernikeBasis(M=4, N=2, NFP=NFP, sym=Tristate(True))
+        Z_basis = FourierZernikeBasis(M=4, N=2, NFP=NFP, sym=Tristate(False))
+        L_basis = DoubleFourierSeries(M=4, N=2, NFP=NFP, sym=Tristate(False))
+        cR, cZ, cL = get_initial_guess_vmec(fname, R_basis, Z_basis, L_basis)
+        cR_0, cZ_0, cL_0 = get_initial_guess_vmec(fname, R_basis, Z_basis, L_basis,
+                                                  bdry_ratio=0.0)
+        for c, c_0, basis in zip([cR, cZ, cL], [cR_0, cZ_0, cL_0],
+                                 [R_basis, Z_basis, L_basis]):
+            np.testing.assert_allclose(c_0, np.where(basis.modes[:, 2] != 0, 0, c),
+                                       atol=1e-12)
+
+        with self.assertRaises(ValueError):
+            get_initial_guess_vmec(fname, FourierZernikeBasis(M=4, N=2, NFP=NFP+1),
+                                   Z_basis, L_basis)
+        with self.assertRaises(ValueError):
+            get_initial_guess_vmec(fname, FourierZernikeBasis(M=4, N=2, NFP=NFP),
+                                   Z_basis, L_basis)